@@ -0,0 +1,87 @@
+"""add indexes for hot filter columns
+
+Revision ID: 5c1f0e7a9b3d
+Revises: 075a50ee9075
+Create Date: 2026-10-16 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e7a9b3d'
+down_revision: Union[str, None] = '075a50ee9075'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (név, tábla, oszlopok, unique) - megegyezik a models.py-ban deklarált indexekkel
+INDEXES = [
+    ('ix_carts_user_ordered_created', 'carts', ['user_id', 'ordered', 'created_at'], False),
+    ('uq_cart_items_cart_product', 'cart_items', ['cart_id', 'product_id'], True),
+    ('ix_cart_items_product_id', 'cart_items', ['product_id'], False),
+    ('ix_orders_user_id', 'orders', ['user_id'], False),
+    ('ix_orders_created_at', 'orders', ['created_at'], False),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], False),
+    ('ix_order_items_product_id', 'order_items', ['product_id'], False),
+    ('ix_inventory_product_id', 'inventory', ['product_id'], False),
+    ('ix_mixes_user_id', 'mixes', ['user_id'], False),
+    ('ix_mix_components_color_id', 'mix_components', ['color_id'], False),
+    ('ix_email_outbox_due', 'email_outbox', ['status', 'next_attempt_at'], False),
+]
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _merge_duplicate_cart_items():
+    # a unique (cart_id, product_id) előtt az ismétlődő kosártételeket összevonjuk:
+    # a mennyiség a legkisebb cart_item_id-jú sorra kerül, a többi törlődik.
+    # A NULL kulcsú sorok nem ütköznek az indexben, ezekhez nem nyúlunk.
+    op.execute(
+        """
+        UPDATE cart_items
+        SET quantity = (
+            SELECT SUM(other.quantity) FROM cart_items AS other
+            WHERE other.cart_id = cart_items.cart_id AND other.product_id = cart_items.product_id
+        )
+        WHERE cart_item_id IN (
+            SELECT MIN(cart_item_id) FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id HAVING COUNT(*) > 1
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cart_items
+        WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+        AND cart_item_id NOT IN (
+            SELECT MIN(cart_item_id) FROM cart_items
+            WHERE cart_id IS NOT NULL AND product_id IS NOT NULL
+            GROUP BY cart_id, product_id
+        )
+        """
+    )
+
+
+def upgrade() -> None:
+    # a táblákat a create_all hozza létre, ami már az indexeket is létrehozza;
+    # ez a migráció a korábban létrehozott adatbázisokat hozza utol
+    tables = _existing_tables()
+    if 'cart_items' in tables:
+        _merge_duplicate_cart_items()
+    for name, table, columns, unique in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    tables = _existing_tables()
+    for name, table, columns, unique in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,44 @@
+"""add supplier sku to products
+
+Revision ID: 8e2b4d6f1a57
+Revises: 5c1f0e7a9b3d
+Create Date: 2026-10-16 13:40:05.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2b4d6f1a57'
+down_revision: Union[str, None] = '5c1f0e7a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _product_columns():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('products'):
+        return None
+    return {column['name'] for column in inspector.get_columns('products')}
+
+
+def upgrade() -> None:
+    columns = _product_columns()
+    if columns is None:
+        return
+    if 'sku' not in columns:
+        op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    # a meglévő termékeknek nincs cikkszáma; NULL-ból több is lehet
+    op.create_index('uq_products_sku', 'products', ['sku'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    columns = _product_columns()
+    if columns is None or 'sku' not in columns:
+        return
+    op.drop_index('uq_products_sku', table_name='products', if_exists=True)
+    # SQLite 3.35+ natívan támogatja a DROP COLUMN-t, így az FTS triggerek megmaradnak
+    op.execute('ALTER TABLE products DROP COLUMN sku')
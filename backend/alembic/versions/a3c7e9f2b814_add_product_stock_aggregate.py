@@ -0,0 +1,62 @@
+"""add product_stock aggregate maintained from inventory
+
+Revision ID: a3c7e9f2b814
+Revises: 8e2b4d6f1a57
+Create Date: 2026-10-16 15:21:37.550812
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import (
+    INVENTORY_STOCK_DDL, INVENTORY_STOCK_PG_DDL, INVENTORY_STOCK_PG_FUNCTION, INVENTORY_STOCK_TRIGGERS,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e9f2b814'
+down_revision: Union[str, None] = '8e2b4d6f1a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('products') or not inspector.has_table('inventory'):
+        return
+    if not inspector.has_table('product_stock'):
+        op.create_table(
+            'product_stock',
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id'), primary_key=True),
+            sa.Column('quantity', sa.Float(), nullable=False),
+            sa.Column('locations', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        # kezdeti feltöltés; a products.stock_quantity-hez nem nyúlunk, a már
+        # meglévő különbség a rendelések foglalása
+        op.execute(
+            """
+            INSERT INTO product_stock (product_id, quantity, locations, updated_at)
+            SELECT product_id, COALESCE(SUM(quantity), 0), COUNT(*), CURRENT_TIMESTAMP
+            FROM inventory WHERE product_id IS NOT NULL
+            GROUP BY product_id
+            """
+        )
+    if op.get_bind().dialect.name == 'sqlite':
+        for stmt in INVENTORY_STOCK_DDL:
+            op.execute(stmt)
+    elif op.get_bind().dialect.name == 'postgresql':
+        for stmt in INVENTORY_STOCK_PG_DDL:
+            op.execute(stmt)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for name in INVENTORY_STOCK_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+    elif op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS inventory_stock_sync ON inventory')
+        op.execute(f'DROP FUNCTION IF EXISTS {INVENTORY_STOCK_PG_FUNCTION}()')
+    if sa.inspect(op.get_bind()).has_table('product_stock'):
+        op.drop_table('product_stock')
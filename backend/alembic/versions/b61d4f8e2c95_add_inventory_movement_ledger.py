@@ -0,0 +1,64 @@
+"""add inventory movement ledger and snapshots
+
+Revision ID: b61d4f8e2c95
+Revises: a3c7e9f2b814
+Create Date: 2026-10-16 17:42:08.113904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61d4f8e2c95'
+down_revision: Union[str, None] = 'a3c7e9f2b814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MOVEMENT_KINDS = ('receipt', 'sale', 'transfer_in', 'transfer_out', 'adjustment')
+
+
+def upgrade() -> None:
+    # a meglévő készlet az első pillanatképpel (alkalmazás indításkor) kerül a naplóba
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('products'):
+        return
+    if not inspector.has_table('inventory_movements'):
+        op.create_table(
+            'inventory_movements',
+            sa.Column('movement_id', sa.Integer(), primary_key=True),
+            sa.Column('inventory_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id'), nullable=False),
+            sa.Column('location', sa.String(), nullable=True),
+            sa.Column('kind', sa.Enum(*MOVEMENT_KINDS, name='movementkind'), nullable=False),
+            sa.Column('quantity', sa.Float(), nullable=False),
+            sa.Column('reference', sa.String(), nullable=True),
+            sa.Column('note', sa.Text(), nullable=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('ix_inventory_movements_product_movement', 'inventory_movements', ['product_id', 'movement_id'])
+        op.create_index('ix_inventory_movements_product_created', 'inventory_movements', ['product_id', 'created_at'])
+    if not inspector.has_table('inventory_snapshots'):
+        op.create_table(
+            'inventory_snapshots',
+            sa.Column('snapshot_id', sa.Integer(), primary_key=True),
+            sa.Column('taken_at', sa.DateTime(), nullable=False),
+            sa.Column('last_movement_id', sa.Integer(), nullable=False),
+            sa.Column('inventory_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.product_id'), nullable=False),
+            sa.Column('location', sa.String(), nullable=True),
+            sa.Column('quantity', sa.Float(), nullable=False),
+        )
+        op.create_index('ix_inventory_snapshots_taken_at', 'inventory_snapshots', ['taken_at'])
+        op.create_index('ix_inventory_snapshots_product_taken', 'inventory_snapshots', ['product_id', 'taken_at'])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('inventory_snapshots'):
+        op.drop_table('inventory_snapshots')
+    if inspector.has_table('inventory_movements'):
+        op.drop_table('inventory_movements')
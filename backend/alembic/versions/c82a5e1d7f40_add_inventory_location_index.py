@@ -0,0 +1,28 @@
+"""add (location, inventory_id) index for the inventory listing
+
+Revision ID: c82a5e1d7f40
+Revises: b61d4f8e2c95
+Create Date: 2026-10-16 18:55:21.407316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c82a5e1d7f40'
+down_revision: Union[str, None] = 'b61d4f8e2c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('inventory'):
+        op.create_index('ix_inventory_location_id', 'inventory', ['location', 'inventory_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('inventory'):
+        op.drop_index('ix_inventory_location_id', table_name='inventory', if_exists=True)
@@ -0,0 +1,403 @@
+import csv
+import io
+import json
+import math
+import os
+import re
+import time
+from itertools import islice
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app import models
+from app.database import SessionLocal
+from app.utils.cache import catalog_cache
+from app.utils.passwords import get_hash_executor, hash_password, PASSWORD_HASH_WORKERS
+from app.utils.upsert import upsert_insert
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Tömeges adatbetöltés (CSV / JSON) ----
+# A fájlokat soronként / objektumonként olvassuk és DATA_LOAD_BATCH_SIZE méretű
+# kötegekben executemany INSERT-tel írjuk, így a memóriahasználat a fájl méretétől
+# független. Egy fájl alapértelmezésben egy tranzakció: hibánál semmi nem marad
+# belőle. DATA_LOAD_COMMIT_ROWS > 0 esetén ennyi soronként commitolunk (kisebb
+# napló nagyon nagy fájloknál); ekkor hibánál a már commitolt sorok megmaradnak,
+# és a PartialLoadError jelenti a számukat.
+# A felhasználók jelszavát kötegenként a jelszó process poolban hash-eljük.
+
+DATA_LOAD_BATCH_SIZE = int(os.getenv("DATA_LOAD_BATCH_SIZE", "5000"))
+DATA_LOAD_COMMIT_ROWS = int(os.getenv("DATA_LOAD_COMMIT_ROWS", "0"))
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv("PRODUCT_IMPORT_BATCH_SIZE", "5000"))
+PRODUCT_IMPORT_MAX_ERRORS = int(os.getenv("PRODUCT_IMPORT_MAX_ERRORS", "1000"))
+JSON_READ_CHUNK = 1 << 16
+
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(value, default=None):
+    value = _text(value)
+    return default if value is None else float(value)
+
+
+def _bool(value, default=True):
+    if isinstance(value, bool):
+        return value
+    value = _text(value)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "igen", "y")
+
+
+def _required(row: dict, key: str):
+    value = _text(row.get(key))
+    if value is None:
+        raise ValueError(f"Missing required field '{key}' in row: {row}")
+    return value
+
+
+def _user_row(row: dict) -> dict:
+    if not _text(row.get("password")) and not _text(row.get("password_hash")):
+        raise ValueError(f"Missing required field 'password' in row: {row}")
+    return {
+        "name": _required(row, "name"),
+        "email": _required(row, "email"),
+        # a sima jelszót a köteg beszúrása előtt hash-eljük (lásd _hash_passwords)
+        "password_hash": _text(row.get("password_hash")),
+        "password": _text(row.get("password")),
+        "phone": _text(row.get("phone")),
+        "address": _text(row.get("address")),
+        "role": models.UserRole(_text(row.get("role")) or "user"),
+    }
+
+
+def _color_row(row: dict) -> dict:
+    return {
+        "name": _required(row, "name"),
+        "hex_code": _text(row.get("hex_code")),
+        "rgb_code": _text(row.get("rgb_code")),
+        "available": _bool(row.get("available")),
+    }
+
+
+def _product_row(row: dict) -> dict:
+    return {
+        "sku": _text(row.get("sku")),
+        "name": _required(row, "name"),
+        "description": _text(row.get("description")),
+        "category": _text(row.get("category")),
+        "price": _number(_required(row, "price")),
+        "stock_quantity": _number(row.get("stock_quantity"), 0),
+        "unit": _text(row.get("unit")),
+        "image_url": _text(row.get("image_url")),
+    }
+
+
+ENTITIES = {
+    "users": (models.User, _user_row),
+    "colors": (models.Color, _color_row),
+    "products": (models.Product, _product_row),
+}
+
+
+def _hash_passwords(batch: list):
+    pending = [row for row in batch if row["password_hash"] is None]
+    passwords = [row["password"] for row in pending]
+    executor = get_hash_executor()
+    if executor is None or len(passwords) < 2:
+        hashes = map(hash_password, passwords)
+    else:
+        hashes = executor.map(hash_password, passwords, chunksize=max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4)))
+    for row, password_hash in zip(pending, hashes):
+        row["password_hash"] = password_hash
+    for row in batch:
+        del row["password"]
+
+
+def iter_csv(path: str):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_json_lines(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_json(path: str, entity_type: str):
+    """Egy JSON tömb elemei egyenként, a teljes fájl beolvasása nélkül.
+    {"<entity_type>": [...]} alakú fájlnál a teljes fájlt beolvassuk."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buf = f.read(JSON_READ_CHUNK)
+        pos = _JSON_SEPARATORS.match(buf).end()
+        if buf[pos:pos + 1] != "[":
+            data = json.loads(buf + f.read())
+            yield from (data.get(entity_type, []) if isinstance(data, dict) else data)
+            return
+
+        pos += 1
+        eof = False
+        while True:
+            pos = _JSON_SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos == len(buf):
+                    raise json.JSONDecodeError("Need more data", buf, pos)
+                obj, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(JSON_READ_CHUNK)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield obj
+
+
+def iter_file(path: str, entity_type: str):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return iter_csv(path)
+    if extension in (".jsonl", ".ndjson"):
+        return iter_json_lines(path)
+    if extension == ".json":
+        return iter_json(path, entity_type)
+    raise ValueError(f"Unsupported file type: {extension}")
+
+
+class PartialLoadError(Exception):
+    """Köztes commitok után jött hiba: az első `committed` sor a táblában maradt."""
+
+    def __init__(self, committed: int, error: Exception):
+        super().__init__(f"{error} ({committed} rows already committed)")
+        self.committed = committed
+        self.error = error
+
+
+class DatabaseLoader:
+    """Felhasználók, színek és termékek tömeges betöltése fájlból vagy dict-ekből.
+
+    Session nélkül létrehozva saját sessiont nyit, amelyet a with blokk végén lezár.
+    """
+
+    def __init__(self, db_session: Session | None = None, batch_size: int = DATA_LOAD_BATCH_SIZE,
+                 commit_rows: int = DATA_LOAD_COMMIT_ROWS):
+        self._owns_session = db_session is None
+        self.db = db_session if db_session is not None else SessionLocal()
+        self.batch_size = batch_size
+        self.committed_rows = 0  # az utolsó load_data_from_file által commitolt sorok
+        self.commit_rows = commit_rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.db.rollback()
+        if self._owns_session:
+            self.db.close()
+        return False
+
+    def load_entity_data(self, entity: str, rows) -> int:
+        """A sorokat (dict-ek iterálhatója) kötegekben beszúrja; a beszúrt sorok számát adja vissza."""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity type: {entity}")
+        model, normalize = ENTITIES[entity]
+
+        rows = iter(rows)
+        loaded = committed = 0
+        try:
+            while True:
+                batch = [normalize(row) for row in islice(rows, self.batch_size)]
+                if not batch:
+                    break
+                if entity == "users":
+                    _hash_passwords(batch)
+                self.db.execute(insert(model.__table__), batch)
+                loaded += len(batch)
+                if self.commit_rows and loaded - committed >= self.commit_rows:
+                    self.db.commit()
+                    committed = loaded
+            self.db.commit()
+            committed = loaded
+        except Exception as exc:
+            self.db.rollback()
+            if committed:
+                raise PartialLoadError(committed, exc) from exc
+            raise
+        finally:
+            if entity == "products" and committed:
+                catalog_cache.bump()
+        return loaded
+
+    def load_data_from_file(self, file_path: str, entity_type: str) -> bool:
+        """CSV, JSON (tömb) vagy JSON Lines fájl betöltése; hiba esetén False.
+
+        Hibánál a fájl visszagörgetődik; DATA_LOAD_COMMIT_ROWS használatakor a már
+        commitolt sorok megmaradnak, számukat a hibaüzenet és a committed_rows mutatja.
+        """
+        self.committed_rows = 0
+        try:
+            loaded = self.load_entity_data(entity_type, iter_file(file_path, entity_type))
+        except PartialLoadError as exc:
+            self.committed_rows = exc.committed
+            print(f"Betöltési hiba ({file_path}, {entity_type}): {exc.error}; "
+                  f"részleges betöltés, {exc.committed} sor commitolva maradt")
+            return False
+        except Exception as exc:
+            print(f"Betöltési hiba ({file_path}, {entity_type}): {exc}")
+            return False
+        self.committed_rows = loaded
+        print(f"{loaded} {entity_type} sor betöltve: {file_path}")
+        return True
+
+
+# ---- Termék import (upsert beszállítói cikkszám szerint) ----
+# Az admin által feltöltött CSV / JSON Lines árlista sorait egyenként ellenőrizzük;
+# a hibás sorokat kihagyjuk és sorszámmal jelentjük, a jókat PRODUCT_IMPORT_BATCH_SIZE
+# méretű kötegekben, kötegenként egy INSERT ... ON CONFLICT(sku) executemany-vel és
+# egy committal írjuk. Meglévő terméknél az üres opcionális mezők nem írják felül a
+# tárolt értéket, a stock_quantity-t csak új terméknél állítjuk (a készletet a
+# raktár és a rendelések kezelik).
+
+_products = models.Product.__table__
+_IMPORT_OPTIONAL = ("description", "category", "unit", "image_url")
+
+
+def _import_row(raw) -> dict:
+    row = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    product = _product_row(row)
+    product["sku"] = _required(row, "sku")
+    if not math.isfinite(product["price"]) or product["price"] < 0:
+        raise ValueError(f"Invalid price: {product['price']}")
+    return product
+
+
+def _upsert_products(db: Session, rows: list):
+    # kötegen belül ismétlődő cikkszámnál az utolsó sor nyer; a natív upsert
+    # (PostgreSQL: egyetlen több soros INSERT) nem módosíthatja kétszer ugyanazt a sort
+    by_sku = {row["sku"]: row for row in rows}
+    stmt = upsert_insert(db, _products)
+    if stmt is not None:
+        set_ = {"name": stmt.excluded.name, "price": stmt.excluded.price}
+        set_.update({c: func.coalesce(stmt.excluded[c], _products.c[c]) for c in _IMPORT_OPTIONAL})
+        db.execute(stmt.on_conflict_do_update(index_elements=[_products.c.sku], set_=set_), list(by_sku.values()))
+        return
+
+    # natív upsert nélkül: a köteg meglévő cikkszámai egy lekérdezéssel, majd
+    # egy UPDATE és egy INSERT executemany
+    existing = dict(db.execute(select(_products.c.sku, _products.c.product_id).where(_products.c.sku.in_(list(by_sku)))).all())
+    updates = [
+        {"b_product_id": existing[sku], "b_name": row["name"], "b_price": row["price"],
+         **{f"b_{c}": row[c] for c in _IMPORT_OPTIONAL}}
+        for sku, row in by_sku.items() if sku in existing
+    ]
+    if updates:
+        db.execute(
+            update(_products)
+            .where(_products.c.product_id == bindparam("b_product_id"))
+            .values(name=bindparam("b_name"), price=bindparam("b_price"),
+                    **{c: func.coalesce(bindparam(f"b_{c}"), _products.c[c]) for c in _IMPORT_OPTIONAL}),
+            updates,
+        )
+    inserts = [row for sku, row in by_sku.items() if sku not in existing]
+    if inserts:
+        db.execute(insert(_products), inserts)
+
+
+def iter_csv_records(f):
+    """(sorszám, dict) párok egy szöveges CSV fájlobjektumból."""
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_json_line_records(f):
+    """(sorszám, nyers JSON szöveg) párok; a sort az import ellenőrzése parse-olja."""
+    for line_number, line in enumerate(f, 1):
+        if line.strip():
+            yield line_number, line
+
+
+def iter_upload_records(binary_file, filename: str | None, content_type: str | None = None):
+    """Feltöltött (bináris) fájl sorai a kiterjesztés vagy a content type alapján."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if extension == ".csv" or (not extension and content_type == "text/csv"):
+        return iter_csv_records(text_file)
+    if extension in (".jsonl", ".ndjson") or (not extension and content_type in ("application/x-ndjson", "application/jsonl")):
+        return iter_json_line_records(text_file)
+    text_file.detach()
+    raise ValueError(f"Unsupported file type: {extension or content_type or 'unknown'}")
+
+
+def import_products(db: Session, records, batch_size: int | None = None, max_errors: int | None = None) -> dict:
+    """(sorszám, nyers sor) párok importja kötegelt upserttel.
+
+    A jelentés: feldolgozott, importált és hibás sorok száma, az első max_errors
+    hiba (sorszám, cikkszám, üzenet), az eltelt idő és a sor/s.
+    """
+    batch_size = batch_size or PRODUCT_IMPORT_BATCH_SIZE
+    max_errors = PRODUCT_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    started = time.perf_counter()
+    report = {"rows": 0, "imported": 0, "failed": 0, "aborted": False, "errors": []}
+    batch = []
+
+    def fail(row_number, sku, message):
+        report["failed"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"row": row_number, "sku": sku, "error": message})
+
+    def flush():
+        try:
+            _upsert_products(db, [row for _, row in batch])
+            db.commit()
+            report["imported"] += len(batch)
+        except SQLAlchemyError as exc:
+            db.rollback()
+            message = f"Database error: {getattr(exc, 'orig', None) or exc}"
+            for row_number, row in batch:
+                fail(row_number, row["sku"], message)
+        batch.clear()
+
+    try:
+        for row_number, raw in records:
+            report["rows"] += 1
+            try:
+                row = _import_row(raw)
+            except (ValueError, TypeError) as exc:
+                sku = raw.get("sku") if isinstance(raw, dict) else None
+                fail(row_number, _text(sku), str(exc))
+                continue
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                flush()
+    except (csv.Error, UnicodeDecodeError) as exc:
+        # olvashatatlan bemenet: az addig beolvasott sorokat még beírjuk
+        report["aborted"] = True
+        fail(None, None, f"Unreadable input: {exc}")
+    if batch:
+        flush()
+    if report["imported"]:
+        catalog_cache.bump()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+    return report
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -9,12 +11,102 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")  # fallback SQLite
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# ---- Engine profil ----
+# DB_PROFILE=tuned (alapértelmezett): SQLite alatt WAL napló és a lenti pragmák,
+# így az olvasók nem várnak a kosár írásaira. DB_PROFILE=default: gyári SQLite beállítások.
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negatív érték: KiB, azaz 64 MB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# A pool legalább akkora legyen, mint a Starlette threadpool (40 szál), különben
+# a sync végpontok kifogyasztják a kapcsolatokat és egymásra várnak.
+POOL_DEFAULTS = {
+    "sqlite": {"pool_size": 40, "max_overflow": 10},
+    "postgresql": {"pool_size": 20, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+    "mysql": {"pool_size": 20, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """Backendenként a pool beállítások; DB_POOL_SIZE / DB_MAX_OVERFLOW felülírja."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # memóriabeli adatbázis: minden kapcsolat ugyanazt lássa
+        return {"poolclass": StaticPool}
+
+    options = dict(POOL_DEFAULTS.get(backend, {}))
+    if os.getenv("DB_POOL_SIZE"):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE"))
+    if os.getenv("DB_MAX_OVERFLOW"):
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW"))
+    return options
+
+
+def build_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    if profile != "tuned":
+        return create_engine(url, connect_args={"check_same_thread": False} if is_sqlite else {})
+
+    new_engine = create_engine(
+        url, connect_args={"check_same_thread": False} if is_sqlite else {}, **engine_options(url)
+    )
+    if is_sqlite:
+        event.listen(new_engine, "connect", apply_sqlite_pragmas)
+    return new_engine
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# ---- Async engine (opcionális) ----
+# DB_ASYNC=1 esetén a nagy forgalmú olvasó végpontok AsyncSession-t használnak,
+# így nem foglalnak szálat a Starlette threadpoolból.
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+    if DB_PROFILE == "tuned":
+        async_options = engine_options(ASYNC_DATABASE_URL)
+        if make_url(ASYNC_DATABASE_URL).get_backend_name() == "sqlite" and "poolclass" not in async_options:
+            # az aiosqlite alapból NullPool-t használ (kérésenként új kapcsolat és szál)
+            async_options["poolclass"] = AsyncAdaptedQueuePool
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_options)
+        if async_engine.dialect.name == "sqlite":
+            event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    else:
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # dependency -> minden endpointban hívható
 def get_db():
     db = SessionLocal()
@@ -22,3 +114,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,12 +1,29 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import users, products, carts, orders, inventory, auth, statistics
-from app.database import Base, engine
+from app import database
+from app.database import Base, engine, DB_ASYNC, SessionLocal
+from app.utils.search import ensure_search_index
+from app.utils.passwords import shutdown_hash_executor
+from app.utils.stats_rollup import backfill_if_empty
+from app.utils.stock_levels import ensure_stock_triggers, reconcile_if_empty
+from app.utils.inventory_ledger import snapshot_if_empty
+from app.utils import outbox, metrics
 
 app = FastAPI(title="Festékbolt API")
 
+# SQL lekérdezések számlálása kérésenként (lásd app.utils.metrics)
+metrics.instrument_engine(engine)
+if database.async_engine is not None:
+    metrics.instrument_engine(database.async_engine.sync_engine)
+
 # routerek regisztrálása
 app.include_router(users.router)
+if DB_ASYNC:
+    from app.routes import products_async
+    # az async olvasó végpontok a sync router előtt, így ezek válaszolnak
+    app.include_router(products_async.router)
 app.include_router(products.router)
 app.include_router(carts.router)
 app.include_router(orders.router)
@@ -17,16 +34,43 @@ app.include_router(statistics.router)
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    ensure_stock_triggers(engine)
+    db = SessionLocal()
+    try:
+        backfill_if_empty(db)
+        reconcile_if_empty(db)
+        snapshot_if_empty(db)
+    finally:
+        db.close()
+    # kimenő levelek kézbesítése háttérszálon (EMAIL_OUTBOX_WORKER=0 esetén külön: python -m app.utils.outbox)
+    outbox.start_worker()
     print("Database tables created!")
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    shutdown_hash_executor()
+    outbox.stop_worker()
+    # a poolban tartott aiosqlite kapcsolatok saját szálat futtatnak
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
 @app.get("/")
 def root():
     return {"message": "Hello, FastAPI működik!"}
 
+# Prometheus szöveges formátum
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # Vite default port
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# a felhasználói middleware-ek közül a legkülső, így a CORS ideje is beleszámít
+app.add_middleware(metrics.MetricsMiddleware)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Enum, Text, Boolean, DDL, Index, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -16,6 +16,17 @@ class OrderStatus(enum.Enum):
     completed = "completed"
     cancelled = "cancelled"
 
+# ezekben az állapotokban a rendelés még foglalja a készletet; a kiszállított /
+# teljesített rendelés áruja már elment, a lemondotté már visszakerült
+RESERVING_STATUSES = (OrderStatus.pending, OrderStatus.paid)
+
+class MovementKind(enum.Enum):
+    receipt = "receipt"            # bevételezés
+    sale = "sale"                  # eladás (pult, nem webes rendelés)
+    transfer_in = "transfer_in"    # áttárolás: érkezés
+    transfer_out = "transfer_out"  # áttárolás: kiadás
+    adjustment = "adjustment"      # leltárkorrekció
+
 # ---- Users ----
 class User(Base):
     __tablename__ = 'users'
@@ -36,8 +47,11 @@ class User(Base):
 # ---- Products ----
 class Product(Base):
     __tablename__ = 'products'
+    # beszállítói cikkszám: a tömeges import (POST /products/import) ez alapján frissít
+    __table_args__ = (Index('uq_products_sku', 'sku', unique=True),)
     
     product_id = Column(Integer, primary_key=True)
+    sku = Column(String)
     name = Column(String, nullable=False)
     description = Column(Text)
     category = Column(String)
@@ -51,6 +65,47 @@ class Product(Base):
     order_items = relationship("OrderItem", back_populates="product")
     inventory_items = relationship("Inventory", back_populates="product")
 
+# ---- Termékkereső index (SQLite FTS5) ----
+# Külső tartalmú FTS5 tábla a products táblán; triggerek tartják szinkronban.
+# remove_diacritics: "falfestek" is megtalálja a "falfesték"-et.
+# A módosítás trigger csak a kereshető oszlopokra fut: a gyakori
+# stock_quantity frissítések (foglalás, készlet triggerek) nem írják az indexet.
+PRODUCT_SEARCH_TRIGGERS = ['products_fts_ai', 'products_fts_ad', 'products_fts_au']
+
+PRODUCT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category,
+        content='products', content_rowid='product_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+for _stmt in PRODUCT_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
+
 # ---- Colors & Mixes ----
 class Color(Base):
     __tablename__ = 'colors'
@@ -67,7 +122,7 @@ class Mix(Base):
     __tablename__ = 'mixes'
     
     mix_id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'))
+    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -78,7 +133,7 @@ class MixComponent(Base):
     __tablename__ = 'mix_components'
     
     mix_id = Column(Integer, ForeignKey('mixes.mix_id'), primary_key=True)
-    color_id = Column(Integer, ForeignKey('colors.color_id'), primary_key=True)
+    color_id = Column(Integer, ForeignKey('colors.color_id'), primary_key=True, index=True)
     ratio = Column(Float, nullable=False)
     
     mix = relationship("Mix", back_populates="components")
@@ -87,6 +142,8 @@ class MixComponent(Base):
 # ---- Carts & CartItems ----
 class Cart(Base):
     __tablename__ = 'carts'
+    # aktív kosár keresése: user_id + ordered szűrés, legújabb created_at
+    __table_args__ = (Index('ix_carts_user_ordered_created', 'user_id', 'ordered', 'created_at'),)
     
     cart_id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.user_id'))
@@ -98,10 +155,12 @@ class Cart(Base):
 
 class CartItem(Base):
     __tablename__ = 'cart_items'
+    # egy termék kosaranként egyszer szerepel; a cart_id szerinti keresést is ez szolgálja ki
+    __table_args__ = (Index('uq_cart_items_cart_product', 'cart_id', 'product_id', unique=True),)
     
     cart_item_id = Column(Integer, primary_key=True)
     cart_id = Column(Integer, ForeignKey('carts.cart_id'))
-    product_id = Column(Integer, ForeignKey('products.product_id'))
+    product_id = Column(Integer, ForeignKey('products.product_id'), index=True)
     quantity = Column(Float, nullable=False)
     
     cart = relationship("Cart", back_populates="items")
@@ -112,10 +171,10 @@ class Order(Base):
     __tablename__ = 'orders'
     
     order_id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'))
+    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
     status = Column(Enum(OrderStatus), default=OrderStatus.pending)
     total_price = Column(Float, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
@@ -124,22 +183,244 @@ class OrderItem(Base):
     __tablename__ = 'order_items'
     
     order_item_id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey('orders.order_id'))
-    product_id = Column(Integer, ForeignKey('products.product_id'))
+    order_id = Column(Integer, ForeignKey('orders.order_id'), index=True)
+    product_id = Column(Integer, ForeignKey('products.product_id'), index=True)
     quantity = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=False)
     
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
 
+# ---- Napi rendelés statisztika (rollup) ----
+# Naponta és státuszonként a rendelések száma és összege; a rendelés
+# létrehozása/státuszváltása ugyanabban a tranzakcióban frissíti.
+class OrderStatsDaily(Base):
+    __tablename__ = 'order_stats_daily'
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+# ---- Email outbox ----
+# A kimenő leveleket ugyanabban a tranzakcióban írjuk ide, mint az őket kiváltó
+# változást; a kiküldést az outbox worker végzi kötegekben, újrapróbálkozással.
+class EmailOutbox(Base):
+    __tablename__ = 'email_outbox'
+    # a worker esedékes (pending, next_attempt_at <= most) sorokat keres
+    __table_args__ = (Index('ix_email_outbox_due', 'status', 'next_attempt_at'),)
+
+    outbox_id = Column(Integer, primary_key=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String, default="html")
+    status = Column(String, default="pending", nullable=False)  # pending / sent / failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+
 # ---- Inventory ----
 class Inventory(Base):
     __tablename__ = 'inventory'
-    
+    # raktár képernyő: location = ? szűrés és keyset lapozás (location, inventory_id) szerint
+    __table_args__ = (Index('ix_inventory_location_id', 'location', 'inventory_id'),)
+
     inventory_id = Column(Integer, primary_key=True)
-    product_id = Column(Integer, ForeignKey('products.product_id'))
+    product_id = Column(Integer, ForeignKey('products.product_id'), index=True)
     location = Column(String)
     quantity = Column(Float, default=0)
     updated_at = Column(DateTime, default=datetime.utcnow)
     
-    product = relationship("Product", back_populates="inventory_items")
\ No newline at end of file
+    product = relationship("Product", back_populates="inventory_items")
+
+# ---- Termékenkénti készlet összesítő ----
+# A product_stock sora a termék raktárhelyeinek (inventory) összege és száma.
+# Az inventory triggerei (SQLite és PostgreSQL) tartják karban, és ugyanazzal a
+# különbséggel a products.stock_quantity-t (szabad készlet) is módosítják:
+# bevételezés / leltárkorrekció a szabad készletet is változtatja, a rendelések
+# foglalása (stock_quantity - quantity) nem változik. Eltérés esetén:
+# app.utils.stock_levels.reconcile.
+#
+# Átvétel: a termék első raktárhelye nem hozzáad a termékhez megadott készlethez
+# (seed, betöltött termékfájl, POST /products), hanem átveszi: onnantól a szabad
+# készlet a raktárhelyek összege mínusz a nyitott rendelések foglalása. Így a
+# "termék 50 db + raktárhely 50 db" nem lesz 100.
+class ProductStock(Base):
+    __tablename__ = 'product_stock'
+
+    product_id = Column(Integer, ForeignKey('products.product_id'), primary_key=True)
+    quantity = Column(Float, nullable=False, default=0)
+    locations = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    product = relationship("Product")
+
+
+INVENTORY_STOCK_TRIGGERS = ['inventory_stock_ai', 'inventory_stock_ad', 'inventory_stock_au']
+
+# a termék nyitott (RESERVING_STATUSES) rendeléseinek foglalása
+_RESERVING_SQL = ", ".join(f"'{status.name}'" for status in RESERVING_STATUSES)
+_RESERVED_SQL = f"""
+            (SELECT COALESCE(SUM(order_items.quantity), 0) FROM order_items
+             JOIN orders ON orders.order_id = order_items.order_id
+             WHERE order_items.product_id = new.product_id AND orders.status IN ({_RESERVING_SQL}))"""
+
+# a new sor a termék egyetlen raktárhelye (az AFTER triggerben már benne van a táblában)
+_FIRST_LOCATION_SQL = """
+            NOT EXISTS (SELECT 1 FROM inventory
+                        WHERE product_id = new.product_id AND inventory_id != new.inventory_id)"""
+
+INVENTORY_STOCK_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_stock_ai AFTER INSERT ON inventory BEGIN
+        UPDATE products SET stock_quantity = CASE
+            WHEN {_FIRST_LOCATION_SQL}
+            THEN COALESCE(new.quantity, 0) - {_RESERVED_SQL}
+            ELSE COALESCE(stock_quantity, 0) + COALESCE(new.quantity, 0) END
+        WHERE product_id = new.product_id;
+        INSERT INTO product_stock(product_id, quantity, locations, updated_at)
+        VALUES (new.product_id, COALESCE(new.quantity, 0), 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(product_id) DO UPDATE SET
+            quantity = product_stock.quantity + excluded.quantity,
+            locations = product_stock.locations + 1,
+            updated_at = excluded.updated_at;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_stock_ad AFTER DELETE ON inventory BEGIN
+        UPDATE product_stock SET
+            quantity = quantity - COALESCE(old.quantity, 0),
+            locations = locations - 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE product_id = old.product_id;
+        UPDATE products SET stock_quantity = COALESCE(stock_quantity, 0) - COALESCE(old.quantity, 0)
+        WHERE product_id = old.product_id;
+    END
+    """,
+    # a régi sor kivonása és az új hozzáadása; termékváltásnál (product_id) is helyes,
+    # és ha az új terméknek ez az első raktárhelye, az átveszi a készletét
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_stock_au AFTER UPDATE OF product_id, quantity ON inventory BEGIN
+        UPDATE product_stock SET
+            quantity = quantity - COALESCE(old.quantity, 0),
+            locations = locations - 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE product_id = old.product_id;
+        UPDATE products SET stock_quantity = COALESCE(stock_quantity, 0) - COALESCE(old.quantity, 0)
+        WHERE product_id = old.product_id;
+        UPDATE products SET stock_quantity = CASE
+            WHEN old.product_id IS NOT new.product_id AND {_FIRST_LOCATION_SQL}
+            THEN COALESCE(new.quantity, 0) - {_RESERVED_SQL}
+            ELSE COALESCE(stock_quantity, 0) + COALESCE(new.quantity, 0) END
+        WHERE product_id = new.product_id;
+        INSERT INTO product_stock(product_id, quantity, locations, updated_at)
+        VALUES (new.product_id, COALESCE(new.quantity, 0), 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(product_id) DO UPDATE SET
+            quantity = product_stock.quantity + excluded.quantity,
+            locations = product_stock.locations + 1,
+            updated_at = excluded.updated_at;
+    END
+    """,
+]
+
+# PostgreSQL alatt ugyanez egy trigger függvénnyel. A termék sorát előbb
+# zároljuk, így két párhuzamos "első raktárhely" közül a második már látja az
+# elsőt (READ COMMITTED alatt minden utasítás friss pillanatképet kap).
+INVENTORY_STOCK_PG_FUNCTION = 'inventory_stock_sync'
+
+INVENTORY_STOCK_PG_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION {INVENTORY_STOCK_PG_FUNCTION}() RETURNS trigger AS $$
+    DECLARE
+        first_location boolean;
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE product_stock SET
+                quantity = quantity - COALESCE(old.quantity, 0),
+                locations = locations - 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE product_id = old.product_id;
+            UPDATE products SET stock_quantity = COALESCE(stock_quantity, 0) - COALESCE(old.quantity, 0)
+            WHERE product_id = old.product_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            first_location := TG_OP = 'INSERT';
+            IF TG_OP = 'UPDATE' THEN
+                first_location := old.product_id IS DISTINCT FROM new.product_id;
+            END IF;
+            IF first_location THEN
+                PERFORM 1 FROM products WHERE product_id = new.product_id FOR UPDATE;
+                first_location := NOT EXISTS (SELECT 1 FROM inventory
+                    WHERE product_id = new.product_id AND inventory_id != new.inventory_id);
+            END IF;
+            UPDATE products SET stock_quantity = CASE
+                WHEN first_location THEN COALESCE(new.quantity, 0) - {_RESERVED_SQL.strip()}
+                ELSE COALESCE(stock_quantity, 0) + COALESCE(new.quantity, 0) END
+            WHERE product_id = new.product_id;
+            INSERT INTO product_stock(product_id, quantity, locations, updated_at)
+            VALUES (new.product_id, COALESCE(new.quantity, 0), 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(product_id) DO UPDATE SET
+                quantity = product_stock.quantity + excluded.quantity,
+                locations = product_stock.locations + 1,
+                updated_at = excluded.updated_at;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS inventory_stock_sync ON inventory",
+    f"""
+    CREATE TRIGGER inventory_stock_sync
+    AFTER INSERT OR DELETE OR UPDATE OF product_id, quantity ON inventory
+    FOR EACH ROW EXECUTE FUNCTION {INVENTORY_STOCK_PG_FUNCTION}()
+    """,
+]
+
+for _stmt in INVENTORY_STOCK_DDL:
+    event.listen(Inventory.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in INVENTORY_STOCK_PG_DDL:
+    event.listen(Inventory.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+
+
+# ---- Készletmozgás napló (csak hozzáfűzés) ----
+# Minden inventory.quantity változás egy előjeles mozgássor (app.utils.inventory_ledger).
+# Az inventory_id szándékosan nem idegen kulcs: a törölt raktárhely története megmarad,
+# ezért a termék és a raktárhely neve is a sorban van.
+class InventoryMovement(Base):
+    __tablename__ = 'inventory_movements'
+    __table_args__ = (
+        # pillanatkép utáni delta: product_id = ? AND movement_id > ?
+        Index('ix_inventory_movements_product_movement', 'product_id', 'movement_id'),
+        # időszakos riport: product_id = ? AND created_at BETWEEN ? AND ?
+        Index('ix_inventory_movements_product_created', 'product_id', 'created_at'),
+    )
+
+    movement_id = Column(Integer, primary_key=True)
+    inventory_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, ForeignKey('products.product_id'), nullable=False)
+    location = Column(String)
+    kind = Column(Enum(MovementKind), nullable=False)
+    quantity = Column(Float, nullable=False)  # előjeles változás
+    reference = Column(String)                # pl. áttárolás párja, bizonylatszám
+    note = Column(Text)
+    user_id = Column(Integer, ForeignKey('users.user_id'))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# ---- Időszakos készlet pillanatképek ----
+# Egy futás raktárhelyenként egy sort ír azonos taken_at és last_movement_id
+# értékkel: a sor a last_movement_id-ig (bezárólag) minden mozgást tartalmaz.
+class InventorySnapshot(Base):
+    __tablename__ = 'inventory_snapshots'
+    __table_args__ = (Index('ix_inventory_snapshots_product_taken', 'product_id', 'taken_at'),)
+
+    snapshot_id = Column(Integer, primary_key=True)
+    taken_at = Column(DateTime, nullable=False, index=True)
+    last_movement_id = Column(Integer, nullable=False)
+    inventory_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, ForeignKey('products.product_id'), nullable=False)
+    location = Column(String)
+    quantity = Column(Float, nullable=False)
@@ -1,21 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.utils.security import verify_password, create_access_token
+from app.utils.security import create_access_token
+from app.utils.passwords import verify_and_update_password_async
+from app.utils.query_budget import query_budget
 from app.database import get_db
 from app import models
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+# async végpont: a bcrypt ellenőrzés a process poolban fut, az adatbázis
+# műveletek pedig a threadpoolban, így az event loop nem blokkolódik
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+@query_budget(2)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_get_user_by_email, db, form_data.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    valid, new_hash = await verify_and_update_password_async(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_access_token({"user_id": user.user_id, "role": user.role.value})
-    return {
+    response = {
         "access_token": token,
         "token_type": "bearer",
         "user": {
@@ -25,3 +39,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             "role": user.role,
         },
     }
+
+    # megváltozott a bcrypt költség: a helyes jelszóból most frissítjük a hash-t
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
+
+    return response
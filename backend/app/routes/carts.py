@@ -2,14 +2,17 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
-from app.schemas.cart import CartCreate, CartRead, CartItemCreate, CartItemRead
+from app.schemas.cart import CartCreate, CartRead, CartItemCreate, CartItemRead, CartItemBatch
 from app.utils.security import get_current_user
+from app.utils.query_budget import query_budget
+from app.utils.cart_items import upsert_cart_item, fold_operations, apply_cart_operations
 
 router = APIRouter(prefix="/carts", tags=["Carts"])
 
 
 # ---- Kosár létrehozása ----
 @router.post("/", response_model=CartRead)
+@query_budget(4)
 def create_cart(cart_data: CartCreate, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.user_id == cart_data.user_id).first()
     if not user:
@@ -23,47 +26,72 @@ def create_cart(cart_data: CartCreate, db: Session = Depends(get_db)):
 
 
 # ---- Termék hozzáadása ----
+# egyetlen INSERT ... ON CONFLICT utasítás (app.utils.cart_items); ha nem adott
+# vissza sort, csak akkor kérdezzük le, miért nem (kosár, jogosultság, termék)
 @router.post("/{cart_id}/items", response_model=CartItemRead)
+@query_budget(3)
 def add_item(
     cart_id: int,
     item_data: CartItemCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
+):
+    owner_id = None if current_user.role.value == "admin" else current_user.user_id
+    item = upsert_cart_item(db, cart_id, item_data.product_id, item_data.quantity, owner_id=owner_id)
+    if item is None:
+        db.rollback()
+        cart = db.query(models.Cart.user_id).filter(models.Cart.cart_id == cart_id).first()
+        if not cart:
+            raise HTTPException(status_code=404, detail="Cart not found")
+        if owner_id is not None and cart.user_id != owner_id:
+            raise HTTPException(status_code=403, detail="You can only modify your own cart")
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    db.commit()
+    return item._asdict()
+
+
+# ---- Kötegelt módosítás (teljes kosár szinkron) ----
+# set / increment / remove műveletek listája egy tranzakcióban, egy committal;
+# a válasz a frissített teljes kosár
+@router.patch("/{cart_id}/items", response_model=CartRead)
+@query_budget(8)
+def update_items(
+    cart_id: int,
+    batch: CartItemBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
 ):
     cart = db.query(models.Cart).filter(models.Cart.cart_id == cart_id).first()
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
-    
     if current_user.role.value != "admin" and cart.user_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="You can only modify your own cart")
 
-    product = db.query(models.Product).filter(models.Product.product_id == item_data.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    if any(operation.op != "remove" and operation.quantity is None for operation in batch.operations):
+        raise HTTPException(status_code=422, detail="quantity is required for set and increment")
 
-    # ha már van ilyen termék, növeljük a quantity-t
-    existing_item = (
-        db.query(models.CartItem)
-        .filter(models.CartItem.cart_id == cart_id, models.CartItem.product_id == item_data.product_id)
-        .first()
+    to_set, to_increment, to_remove = fold_operations(
+        (operation.op, operation.product_id, operation.quantity) for operation in batch.operations
     )
-    if existing_item:
-        existing_item.quantity += item_data.quantity
-    else:
-        new_item = models.CartItem(
-            cart_id=cart_id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity
-        )
-        db.add(new_item)
-
+    wanted = set(to_set) | set(to_increment)
+    if wanted:
+        found = {
+            product_id for (product_id,) in
+            db.query(models.Product.product_id).filter(models.Product.product_id.in_(wanted))
+        }
+        if found != wanted:
+            raise HTTPException(status_code=404, detail={"message": "Product not found", "product_ids": sorted(wanted - found)})
+
+    apply_cart_operations(db, cart_id, to_set, to_increment, to_remove)
     db.commit()
     db.refresh(cart)
-    return existing_item or new_item
+    return cart
 
 
 # ---- Kosár lekérése ----
 @router.get("/{cart_id}", response_model=CartRead)
+@query_budget(3)
 def get_cart(
     cart_id: int,
     db: Session = Depends(get_db),
@@ -78,6 +106,7 @@ def get_cart(
 
 # --- Felhasználó aktív kosarának lekérése ---
 @router.get("/user/{user_id}/active", response_model=CartRead)
+@query_budget(3)
 def get_active_cart(
     user_id: int,
     db: Session = Depends(get_db),
@@ -99,6 +128,7 @@ def get_active_cart(
 
 # ---- Termék eltávolítása ----
 @router.delete("/{cart_id}/items/{item_id}")
+@query_budget(4)
 def delete_item(
     cart_id: int,
     item_id: int,
@@ -127,6 +157,7 @@ def delete_item(
 
 # ---- Kosár törlése ----
 @router.delete("/{cart_id}")
+@query_budget(6)
 def delete_cart(
     cart_id: int,
     db: Session = Depends(get_db),
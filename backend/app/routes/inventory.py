@@ -1,26 +1,236 @@
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, false, func, tuple_
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
-from app.schemas.inventory import InventoryCreate, InventoryRead, InventoryUpdate
-from typing import List
+from app.schemas.inventory import (
+    InventoryCreate, InventoryRead, InventoryListItem, InventoryUpdate, ProductStockRead, StockReconcileReport,
+    InventoryMovementCreate, InventoryMovementRead, StockAtRead, MovementReport, InventorySnapshotReport,
+)
+from typing import List, Optional
 from datetime import datetime
 from app.utils.security import get_current_admin
+from app.utils.query_budget import query_budget
+from app.utils.cache import catalog_cache
+from app.utils import stock_levels, inventory_ledger
+from app.utils.pagination import encode_cursor, decode_cursor, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
 
-# ---- Összes raktárbejegyzés lekérése ----
-@router.get("/", response_model=List[InventoryRead])
+def _location_cursor(value):
+    return None if value is None else str(value)
+
+
+def _after(location, inventory_id, location_filter=None):
+    """Keyset feltételek a (location, inventory_id) rendezéshez; a NULL hely az első.
+
+    Minden feltétel egy index-tartomány, és egymás után olvasva adják a kurzor
+    utáni sorokat: NULL helyű kurzornál előbb a NULL hely többi sora, aztán a
+    nem NULL helyek. (Egy OR-ral összekötve az index nem tudna keresni.)
+    """
+    inv = models.Inventory
+    if location_filter is not None:
+        return [inv.inventory_id > inventory_id if location == location_filter else false()]
+    if location is None:
+        return [and_(inv.location.is_(None), inv.inventory_id > inventory_id), inv.location.is_not(None)]
+    # sor-érték összehasonlítás, így az index tartományként keres, nem olvas végig
+    return [tuple_(inv.location, inv.inventory_id) > tuple_(location, inventory_id)]
+
+
+# ---- Raktárbejegyzések listája (szűrés, lapozás) ----
+# Example: /inventory/?location=Budapest&low_stock=5&limit=100&include_product=true
+#          ->  következő oldal: ugyanez &cursor=<X-Next-Cursor>
+# low_stock: csak a legfeljebb ennyi készletű sorok; rendezés: (location, inventory_id)
+@router.get("/", response_model=List[InventoryListItem])
+@query_budget(3)
 def get_all_inventory(
+    response: Response,
+    location: Optional[str] = None,
+    product_id: Optional[int] = None,
+    low_stock: Optional[float] = None,
+    include_product: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db), 
     current_admin: models.User = Depends(get_current_admin)
 ):
-    return db.query(models.Inventory).all()
+    inv = models.Inventory
+    columns = [inv.inventory_id, inv.product_id, inv.location, inv.quantity, inv.updated_at]
+    if include_product:
+        columns += [models.Product.name.label("product_name"), models.Product.unit.label("product_unit")]
+    query = db.query(*columns)
+    if include_product:
+        query = query.outerjoin(models.Product, models.Product.product_id == inv.product_id)
+
+    if location is not None:
+        query = query.filter(inv.location == location)
+    if product_id is not None:
+        query = query.filter(inv.product_id == product_id)
+    if low_stock is not None:
+        query = query.filter(func.coalesce(inv.quantity, 0) <= low_stock)
+    query = query.order_by(inv.location.asc().nulls_first(), inv.inventory_id)
+    ranges = _after(*decode_cursor(cursor, _location_cursor, int), location) if cursor else [None]
+
+    # egy plusz sort kérünk le, így tudjuk, van-e következő oldal
+    rows = []
+    for after in ranges:
+        page = query if after is None else query.filter(after)
+        if limit is None:
+            rows += page.all()
+            continue
+        rows += page.limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+    if limit is None:
+        return [row._asdict() for row in rows]
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].location, rows[-1].inventory_id)
+    return [row._asdict() for row in rows]
+
+
+# ---- Termék teljes és raktárhelyenkénti készlete ----
+# a teljes készlet a product_stock összesítőből jön (nem összegzünk olvasáskor)
+@router.get("/stock/{product_id}", response_model=ProductStockRead)
+@query_budget(3)
+def get_product_stock(
+    product_id: int,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    stock = stock_levels.stock_level(db, product_id)
+    if stock is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return stock
+
+
+# ---- Készlet egyeztetés (összesítő és szabad készlet javítása) ----
+@router.post("/reconcile", response_model=StockReconcileReport)
+@query_budget(4)
+def reconcile_stock(
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    return stock_levels.reconcile(db)
+
+
+# ---- Termék készlete egy korábbi időpontban (mozgásnapló alapján) ----
+@router.get("/stock/{product_id}/at", response_model=StockAtRead)
+@query_budget(3)
+def get_product_stock_at(
+    product_id: int,
+    time: datetime,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    if db.get(models.Product, product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return inventory_ledger.stock_at(db, product_id, time)
+
+
+# ---- Készletmozgás (bevételezés, eladás, áttárolás, korrekció) ----
+@router.post("/movements", response_model=List[InventoryMovementRead])
+@query_budget(8)
+def create_movement(
+    data: InventoryMovementCreate,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    inv = db.query(models.Inventory).filter(models.Inventory.inventory_id == data.inventory_id).first()
+    if not inv:
+        raise HTTPException(status_code=404, detail="Inventory record not found")
+    fields = {"user_id": current_admin.user_id, "reference": data.reference, "note": data.note}
+
+    if data.kind != "transfer":
+        kind = models.MovementKind[data.kind]
+        delta = -data.quantity if kind == models.MovementKind.sale else data.quantity
+        movements = [inventory_ledger.move(db, inv, kind, delta, **fields)]
+    else:
+        if data.to_location == inv.location:
+            raise HTTPException(status_code=400, detail="Source and target location are the same")
+        target = db.query(models.Inventory).filter(
+            models.Inventory.product_id == inv.product_id, models.Inventory.location == data.to_location
+        ).first()
+        if target is None:
+            target = models.Inventory(product_id=inv.product_id, location=data.to_location, quantity=0)
+            db.add(target)
+            db.flush()
+        # a két láb közös hivatkozással kereshető vissza
+        fields["reference"] = data.reference or f"transfer-{uuid.uuid4().hex[:12]}"
+        movements = [inventory_ledger.move(db, inv, models.MovementKind.transfer_out, -data.quantity, **fields)]
+        if movements[0] is not None:
+            movements.append(inventory_ledger.move(db, target, models.MovementKind.transfer_in, data.quantity, **fields))
+
+    if movements[0] is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Insufficient stock at this location")
+    db.commit()
+    catalog_cache.bump()
+    return [movement._asdict() for movement in movements]
+
+
+# ---- Mozgásnapló lekérése (legújabb elöl, cursoros lapozás) ----
+# Example: /inventory/movements?product_id=5&limit=100 -> következő oldal: &cursor=<X-Next-Cursor>
+@router.get("/movements", response_model=List[InventoryMovementRead])
+@query_budget(2)
+def get_movements(
+    response: Response,
+    product_id: Optional[int] = None,
+    inventory_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    query = db.query(models.InventoryMovement)
+    if product_id is not None:
+        query = query.filter(models.InventoryMovement.product_id == product_id)
+    if inventory_id is not None:
+        query = query.filter(models.InventoryMovement.inventory_id == inventory_id)
+    if cursor:
+        before_id = decode_cursor(cursor, int)[0]
+        query = query.filter(models.InventoryMovement.movement_id < before_id)
+    movements = query.order_by(models.InventoryMovement.movement_id.desc()).limit(limit).all()
+    if len(movements) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(movements[-1].movement_id)
+    return movements
+
+
+# ---- Mozgás riport: nyitó / fajtánkénti mozgás / záró készlet ----
+@router.get("/movements/report", response_model=MovementReport)
+@query_budget(4)
+def get_movement_report(
+    product_id: int,
+    start: datetime,
+    end: datetime,
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be earlier than start")
+    if db.get(models.Product, product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return inventory_ledger.movement_report(db, product_id, start, end)
+
+
+# ---- Készlet pillanatkép (ütemezve: python -m app.utils.inventory_ledger --snapshot) ----
+@router.post("/snapshots", response_model=InventorySnapshotReport)
+@query_budget(6)
+def create_snapshot(
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    if not inventory_ledger.snapshots_supported(db):
+        raise HTTPException(status_code=501, detail="Inventory snapshots are not supported on this database")
+    return inventory_ledger.take_snapshot(db)
 
 
 # ---- Egy adott bejegyzés lekérése ----
 @router.get("/{inventory_id}", response_model=InventoryRead)
+@query_budget(2)
 def get_inventory(
     inventory_id: int, 
     db: Session = Depends(get_db), 
@@ -34,6 +244,7 @@ def get_inventory(
 
 # ---- Új raktárbejegyzés létrehozása ----
 @router.post("/", response_model=InventoryRead)
+@query_budget(5)
 def create_inventory(
     inv_data: InventoryCreate, 
     db: Session = Depends(get_db), 
@@ -49,13 +260,19 @@ def create_inventory(
         quantity=inv_data.quantity
     )
     db.add(inv)
+    db.flush()
+    if inv_data.quantity:
+        inventory_ledger.record(db, inv, models.MovementKind.receipt, inv_data.quantity, user_id=current_admin.user_id)
     db.commit()
+    # a trigger a termék szabad készletét is módosította
+    catalog_cache.bump()
     db.refresh(inv)
     return inv
 
 
 # ---- Készlet módosítása (pl. csökkenés/raktárváltás) ----
 @router.patch("/{inventory_id}", response_model=InventoryRead)
+@query_budget(5)
 def update_inventory(
     inventory_id: int,
     update_data: InventoryUpdate, 
@@ -66,19 +283,24 @@ def update_inventory(
     if not inv:
         raise HTTPException(status_code=404, detail="Inventory record not found")
 
-    if update_data.quantity is not None:
-        inv.quantity = update_data.quantity
     if update_data.location is not None:
         inv.location = update_data.location
-
     inv.updated_at = datetime.utcnow()
+    # a mennyiség felülírása leltárkorrekcióként naplózódik
+    if update_data.quantity is not None and not inventory_ledger.set_quantity(
+        db, inv, update_data.quantity, user_id=current_admin.user_id
+    ):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Inventory record was modified concurrently, retry")
     db.commit()
+    catalog_cache.bump()
     db.refresh(inv)
     return inv
 
 
 # ---- Raktárbejegyzés törlése ----
 @router.delete("/{inventory_id}")
+@query_budget(3)
 def delete_inventory(
     inventory_id: int, 
     db: Session = Depends(get_db),
@@ -88,6 +310,11 @@ def delete_inventory(
     if not inv:
         raise HTTPException(status_code=404, detail="Inventory record not found")
 
+    # a törölt raktárhely története megmarad: a maradék készlet kivezetése
+    if inv.quantity:
+        inventory_ledger.record(db, inv, models.MovementKind.adjustment, -inv.quantity,
+                                user_id=current_admin.user_id, note="raktárhely törölve")
     db.delete(inv)
     db.commit()
+    catalog_cache.bump()
     return {"message": "Inventory record deleted"}
@@ -1,91 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.schemas.order import OrderCreate, OrderRead, OrderItemCreate, OrderStatusUpdate, OrderStatus
 from app.utils.security import get_current_admin, get_current_user
+from app.utils.query_budget import query_budget
+from app.utils.stock import reserve_stock, release_stock, RESERVING_STATUSES
+from app.utils.cache import catalog_cache
+from app.utils import stats_rollup, outbox
+from app.utils.email_templates import render_order_completed_batch
 
-#---- Import email küldéshez szükséges függvény ----
-from fastapi_mail import FastMail, MessageSchema
-from app.utils.email_utils import conf
-
-def build_completed_order_html(user_name: str, order_id: int, items: list, total: float):
-    items_html = ""
-
-    for item in items:
-        items_html += f"""
-        <tr>
-            <td style="padding: 8px; border-bottom: 1px solid #ddd;">{item.product.name}</td>
-            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:center;">{item.quantity} db</td>
-            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:right;">{item.unit_price:.0f} Ft</td>
-        </tr>
-        """
-
-    return f"""
-    <div style="font-family: Arial, sans-serif; padding: 20px; background:#f5f5f5;">
-        <div style="max-width: 600px; margin: auto; background: white; padding: 20px; border-radius: 8px;">
-            <h2 style="color:#4CAF50;">Rendelés teljesítve</h2>
-            <p>Kedves <strong>{user_name}</strong>,</p>
-            <p>Örömmel értesítünk, hogy a <strong>#{order_id}</strong> számú rendelésedet sikeresen teljesítettük.</p>
-
-            <h3>Rendelés részletei:</h3>
-
-            <table style="width:100%; border-collapse: collapse;">
-                <tr style="background:#f0f0f0;">
-                    <th style="padding: 10px; text-align:left;">Termék</th>
-                    <th style="padding: 10px; text-align:center;">Mennyiség</th>
-                    <th style="padding: 10px; text-align:right;">Ár</th>
-                </tr>
-                {items_html}
-            </table>
-
-            <h3 style="text-align:right; margin-top:20px;">
-                Összesen: {total:.0f} Ft
-            </h3>
-
-            <p>Köszönjük a vásárlást!</p>
-
-            <div style="text-align:center; margin-top:40px; color:#888;">
-                <small>Ez egy automatikusan generált üzenet. Kérjük, ne válaszolj rá.</small>
-            </div>
-        </div>
-    </div>
-    """
-
-
-async def send_order_completed_email(db: Session, user: models.User, order: models.Order):
-    # rendelés tételei
-    items = db.query(models.OrderItem).filter(models.OrderItem.order_id == order.order_id).all()
-
-    html_content = build_completed_order_html(
-        user_name=user.name,
-        order_id=order.order_id,
-        items=items,
-        total=order.total_price
-    )
-
-    message = MessageSchema(
-        subject=f"Rendelés #{order.order_id} teljesítve",
-        recipients=[user.email],
-        body=html_content,
-        subtype="html"
-    )
 
-    fm = FastMail(conf)
-    await fm.send_message(message)
+def enqueue_order_completed_emails(db: Session, order_ids: list):
+    """A "rendelés teljesítve" leveleket az outboxba teszi, a státuszváltással egy tranzakcióban."""
+    for email, html_content in render_order_completed_batch(db, order_ids):
+        outbox.enqueue_email(db, email.recipient, email.subject, html_content)
 
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
 # ---- Rendelés létrehozása ----
+# Egyetlen tranzakció: a kosár lezárása feltételes UPDATE-tel történik (két
+# párhuzamos checkout közül csak az egyik nyer), a tételek az árakkal együtt
+# egy joinolt lekérdezésből jönnek, a készletet feltételes UPDATE-ekkel
+# foglaljuk le, a rendelés tételei egy bulk INSERT-tel kerülnek be.
 @router.post("/", response_model=OrderRead)
+@query_budget(12)
 def create_order(order_data: OrderCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    user = db.query(models.User).filter(models.User.user_id == order_data.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
     if current_user.role.value != "admin" and order_data.user_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="You can only create orders for yourself")
+    user = db.query(models.User.user_id).filter(models.User.user_id == order_data.user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
     # kosár kikeresése
     cart = db.query(models.Cart).filter(models.Cart.cart_id == order_data.cart_id).first()
@@ -96,38 +44,53 @@ def create_order(order_data: OrderCreate, db: Session = Depends(get_db), current
     if cart.user_id != order_data.user_id:
         raise HTTPException(status_code=400, detail="Cart does not belong to the user")
 
-    # kosár elemek lekérése
-    cart_items = db.query(models.CartItem).filter(models.CartItem.cart_id == cart.cart_id).all()
+    # kosár elemek lekérése az aktuális árakkal, egy lekérdezésben
+    cart_items = (
+        db.query(models.CartItem.product_id, models.CartItem.quantity, models.Product.price)
+        .join(models.Product, models.Product.product_id == models.CartItem.product_id)
+        .filter(models.CartItem.cart_id == cart.cart_id)
+        .all()
+    )
     if not cart_items:
         raise HTTPException(status_code=400, detail="Cart is empty")
 
+    # kosarat lezárjuk - ha közben egy másik kérés már lezárta, nem nyúlunk hozzá
+    claimed = db.execute(
+        update(models.Cart)
+        .where(models.Cart.cart_id == cart.cart_id, models.Cart.ordered.is_not(True))
+        .values(ordered=True)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Cart has already been ordered")
+
+    # készlet foglalása - hiány esetén 409, és a kosár lezárása is visszagörgetődik
+    reserve_stock(db, cart_items)
+
     # összeg kiszámolása és rendelés létrehozása
-    total_price = sum(item.quantity * item.product.price for item in cart_items)
+    total_price = sum(item.quantity * item.price for item in cart_items)
     order = models.Order(user_id=order_data.user_id, total_price=total_price)
-
     db.add(order)
-    db.commit()
-    db.refresh(order)
+    db.flush()
+    stats_rollup.record_order(db, order)
+
+    # rendelés tételek hozzáadása egy bulk INSERT-tel
+    db.execute(
+        insert(models.OrderItem),
+        [
+            {"order_id": order.order_id, "product_id": item.product_id, "quantity": item.quantity, "unit_price": item.price}
+            for item in cart_items
+        ],
+    )
 
-    # rendelés tételek hozzáadása
-    for item in cart_items:
-        order_item = models.OrderItem(
-            order_id=order.order_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.product.price
-        )
-        db.add(order_item)
-
-    # kosarat lezárjuk
-    cart.ordered = True
     db.commit()
+    catalog_cache.bump()
     db.refresh(order)
-
     return order
 
 # ---- Összes rendelés lekérése ----
 @router.get("/", response_model=list[OrderRead])
+@query_budget(2)
 def get_all_orders(
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin)
@@ -137,6 +100,7 @@ def get_all_orders(
 
 # ---- Felhasználó rendeléseinek lekérése ----
 @router.get("/user/{user_id}", response_model=list[OrderRead])
+@query_budget(2)
 def get_user_orders(
     user_id: int,
     db: Session = Depends(get_db),
@@ -149,6 +113,7 @@ def get_user_orders(
 
 # ---- Egy rendelés lekérése ----
 @router.get("/{order_id}", response_model=OrderRead)
+@query_budget(2)
 def get_order(
     order_id: int,
     db: Session = Depends(get_db),
@@ -166,6 +131,7 @@ def get_order(
 
 # ---- Rendelés tételeinek lekérése ----
 @router.get("/{order_id}/items", response_model=list[OrderItemCreate])
+@query_budget(3)
 def get_order_items(
     order_id: int,
     db: Session = Depends(get_db),
@@ -183,10 +149,10 @@ def get_order_items(
 
 # ---- Státusz frissítése ----
 @router.patch("/{order_id}/status", response_model=OrderRead)
+@query_budget(12)
 def update_order_status(
     order_id: int, 
     status_data: OrderStatusUpdate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin),
 ):
@@ -194,19 +160,46 @@ def update_order_status(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    order.status = status_data.status
-    db.commit()
+    old_status = order.status
+    new_status = models.OrderStatus(status_data.status.value)
+    if new_status != old_status:
+        # feltételes váltás: két párhuzamos lemondás ne adja vissza kétszer a készletet
+        changed = db.execute(
+            update(models.Order)
+            .where(models.Order.order_id == order_id, models.Order.status == old_status)
+            .values(status=new_status)
+        ).rowcount
+        if not changed:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Order status was changed concurrently")
+        stats_rollup.move_order_status(db, order, old_status, new_status)
+
+        # csak a foglaló (pending / paid) rendelés lemondása ad vissza készletet; a
+        # kiszállított / teljesített áru már elment, a lemondás ezen nem változtat
+        cancelled = models.OrderStatus.cancelled
+        if new_status == cancelled and old_status in RESERVING_STATUSES:
+            release_stock(db, order_id)
+        elif old_status == cancelled and new_status in RESERVING_STATUSES:
+            # lemondott rendelés újraaktiválása: újra le kell foglalni a készletet
+            items = db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).all()
+            reserve_stock(db, items)
+
+        # értesítő email: csak a tényleges váltáskor, és csak ha a váltás is commitolódik
+        if new_status == models.OrderStatus.completed:
+            enqueue_order_completed_emails(db, [order_id])
+
+        db.commit()
+        if models.OrderStatus.cancelled in (old_status, new_status):
+            catalog_cache.bump()
+        if new_status == models.OrderStatus.completed:
+            outbox.notify_worker()
     db.refresh(order)
-
-    # email küldése a felhasználónak a státusz változásról
-    user = db.query(models.User).filter(models.User.user_id == order.user_id).first()
-    if status_data.status == "completed":
-        background_tasks.add_task(send_order_completed_email, db, user, order)
     return order
 
 
 # ---- Rendelés törlése ----
 @router.delete("/{order_id}")
+@query_budget(10)
 def delete_order(
     order_id: int, 
     db: Session = Depends(get_db),
@@ -216,6 +209,11 @@ def delete_order(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
+    # csak a még nem teljesített rendelés foglalását adjuk vissza
+    if order.status in RESERVING_STATUSES:
+        release_stock(db, order_id)
+    stats_rollup.remove_order(db, order)
     db.delete(order)
     db.commit()
+    catalog_cache.bump()
     return {"message": "Order deleted"}
@@ -1,15 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app import models
-from app.schemas.product import ProductCreate, ProductRead, ProductBase
+from app.database import get_db, SessionLocal
+from app import data_loader, models
+from app.schemas.product import ProductCreate, ProductRead, ProductBase, ProductImportReport
 from app.utils.security import get_current_admin
-from typing import List
+from app.utils.query_budget import query_budget
+from app.utils.pagination import encode_cursor, decode_cursor, MAX_PAGE_SIZE
+from app.utils import search
+from app.utils.cache import catalog_cache
+from pydantic import TypeAdapter
+from typing import List, Optional
+
+# NDJSON streameléskor ennyi sort olvasunk be egyszerre az adatbázisból
+STREAM_BATCH_SIZE = 500
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+_product_list = TypeAdapter(List[ProductRead])
+
+
+def _dump_products(products) -> bytes:
+    return _product_list.dump_json([ProductRead.model_validate(p, from_attributes=True) for p in products])
+
+
+def _commit_unique_sku(db: Session):
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A product with this SKU already exists")
+
+
 # Create
 @router.post("/", response_model=ProductRead)
+@query_budget(4)
 def create_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
@@ -17,36 +44,127 @@ def create_product(
 ):
     db_product = models.Product(**product.dict())
     db.add(db_product)
-    db.commit()
+    _commit_unique_sku(db)
     db.refresh(db_product)
+    catalog_cache.bump()
     return db_product
 
+# Bulk import (admin)
+# Example: curl -F "file=@arlista.csv" -H "Authorization: Bearer <token>" /products/import
+# CSV (fejléccel) vagy JSON Lines; kötelező mezők: sku, name, price. A sorokat a
+# feltöltött fájlból egyenként olvassuk, kötegenként upserteljük és commitoljuk;
+# a hibás sorok a jelentésbe kerülnek, az import nem áll le miattuk.
+@router.post("/import", response_model=ProductImportReport)
+@query_budget(250)  # kötegenként egy upsert: 1M sor 5000-es kötegekkel 200 utasítás
+def import_products(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin)
+):
+    try:
+        records = data_loader.iter_upload_records(file.file, file.filename, file.content_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+    report = data_loader.import_products(db, records)
+    print(f"Termék import ({file.filename}): {report['imported']}/{report['rows']} sor, "
+          f"{report['failed']} hibás, {report['rows_per_second']:.0f} sor/s")
+    return report
+
+
+# ---- Katalógus lekérdezések (a sync és az async végpontok közösen használják) ----
+def catalog_statement(after_id: Optional[int], limit: Optional[int] = None):
+    stmt = select(models.Product).order_by(models.Product.product_id)
+    if after_id is not None:
+        stmt = stmt.where(models.Product.product_id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def page_statement(after_id: Optional[int], limit: int):
+    # egy plusz sort kérünk le, így tudjuk, van-e következő oldal
+    return catalog_statement(after_id, limit + 1)
+
+
+def catalog_page(products, limit: Optional[int]):
+    """A (limit + 1 soros) eredményből a válasz teste és a lapozó fejléc."""
+    headers = {}
+    if limit is not None and len(products) > limit:
+        products = products[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(products[-1].product_id)
+    return _dump_products(products), headers
+
+
+def stream_line(product) -> str:
+    return ProductRead.model_validate(product, from_attributes=True).model_dump_json() + "\n"
+
+
+def product_json(product) -> bytes:
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return ProductRead.model_validate(product, from_attributes=True).model_dump_json().encode()
+
+
+def _stream_products(after_id: Optional[int], limit: Optional[int]):
+    # saját session kell: a get_db session a válasz elküldése előtt bezárul
+    db = SessionLocal()
+    try:
+        stmt = catalog_statement(after_id, limit).execution_options(yield_per=STREAM_BATCH_SIZE)
+        for product in db.scalars(stmt):
+            yield stream_line(product)
+    finally:
+        db.close()
+
+
 # Read all
+# Example: /products/?limit=50  ->  következő oldal: /products/?limit=50&cursor=<X-Next-Cursor>
+# Example: /products/?stream=true  ->  NDJSON, soronként egy termék
 @router.get("/", response_model=List[ProductRead])
-def list_products(db: Session = Depends(get_db)):
-    return db.query(models.Product).all()
+@query_budget(2)
+def list_products(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+
+    if stream:
+        return StreamingResponse(_stream_products(after_id, limit), media_type="application/x-ndjson")
+
+    def load():
+        stmt = catalog_statement(after_id) if limit is None else page_statement(after_id, limit)
+        return catalog_page(db.scalars(stmt).all(), limit)
+
+    return catalog_cache.respond(request, ("list", after_id, limit), load)
 
 # Read one
 @router.get("/{product_id}", response_model=ProductRead)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.product_id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+@query_budget(1)
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
+    def load():
+        return product_json(db.get(models.Product, product_id)), {}
+
+    return catalog_cache.respond(request, ("one", product_id), load)
 
 # Search
 # Example: /products/search/?name=paint&category=interior
+# Example: /products/search/?q=falfestek  (név, leírás és kategória együtt, relevancia szerint)
 @router.get("/search/", response_model=List[ProductRead])
-def search_products(name: str | None = None, category: str | None = None, db: Session = Depends(get_db)):
-    query = db.query(models.Product)
-    if name:
-        query = query.filter(models.Product.name.ilike(f"%{name}%"))
-    if category:
-        query = query.filter(models.Product.category.ilike(f"%{category}%"))
-    return query.all()
+@query_budget(1)
+def search_products(
+    q: str | None = None,
+    name: str | None = None,
+    category: str | None = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    return search.search_products(db, q, name, category, limit)
 
 # Update
 @router.put("/{product_id}", response_model=ProductRead)
+@query_budget(5)
 def update_product(
     product_id: int, 
     updated_data: ProductBase, 
@@ -57,15 +175,21 @@ def update_product(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    for key, value in updated_data.dict().items():
+    values = updated_data.dict()
+    # a cikkszámot nem ismerő régi kliensek PUT-ja ne törölje a meglévőt
+    if "sku" not in updated_data.model_fields_set:
+        values.pop("sku")
+    for key, value in values.items():
         setattr(product, key, value)
 
-    db.commit()
+    _commit_unique_sku(db)
     db.refresh(product)
+    catalog_cache.bump()
     return product
 
 # Delete
 @router.delete("/{product_id}", status_code=204)
+@query_budget(8)
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
@@ -76,4 +200,5 @@ def delete_product(
         raise HTTPException(status_code=404, detail="Product not found")
     db.delete(product)
     db.commit()
+    catalog_cache.bump()
     return
\ No newline at end of file
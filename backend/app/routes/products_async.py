@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database, models
+from app.database import get_async_db
+from app.schemas.product import ProductRead
+from app.utils.pagination import decode_cursor, MAX_PAGE_SIZE
+from app.utils.query_budget import query_budget
+from app.utils import search
+from app.utils.cache import catalog_cache
+from app.routes.products import (
+    STREAM_BATCH_SIZE, catalog_statement, page_statement, catalog_page, product_json, stream_line,
+)
+from typing import Optional
+
+# ---- A termékkatalógus olvasó végpontjainak async változata ----
+# Csak DB_ASYNC=1 esetén kerül regisztrálásra, a products.router elé, így
+# ugyanazokra az útvonalakra ezek válaszolnak. Az írások a sync routerben maradnak.
+router = APIRouter(prefix="/products", tags=["Products"])
+
+
+async def _stream_products(after_id: Optional[int], limit: Optional[int]):
+    stmt = catalog_statement(after_id, limit).execution_options(yield_per=STREAM_BATCH_SIZE)
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream_scalars(stmt)
+        async for product in result:
+            yield stream_line(product)
+
+
+@router.get("/", include_in_schema=False)
+@query_budget(2)
+async def list_products(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+
+    if stream:
+        return StreamingResponse(_stream_products(after_id, limit), media_type="application/x-ndjson")
+
+    async def load():
+        stmt = catalog_statement(after_id) if limit is None else page_statement(after_id, limit)
+        return catalog_page((await db.scalars(stmt)).all(), limit)
+
+    return await catalog_cache.respond_async(request, ("list", after_id, limit), load)
+
+
+@router.get("/{product_id}", include_in_schema=False)
+@query_budget(1)
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return product_json(await db.get(models.Product, product_id)), {}
+
+    return await catalog_cache.respond_async(request, ("one", product_id), load)
+
+
+@router.get("/search/", include_in_schema=False)
+@query_budget(1)
+async def search_products(
+    q: str | None = None,
+    name: str | None = None,
+    category: str | None = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = search.build_search_statement(db.bind.dialect.name, q, name, category, limit)
+    products = (await db.scalars(stmt)).all()
+    return [ProductRead.model_validate(p, from_attributes=True) for p in products]
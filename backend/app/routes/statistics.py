@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.database import get_db
 from app import models
-from app.schemas.order import OrderStatsResponse
+from app.utils import stats_rollup, analytics
+from app.utils.security import get_current_admin
+from app.utils.query_budget import query_budget
+from app.schemas.order import OrderStatsResponse, SalesAnalyticsResponse
 from datetime import date, datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
 
 @router.get("/", response_model=OrderStatsResponse)
+@query_budget(1)
 def get_stats(
     interval: str = Query("daily", regex="^(daily|weekly|monthly|yearly)$"),
     start: Optional[date] = None,
@@ -34,33 +37,32 @@ def get_stats(
     start_dt = datetime.combine(start, datetime.min.time())
     end_dt = datetime.combine(end, datetime.max.time())
 
-    # Choose SQL expression for grouping label
-    if interval == "daily":
-        label_expr = func.strftime('%Y-%m-%d', models.Order.created_at)
-    elif interval == "weekly":
-        label_expr = func.strftime('%Y-%W', models.Order.created_at)
-    elif interval == "monthly":
-        label_expr = func.strftime('%Y-%m', models.Order.created_at)
-    else:  # yearly
-        label_expr = func.strftime('%Y', models.Order.created_at)
+    # The daily rollup rows are aggregated into the requested interval, so the
+    # cost depends on the number of days, not on the number of orders
+    data = stats_rollup.period_stats(db, interval, start, end)
 
-    # Build query: period label, order count, revenue sum
-    query = (
-        db.query(
-            label_expr.label('period'),
-            func.count(models.Order.order_id).label('order_count'),
-            func.coalesce(func.sum(models.Order.total_price), 0).label('revenue'),
-        )
-        .filter(models.Order.created_at.between(start_dt, end_dt))
-        .group_by('period')
-        .order_by('period')
-    )
+    return {"interval": interval, "start": start_dt, "end": end_dt, "data": data}
 
-    results = query.all()
 
-    data = [
-        {"period": r.period, "orders": int(r.order_count), "revenue": float(r.revenue or 0)}
-        for r in results
-    ]
+@router.get("/analytics", response_model=SalesAnalyticsResponse)
+@query_budget(6)
+def get_sales_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    top: int = Query(10, ge=1, le=100),
+    bins: Optional[List[int]] = Query(None, description="Order size bucket lower bounds, e.g. bins=1&bins=5&bins=10"),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin),
+):
+    """Top sellers, average order value, category breakdown and order size
+    histogram for non-cancelled orders (defaults to last 30 days)."""
+    if not end:
+        end = date.today()
+    if not start:
+        start = end - timedelta(days=30)
+    if bins is not None and (not bins or min(bins) < 1):
+        raise HTTPException(status_code=400, detail="bins must be positive integers")
 
-    return {"interval": interval, "start": start_dt, "end": end_dt, "data": data}
+    start_dt = datetime.combine(start, datetime.min.time())
+    end_dt = datetime.combine(end, datetime.max.time())
+    return analytics.sales_analytics(db, start_dt, end_dt, top, bins)
@@ -3,13 +3,29 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.schemas.user import UserCreate, UserRead, UserUpdate
-from app.utils.security import hash_password, get_current_admin, get_current_user
-from typing import List
+from app.utils.security import get_current_admin, get_current_user, invalidate_principal
+from app.utils.query_budget import query_budget
+from app.utils.passwords import hash_password_async
+from typing import List, Optional
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+
+# a jelszó hash-t async dependency számolja a process poolban,
+# így a sync végpont szála nem bcrypt-tel telik
+async def new_password_hash(user_data: UserCreate) -> str:
+    return await hash_password_async(user_data.password)
+
+
+async def updated_password_hash(user_data: UserUpdate) -> Optional[str]:
+    if user_data.password is None:
+        return None
+    return await hash_password_async(user_data.password)
+
+
 # ---- GET: összes user (csak admin láthatja) ----
 @router.get("/", response_model=List[UserRead])
+@query_budget(2)
 def list_users(
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin)  # csak admin
@@ -18,6 +34,7 @@ def list_users(
 
 # ---- GET: Saját profil lekérése (bármilyen role) ----
 @router.get("/me", response_model=UserRead)
+@query_budget(1)
 def get_my_user(
     current_user: models.User = Depends(get_current_user)
 ):
@@ -25,6 +42,7 @@ def get_my_user(
 
 # ---- GET: felhasználó lekérése ID alapján (csak admin láthatja) ----
 @router.get("/{user_id}", response_model=UserRead)
+@query_budget(2)
 def get_user_by_id(
     user_id: int,
     db: Session = Depends(get_db),
@@ -37,11 +55,14 @@ def get_user_by_id(
 
 # ---- PUT: felhasználó adatainak frissítése (saját adatok, vagy admin) ----
 @router.put("/{user_id}", response_model=UserRead)
+@query_budget(5)
 def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user),
+    # a hitelesítés után: azonosítatlan kérés ne indíthasson bcrypt munkát
+    password_hash: Optional[str] = Depends(updated_password_hash),
 ):
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if not user:
@@ -59,8 +80,8 @@ def update_user(
         if existing:
             raise HTTPException(status_code=400, detail="Email already in use")
         user.email = user_data.email
-    if user_data.password is not None:
-        user.password_hash = hash_password(user_data.password)
+    if password_hash is not None:
+        user.password_hash = password_hash
     if user_data.phone is not None:
         user.phone = user_data.phone
     if user_data.address is not None:
@@ -69,6 +90,7 @@ def update_user(
         user.role = user_data.role
 
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     return user
 
@@ -76,16 +98,20 @@ def update_user(
 
 # ---- POST: regisztráció ----
 @router.post("/", response_model=UserRead)
-def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+@query_budget(3)
+def create_user(
+    user_data: UserCreate,
+    password_hash: str = Depends(new_password_hash),
+    db: Session = Depends(get_db)
+):
     existing = db.query(models.User).filter(models.User.email == user_data.email).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash_password(user_data.password)
     db_user = models.User(
         name=user_data.name,
         email=user_data.email,
-        password_hash=hashed_pw,
+        password_hash=password_hash,
         phone=user_data.phone,
         address=user_data.address,
         role=user_data.role,
@@ -98,6 +124,7 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 # --- DELETE: felhasználó törlése ID alapján (csak admin törölhet) ----
 @router.delete("/{user_id}", response_model=UserRead)
+@query_budget(6)
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
@@ -109,4 +136,5 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
     return f"{user_id} User deleted successfully"
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class CartItemBase(BaseModel):
@@ -16,6 +16,17 @@ class CartItemRead(CartItemBase):
         orm_mode = True
 
 
+# ---- Kötegelt kosár módosítás ----
+# set: a mennyiség beállítása, increment: növelés, remove: a termék törlése a kosárból
+class CartItemOperation(BaseModel):
+    op: Literal["set", "increment", "remove"]
+    product_id: int
+    quantity: Optional[float] = Field(None, gt=0)
+
+class CartItemBatch(BaseModel):
+    operations: List[CartItemOperation] = Field(..., min_length=1, max_length=500)
+
+
 class CartBase(BaseModel):
     user_id: int
 
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
+from app.models import MovementKind
 
 class InventoryBase(BaseModel):
     product_id: int
@@ -20,3 +21,92 @@ class InventoryRead(InventoryBase):
 
     class Config:
         orm_mode = True
+
+# lista elem; a termék adatai csak include_product=true esetén (egy JOIN-nal) töltődnek
+class InventoryListItem(InventoryRead):
+    product_name: Optional[str] = None
+    product_unit: Optional[str] = None
+
+
+# ---- Termékenkénti készlet ----
+class StockLocation(BaseModel):
+    inventory_id: int
+    location: Optional[str] = None
+    quantity: Optional[float] = None
+
+class ProductStockRead(BaseModel):
+    product_id: int
+    quantity: float      # raktárhelyek összege
+    available: float     # szabad (nem foglalt) készlet: Product.stock_quantity
+    updated_at: Optional[datetime] = None
+    locations: List[StockLocation] = []
+
+class StockReconcileReport(BaseModel):
+    products_corrected: int
+    aggregates_refreshed: int
+    aggregates_removed: int
+
+
+# ---- Készletmozgás napló ----
+class InventoryMovementCreate(BaseModel):
+    # transfer: a raktárhelyről a to_location nevű raktárhelyre (ugyanazon termék)
+    kind: Literal["receipt", "sale", "transfer", "adjustment"]
+    inventory_id: int
+    quantity: float = Field(..., description="Bevételezés/eladás/áttárolás: pozitív; korrekció: előjeles változás")
+    to_location: Optional[str] = None
+    reference: Optional[str] = None
+    note: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.kind == "adjustment":
+            if self.quantity == 0:
+                raise ValueError("adjustment quantity must not be zero")
+        elif self.quantity <= 0:
+            raise ValueError("quantity must be positive")
+        if (self.kind == "transfer") != (self.to_location is not None):
+            raise ValueError("to_location is required for transfers (and only for them)")
+        return self
+
+class InventoryMovementRead(BaseModel):
+    movement_id: int
+    inventory_id: int
+    product_id: int
+    location: Optional[str] = None
+    kind: MovementKind
+    quantity: float
+    reference: Optional[str] = None
+    note: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class StockAtRead(BaseModel):
+    product_id: int
+    at: datetime
+    quantity: float
+    snapshot_at: Optional[datetime] = None   # a kiinduló pillanatkép (None: nincs korábbi)
+    movements_applied: int                   # a pillanatkép után hozzáadott mozgások
+    locations: List[StockLocation] = []
+
+class MovementKindTotal(BaseModel):
+    kind: MovementKind
+    movements: int
+    quantity: float
+
+class MovementReport(BaseModel):
+    product_id: int
+    start: datetime
+    end: datetime
+    opening: float
+    closing: float
+    movements: int
+    by_kind: List[MovementKindTotal] = []
+
+class InventorySnapshotReport(BaseModel):
+    taken_at: datetime
+    last_movement_id: int
+    locations: int
+    adjustments: int    # pillanatkép előtt rögzített, nem naplózott eltérések
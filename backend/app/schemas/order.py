@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -51,6 +51,7 @@ class OrderStatsItem(BaseModel):
     period: str
     orders: int
     revenue: float
+    statuses: Dict[str, int] = {}
 
 
 class OrderStatsResponse(BaseModel):
@@ -61,3 +62,35 @@ class OrderStatsResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+# --- Sales analytics response schemas ---
+class ProductSales(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    quantity: float
+    revenue: float
+
+
+class CategorySales(BaseModel):
+    category: str
+    quantity: float
+    revenue: float
+    revenue_share: float
+
+
+class OrderSizeBucket(BaseModel):
+    min_items: int
+    max_items: Optional[int] = None
+    orders: int
+
+
+class SalesAnalyticsResponse(BaseModel):
+    start: datetime
+    end: datetime
+    order_count: int
+    average_order_value: float
+    top_by_quantity: List[ProductSales]
+    top_by_revenue: List[ProductSales]
+    categories: List[CategorySales]
+    order_size_histogram: List[OrderSizeBucket]
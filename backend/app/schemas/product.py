@@ -1,7 +1,8 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class ProductBase(BaseModel):
+    sku: Optional[str] = None
     name: str
     description: Optional[str] = None
     category: Optional[str] = None
@@ -14,6 +15,7 @@ class ProductCreate(ProductBase):
     pass
 
 class ProductUpdate(BaseModel):
+    sku: Optional[str] = None
     name: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
@@ -28,3 +30,18 @@ class ProductRead(ProductBase):
 
     class Config:
         orm_mode = True
+
+
+class ProductImportError(BaseModel):
+    row: Optional[int] = None
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportReport(BaseModel):
+    rows: int
+    imported: int
+    failed: int
+    aborted: bool
+    seconds: float
+    rows_per_second: float
+    errors: List[ProductImportError] = []
@@ -7,6 +7,7 @@ from app.database import SessionLocal, engine, Base
 from datetime import datetime
 from app import models
 from app.utils.security import hash_password  # <-- fontos!
+from app.utils.stats_rollup import backfill as backfill_order_stats
 
 
 def seed_data():
@@ -81,8 +82,8 @@ def seed_data():
         # --- Mixes ---
         if db.query(models.Mix).count() == 0:
             # use existing users for user_id references
-            first_user = db.query(models.User).filter_by(email="user1@example.com").first()
-            second_user = db.query(models.User).filter_by(email="user2@example.com").first()
+            first_user = db.query(models.User).filter_by(email="John.doe@example.com").first()
+            second_user = db.query(models.User).filter_by(email="alice.smith@example.com").first()
             mixes = [
                 models.Mix(user_id=first_user.user_id if first_user else None, name="Türkiz", created_at=datetime(2023, 10, 1, 10, 0, 0)),
                 models.Mix(user_id=second_user.user_id if second_user else None, name="Lila", created_at=datetime(2023, 10, 2, 11, 0, 0)),
@@ -123,7 +124,7 @@ def seed_data():
         if db.query(models.Order).count() == 0:
             # create example orders for users
             admin = db.query(models.User).filter_by(email="admin@example.com").first()
-            user1 = db.query(models.User).filter_by(email="user1@example.com").first()
+            user1 = db.query(models.User).filter_by(email="John.doe@example.com").first()
             products_for_order = db.query(models.Product).limit(4).all()
 
             orders = []
@@ -150,6 +151,9 @@ def seed_data():
                 print("Orders and OrderItems seeded")
 
         db.commit()
+
+        # a közvetlenül beszúrt rendelésekből a statisztika rollup újraépítése
+        backfill_order_stats(db)
     finally:
         db.close()
 
@@ -157,7 +161,3 @@ def seed_data():
 if __name__ == "__main__":
     seed_data()
     print("Database seeding complete!")
-
-if __name__ == "__main__":
-    seed_data()
-    print("Database seeding complete!")
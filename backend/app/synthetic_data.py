@@ -0,0 +1,361 @@
+import argparse
+import random
+import sys
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from faker import Faker
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.passwords import hash_password
+from app.utils.stats_rollup import backfill as backfill_order_stats
+from app.utils.stock_levels import ensure_stock_triggers
+
+# ---- Szintetikus adatkészlet terheléses teszthez ----
+# Determinisztikus (azonos seed és méretek -> azonos sorok, a jelszó hash sóját
+# kivéve). A sorokat generátorok állítják elő, és Core executemany INSERT-tel,
+# kötegenként commitolva írjuk, így a memóriahasználat a mérettől független.
+# Az elsődleges kulcsokat mi osztjuk ki (a meglévő max id után), ezért a
+# rendelések tételei és a keverékek komponensei visszaolvasás nélkül hivatkozhatnak.
+#
+# Használat (a backend mappából):
+#   python -m app.synthetic_data --scale large --seed 42 --reset
+#   python -m app.synthetic_data --users 1000000 --orders 10000000 --products 50000
+
+SCALES = {
+    "small": {"users": 1_000, "products": 500, "colors": 200, "mixes": 300, "carts": 200, "orders": 5_000},
+    "medium": {"users": 100_000, "products": 10_000, "colors": 1_000, "mixes": 20_000, "carts": 20_000, "orders": 500_000},
+    "large": {"users": 1_000_000, "products": 100_000, "colors": 5_000, "mixes": 200_000, "carts": 100_000, "orders": 10_000_000},
+}
+
+DEFAULT_PASSWORD = "jelszo123"
+DEFAULT_END = datetime(2025, 12, 31, 23, 59, 59)
+BATCH_SIZE = 20_000
+# ennyi különböző nevet/címet/telefonszámot kérünk a Fakertől; a sorokhoz ezekből
+# választunk, mert a Faker hívásonként ~10-50 µs, ami milliós méretnél túl lassú
+FAKER_POOL_SIZE = 20_000
+
+LOCATIONS = ["Raktár-1", "Raktár-2", "Raktár-3", "Budapest", "Debrecen", "Szeged", "Pécs", "Győr", "Miskolc", "Székesfehérvár"]
+
+# kategória -> (termék alapnevek, kiszerelések, egység, ártartomány)
+CATEGORIES = {
+    "beltéri festék": (["Beltéri falfesték", "Mennyezetfesték", "Diszperziós festék", "Latex falfesték"], [1, 2.5, 5, 10, 15], "liter", (2500, 45000)),
+    "kültéri festék": (["Homlokzatfesték", "Szilikon homlokzatfesték", "Lábazatfesték"], [2.5, 5, 10, 15], "liter", (6000, 70000)),
+    "zománcfesték": (["Zománcfesték", "Radiátorfesték", "Fémfesték", "Magasfényű zománc"], [0.25, 0.75, 2.5], "liter", (1800, 18000)),
+    "alapozó": (["Mélyalapozó", "Tapadóhíd", "Rozsdagátló alapozó", "Fa alapozó"], [1, 5, 10], "liter", (1500, 20000)),
+    "lazúr": (["Vékonylazúr", "Vastaglazúr", "Falazúr", "Parkettalakk"], [0.75, 2.5, 5], "liter", (2500, 25000)),
+    "hígító": (["Nitrohígító", "Műgyanta hígító", "Terpentin"], [0.5, 1, 5], "liter", (900, 9000)),
+    "eszköz": (["Ecset készlet", "Festőhenger", "Festőtálca", "Maszkolószalag", "Takarófólia", "Spakli"], [1], "db", (300, 12000)),
+}
+BRANDS = ["Poli-Farbe", "Trinát", "Dulux", "Héra", "Inntaler", "Supralux", "Sadolin", "Tikkurila", "Caparol", "Remmers"]
+
+ORDER_STATUSES = [
+    (models.OrderStatus.completed, 0.55),
+    (models.OrderStatus.shipped, 0.12),
+    (models.OrderStatus.paid, 0.12),
+    (models.OrderStatus.pending, 0.13),
+    (models.OrderStatus.cancelled, 0.08),
+]
+
+
+def _rng(seed: int, name: str) -> random.Random:
+    # táblánként külön véletlenforrás: egy tábla méretének változása nem írja át a többit
+    return random.Random(f"{seed}:{name}")
+
+
+def _ascii_slug(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return ".".join(part for part in "".join(c if c.isalnum() else " " for c in text).split() if part)
+
+
+def _random_datetime(rng: random.Random, end: datetime, days: int) -> datetime:
+    return end - timedelta(seconds=rng.randrange(days * 86400))
+
+
+class SyntheticDataGenerator:
+    """Felhasználók, termékek, színek, keverékek, készlet, kosarak és rendelések generálása.
+
+    A counts kulcsai a SCALES kulcsai; a hiányzó kulcsok 0-nak számítanak.
+    """
+
+    def __init__(self, counts: dict, seed: int = 42, end: datetime = DEFAULT_END, days: int = 365,
+                 locations: int = 3, max_items: int = 5, batch_size: int = BATCH_SIZE,
+                 password: str = DEFAULT_PASSWORD, bind=None):
+        self.counts = counts
+        self.seed = seed
+        self.end = end
+        self.days = days
+        self.locations = LOCATIONS[:max(1, min(locations, len(LOCATIONS)))]
+        self.max_items = max(1, max_items)
+        self.batch_size = batch_size
+        self.password = password
+        self.engine = bind if bind is not None else engine
+
+        fake = Faker("hu_HU")
+        fake.seed_instance(seed)
+        pool = min(FAKER_POOL_SIZE, max(1, counts.get("users", 0)))
+        self.names = [fake.name() for _ in range(pool)]
+        self.addresses = [fake.address().replace("\n", ", ") for _ in range(pool)]
+        self.phones = [fake.phone_number() for _ in range(pool)]
+        self.domains = sorted({fake.free_email_domain() for _ in range(50)})
+        self.color_names = sorted({fake.color_name() for _ in range(500)})
+
+        self.product_prices = []
+        self.id_base = {}
+
+    # ---- segédek ----
+
+    def _next_ids(self, conn):
+        for name, column in (
+            ("users", models.User.user_id), ("products", models.Product.product_id),
+            ("colors", models.Color.color_id), ("mixes", models.Mix.mix_id),
+            ("carts", models.Cart.cart_id), ("cart_items", models.CartItem.cart_item_id),
+            ("orders", models.Order.order_id), ("order_items", models.OrderItem.order_item_id),
+            ("inventory", models.Inventory.inventory_id),
+        ):
+            self.id_base[name] = conn.execute(select(func.coalesce(func.max(column), 0))).scalar_one() + 1
+
+    def _insert(self, tables_and_rows) -> dict:
+        """(tábla, sor-generátor) párokat tölt be kötegenként; a generátorok egymás
+        után futnak, de egy generátor több táblába is írhat: (tábla, sor) párokat ad."""
+        written = {}
+        pending = {}
+        with self.engine.connect() as conn:
+            for table, row in tables_and_rows:
+                batch = pending.setdefault(table, [])
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._flush(conn, pending, written)
+            self._flush(conn, pending, written)
+        return written
+
+    @staticmethod
+    def _flush(conn, pending: dict, written: dict):
+        # a szülőtábla (pl. orders) mindig a gyerek (order_items) előtt kerül a dict-be
+        for table, batch in pending.items():
+            if batch:
+                conn.execute(insert(table), batch)
+                written[table.name] = written.get(table.name, 0) + len(batch)
+                batch.clear()
+        conn.commit()
+
+    # ---- táblák ----
+
+    def users(self):
+        rng = _rng(self.seed, "users")
+        table = models.User.__table__
+        password_hash = hash_password(self.password)
+        base = self.id_base["users"]
+        for i in range(self.counts.get("users", 0)):
+            user_id = base + i
+            name = self.names[rng.randrange(len(self.names))]
+            yield table, {
+                "user_id": user_id,
+                "name": name,
+                "email": f"{_ascii_slug(name)}.{user_id}@{rng.choice(self.domains)}",
+                # minden generált felhasználó ugyanazt a jelszót kapja (DEFAULT_PASSWORD),
+                # így a hash-t egyszer számoljuk ki, a bejelentkezéses mérésekhez is ismert
+                "password_hash": password_hash,
+                "phone": self.phones[rng.randrange(len(self.phones))],
+                "address": self.addresses[rng.randrange(len(self.addresses))],
+                "role": models.UserRole.admin if rng.random() < 0.001 else models.UserRole.user,
+                "created_at": _random_datetime(rng, self.end, self.days),
+            }
+
+    def products(self):
+        rng = _rng(self.seed, "products")
+        product_table, inventory_table = models.Product.__table__, models.Inventory.__table__
+        categories = list(CATEGORIES.items())
+        base, inventory_id = self.id_base["products"], self.id_base["inventory"]
+        for i in range(self.counts.get("products", 0)):
+            product_id = base + i
+            category, (names, sizes, unit, (low, high)) = rng.choice(categories)
+            size = rng.choice(sizes)
+            price = round(rng.uniform(low, high) * (size ** 0.5 if unit == "liter" else 1), -1)
+            name = f"{rng.choice(BRANDS)} {rng.choice(names)}"
+            if unit == "liter":
+                name = f"{name} {size:g} l"
+            stock = 0.0
+            inventory = []
+            for location in rng.sample(self.locations, rng.randint(1, len(self.locations))):
+                quantity = float(rng.randrange(0, 200))
+                stock += quantity
+                inventory.append({
+                    "inventory_id": inventory_id, "product_id": product_id, "location": location,
+                    "quantity": quantity, "updated_at": _random_datetime(rng, self.end, 30),
+                })
+                inventory_id += 1
+            self.product_prices.append(price)
+            # a Product.stock_quantity a raktárhelyek összege; SQLite alatt az első
+            # raktárhely trigger ugyanezt az értéket veszi át (models.INVENTORY_STOCK_DDL)
+            yield product_table, {
+                "product_id": product_id,
+                "name": name,
+                "description": f"{name} - {category}",
+                "category": category,
+                "price": price,
+                "stock_quantity": stock,
+                "unit": unit,
+                "created_at": _random_datetime(rng, self.end, self.days),
+            }
+            for row in inventory:
+                yield inventory_table, row
+
+    def colors(self):
+        rng = _rng(self.seed, "colors")
+        table = models.Color.__table__
+        for i in range(self.counts.get("colors", 0)):
+            r, g, b = rng.randrange(256), rng.randrange(256), rng.randrange(256)
+            yield table, {
+                "color_id": self.id_base["colors"] + i,
+                "name": f"{rng.choice(self.color_names)} {i + 1}",
+                "hex_code": f"#{r:02X}{g:02X}{b:02X}",
+                "rgb_code": f"{r},{g},{b}",
+                "available": rng.random() < 0.9,
+            }
+
+    def mixes(self):
+        rng = _rng(self.seed, "mixes")
+        mix_table, component_table = models.Mix.__table__, models.MixComponent.__table__
+        users, colors = self.counts.get("users", 0), self.counts.get("colors", 0)
+        if not users or colors < 2:
+            return
+        for i in range(self.counts.get("mixes", 0)):
+            mix_id = self.id_base["mixes"] + i
+            yield mix_table, {
+                "mix_id": mix_id,
+                "user_id": self.id_base["users"] + rng.randrange(users),
+                "name": f"Keverék {mix_id}",
+                "created_at": _random_datetime(rng, self.end, self.days),
+            }
+            parts = rng.sample(range(colors), min(colors, rng.randint(2, 4)))
+            weights = [rng.randint(1, 10) for _ in parts]
+            for color, weight in zip(parts, weights):
+                yield component_table, {
+                    "mix_id": mix_id,
+                    "color_id": self.id_base["colors"] + color,
+                    "ratio": round(weight / sum(weights), 4),
+                }
+
+    def _items(self, rng: random.Random):
+        count = rng.randint(1, min(self.max_items, len(self.product_prices)))
+        for index in rng.sample(range(len(self.product_prices)), count):
+            yield index, float(rng.randint(1, 5))
+
+    def carts(self):
+        rng = _rng(self.seed, "carts")
+        cart_table, item_table = models.Cart.__table__, models.CartItem.__table__
+        users = self.counts.get("users", 0)
+        if not users or not self.product_prices:
+            return
+        item_id = self.id_base["cart_items"]
+        for i in range(self.counts.get("carts", 0)):
+            cart_id = self.id_base["carts"] + i
+            yield cart_table, {
+                "cart_id": cart_id,
+                "user_id": self.id_base["users"] + rng.randrange(users),
+                "created_at": _random_datetime(rng, self.end, 30),
+                "ordered": False,
+            }
+            for index, quantity in self._items(rng):
+                yield item_table, {
+                    "cart_item_id": item_id, "cart_id": cart_id,
+                    "product_id": self.id_base["products"] + index, "quantity": quantity,
+                }
+                item_id += 1
+
+    def orders(self):
+        rng = _rng(self.seed, "orders")
+        order_table, item_table = models.Order.__table__, models.OrderItem.__table__
+        users = self.counts.get("users", 0)
+        if not users or not self.product_prices:
+            return
+        statuses = [status for status, _ in ORDER_STATUSES]
+        weights = [weight for _, weight in ORDER_STATUSES]
+        item_id = self.id_base["order_items"]
+        for i in range(self.counts.get("orders", 0)):
+            order_id = self.id_base["orders"] + i
+            items = []
+            total = 0.0
+            for index, quantity in self._items(rng):
+                price = self.product_prices[index]
+                total += price * quantity
+                items.append({
+                    "order_item_id": item_id, "order_id": order_id,
+                    "product_id": self.id_base["products"] + index,
+                    "quantity": quantity, "unit_price": price,
+                })
+                item_id += 1
+            yield order_table, {
+                "order_id": order_id,
+                "user_id": self.id_base["users"] + rng.randrange(users),
+                "status": rng.choices(statuses, weights)[0],
+                "total_price": total,
+                "created_at": _random_datetime(rng, self.end, self.days),
+            }
+            for item in items:
+                yield item_table, item
+
+    def generate(self, log=print) -> dict:
+        """Minden táblát legenerál és betölt; a beszúrt sorok számát adja vissza táblánként."""
+        ensure_stock_triggers(self.engine)
+        with self.engine.connect() as conn:
+            self._next_ids(conn)
+        written = {}
+        for step in (self.users, self.colors, self.products, self.mixes, self.carts, self.orders):
+            started = time.perf_counter()
+            counts = self._insert(step())
+            elapsed = time.perf_counter() - started
+            for table, rows in counts.items():
+                log(f"{table:<16} {rows:>12,} sor  {rows / elapsed:>10,.0f} sor/s")
+            written.update(counts)
+
+        # a közvetlenül beszúrt rendelésekből a statisztika rollup újraépítése
+        if written.get("orders"):
+            session: Session = SessionLocal(bind=self.engine)
+            try:
+                backfill_order_stats(session)
+            finally:
+                session.close()
+        return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Szintetikus adatkészlet generálása terheléses teszthez")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"{name} száma (felülírja a --scale értékét)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=DEFAULT_END,
+                        help="a legkésőbbi létrehozási időpont (ISO), alapból 2025-12-31")
+    parser.add_argument("--days", type=int, default=365, help="ennyi napra visszamenőleg szórjuk a dátumokat")
+    parser.add_argument("--locations", type=int, default=3, help=f"raktárhelyek száma (max. {len(LOCATIONS)})")
+    parser.add_argument("--max-items", type=int, default=5, help="tételek maximális száma rendelésenként / kosaranként")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="minden generált felhasználó jelszava")
+    parser.add_argument("--reset", action="store_true", help="a táblák eldobása és újralétrehozása betöltés előtt")
+    args = parser.parse_args(argv)
+
+    counts = dict(SCALES[args.scale])
+    for name in counts:
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    generator = SyntheticDataGenerator(
+        counts, seed=args.seed, end=args.end, days=args.days, locations=args.locations,
+        max_items=args.max_items, batch_size=args.batch_size, password=args.password,
+    )
+    written = generator.generate()
+    print(f"Összesen {sum(written.values()):,} sor, {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app import models
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Értékesítési elemzések ----
+# Az order_items sorait oszlopos, fix méretű darabokban olvassuk (pd.read_sql
+# chunksize), és darabonként pandas groupby-jal összesítünk. A memóriaigény így
+# a darabmérettől és a termékek számától függ, nem a tételek számától.
+
+ANALYTICS_CHUNK_SIZE = int(os.getenv("ANALYTICS_CHUNK_SIZE", "50000"))
+DEFAULT_SIZE_BINS = [1, 2, 3, 5, 10, 20, 50]
+
+
+def _order_filter(stmt, start: datetime, end: datetime):
+    return stmt.where(
+        models.Order.created_at.between(start, end),
+        models.Order.status != models.OrderStatus.cancelled,
+    )
+
+
+def _read_chunks(db: Session, stmt, chunk_size: int):
+    conn = db.connection().execution_options(stream_results=True)
+    return pd.read_sql(stmt, conn, chunksize=chunk_size)
+
+
+def product_totals(db: Session, start: datetime, end: datetime, chunk_size: int = ANALYTICS_CHUNK_SIZE) -> pd.DataFrame:
+    """Termékenként eladott mennyiség és bevétel (index: product_id)."""
+    stmt = _order_filter(
+        select(models.OrderItem.product_id, models.OrderItem.quantity, models.OrderItem.unit_price)
+        .join(models.Order, models.Order.order_id == models.OrderItem.order_id),
+        start, end,
+    )
+
+    totals = None
+    for chunk in _read_chunks(db, stmt, chunk_size):
+        if chunk.empty:
+            # sor nélkül a read_sql object típusú oszlopokat ad
+            continue
+        chunk["revenue"] = chunk["quantity"].to_numpy(dtype=float) * chunk["unit_price"].to_numpy(dtype=float)
+        partial = chunk.groupby("product_id", sort=False)[["quantity", "revenue"]].sum()
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+
+    if totals is None:
+        # üres időszak: a numerikus oszloptípus kell a későbbi nlargest-hez
+        return pd.DataFrame({"quantity": pd.Series(dtype="float64"), "revenue": pd.Series(dtype="float64")},
+                            index=pd.Index([], dtype="int64", name="product_id"))
+    return totals
+
+
+def order_size_histogram(db: Session, start: datetime, end: datetime, bins: list[int],
+                         chunk_size: int = ANALYTICS_CHUNK_SIZE) -> list[dict]:
+    """Rendelések száma tételszám szerinti sávokban; a rendelésenkénti
+    csoportosítást az adatbázis végzi, a sávokba sorolás vektorosan történik."""
+    stmt = _order_filter(
+        select(func.count(models.OrderItem.order_item_id).label("lines"))
+        .join(models.Order, models.Order.order_id == models.OrderItem.order_id)
+        .group_by(models.OrderItem.order_id),
+        start, end,
+    )
+
+    edges = np.array(sorted(set(bins)) + [np.inf], dtype=float)
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in _read_chunks(db, stmt, chunk_size):
+        counts += np.histogram(chunk["lines"].to_numpy(dtype=float), bins=edges)[0]
+
+    return [
+        {"min_items": int(lower), "max_items": None if np.isinf(upper) else int(upper) - 1, "orders": int(count)}
+        for lower, upper, count in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+def average_order_value(db: Session, start: datetime, end: datetime) -> tuple[int, float]:
+    """A napi rollupból: (rendelések száma, átlagos kosárérték) lemondottak nélkül."""
+    orders, revenue = (
+        db.query(func.coalesce(func.sum(models.OrderStatsDaily.orders), 0),
+                 func.coalesce(func.sum(models.OrderStatsDaily.revenue), 0))
+        .filter(
+            models.OrderStatsDaily.day.between(start.date(), end.date()),
+            models.OrderStatsDaily.status != models.OrderStatus.cancelled,
+        )
+        .one()
+    )
+    return int(orders), (float(revenue) / orders if orders else 0.0)
+
+
+def sold_products(db: Session, start: datetime, end: datetime) -> pd.DataFrame:
+    """Az időszakban eladott termékek neve és kategóriája (index: product_id).
+
+    A termékek szűrése allekérdezéssel az adatbázisban történik, nem a
+    product_id-k paraméterlistájával: a lekérdezés mérete nem nő a katalógussal.
+    """
+    sold = _order_filter(
+        select(models.OrderItem.product_id).join(models.Order, models.Order.order_id == models.OrderItem.order_id),
+        start, end,
+    )
+    return pd.DataFrame(
+        db.query(models.Product.product_id, models.Product.name, models.Product.category)
+        .filter(models.Product.product_id.in_(sold))
+        .all(),
+        columns=["product_id", "name", "category"],
+    ).set_index("product_id")
+
+
+def sales_analytics(db: Session, start: datetime, end: datetime, top: int, bins: list[int] | None = None) -> dict:
+    totals = product_totals(db, start, end)
+    products = sold_products(db, start, end)
+    totals = totals.join(products, how="left")
+    totals["category"] = totals["category"].fillna("Egyéb")
+
+    def top_list(column):
+        rows = totals.nlargest(top, column)
+        return [
+            {"product_id": int(pid), "name": row["name"], "quantity": float(row["quantity"]), "revenue": float(row["revenue"])}
+            for pid, row in rows.iterrows()
+        ]
+
+    categories = totals.groupby("category")[["quantity", "revenue"]].sum().sort_values("revenue", ascending=False)
+    total_revenue = float(categories["revenue"].sum())
+    order_count, aov = average_order_value(db, start, end)
+
+    return {
+        "start": start,
+        "end": end,
+        "order_count": order_count,
+        "average_order_value": aov,
+        "top_by_quantity": top_list("quantity"),
+        "top_by_revenue": top_list("revenue"),
+        "categories": [
+            {
+                "category": category,
+                "quantity": float(row["quantity"]),
+                "revenue": float(row["revenue"]),
+                "revenue_share": float(row["revenue"]) / total_revenue if total_revenue else 0.0,
+            }
+            for category, row in categories.iterrows()
+        ],
+        "order_size_histogram": order_size_histogram(db, start, end, bins or DEFAULT_SIZE_BINS),
+    }
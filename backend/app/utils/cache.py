@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+# több worker esetén egy másik folyamat írását legfeljebb ennyi ideig nem látjuk
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers", "expires_at")
+
+    def __init__(self, body: bytes, headers: dict, expires_at: float):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.headers = headers
+        self.expires_at = expires_at
+
+
+class VersionedCache:
+    """Folyamaton belüli, méretkorlátos LRU cache kész JSON válaszokhoz.
+
+    Az írási útvonalak a bump() hívással új verziót kezdenek, ami minden
+    korábbi bejegyzést érvénytelenít.
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_or_load(self, key, loader) -> CachedResponse:
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        version = self.version
+        return self._store(key, version, *loader())
+
+    async def get_or_load_async(self, key, loader) -> CachedResponse:
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        version = self.version
+        return self._store(key, version, *(await loader()))
+
+    def _store(self, key, version: int, body: bytes, headers: dict) -> CachedResponse:
+        entry = CachedResponse(body, headers, time.monotonic() + self.ttl)
+        with self._lock:
+            # ha betöltés közben írás történt, az eredményt nem tesszük el
+            if version == self.version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, key, loader) -> Response:
+        """A loader () -> (json bytes, extra headerek); If-None-Match egyezés esetén 304."""
+        return self._response(request, self.get_or_load(key, loader))
+
+    async def respond_async(self, request: Request, key, loader) -> Response:
+        """Mint a respond(), de a loader coroutine."""
+        return self._response(request, await self.get_or_load_async(key, loader))
+
+    @staticmethod
+    def _response(request: Request, entry: CachedResponse) -> Response:
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or entry.etag in [t.strip() for t in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+class TTLCache:
+    """Méretkorlátos LRU cache lejárati idővel, kulcsonkénti érvénytelenítéssel.
+
+    Az invalidate() a generation számlálót is lépteti: a set(..., generation=g)
+    nem tárol, ha a betöltés (g lekérése) óta érvénytelenítés történt.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None, generation: int | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+# termékkatalógus válaszai (GET /products/, GET /products/{id})
+catalog_cache = VersionedCache()
@@ -0,0 +1,129 @@
+from sqlalchemy import Float, insert, literal, select, update
+from sqlalchemy.orm import Session
+from app import models
+from app.utils.upsert import upsert_insert
+
+# ---- Kosártétel hozzáadása egy utasításban ----
+# INSERT ... SELECT ... ON CONFLICT(cart_id, product_id) DO UPDATE: a SELECT csak
+# akkor ad sort, ha a kosár létezik (és owner_id esetén a felhasználóé) és a termék
+# létezik, így az ellenőrzések és a beszúrás/növelés egyetlen utasítás. A
+# (cart_id, product_id) unique index miatt párhuzamos hozzáadásnál sem lesz
+# duplikált sor, a mennyiségek összeadódnak.
+
+_carts = models.Cart.__table__
+_products = models.Product.__table__
+_cart_items = models.CartItem.__table__
+
+_RETURNED = (_cart_items.c.cart_item_id, _cart_items.c.product_id, _cart_items.c.quantity)
+
+
+def _source(cart_id: int, product_id: int, quantity: float, owner_id: int | None):
+    # SQLite-nál a WHERE kötelező, különben az ON CONFLICT a JOIN ON részének látszik
+    source = (
+        select(_carts.c.cart_id, _products.c.product_id, literal(quantity, Float))
+        .select_from(_carts.join(_products, _products.c.product_id == product_id))
+        .where(_carts.c.cart_id == cart_id)
+    )
+    if owner_id is not None:
+        source = source.where(_carts.c.user_id == owner_id)
+    return source
+
+
+def upsert_cart_item(db: Session, cart_id: int, product_id: int, quantity: float, owner_id: int | None = None):
+    """Hozzáadja a terméket a kosárhoz (meglévő tételnél a mennyiséget növeli).
+
+    A módosított tétel (cart_item_id, product_id, quantity) sorával tér vissza, vagy
+    None-nal, ha a kosár vagy a termék nem létezik, illetve nem owner_id kosara.
+    Nem commitol.
+    """
+    columns = ["cart_id", "product_id", "quantity"]
+    source = _source(cart_id, product_id, quantity, owner_id)
+    stmt = upsert_insert(db, _cart_items)
+    if stmt is not None:
+        stmt = stmt.from_select(columns, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_cart_items.c.cart_id, _cart_items.c.product_id],
+            set_={"quantity": _cart_items.c.quantity + stmt.excluded.quantity},
+        )
+        return db.execute(stmt.returning(*_RETURNED)).first()
+
+    # natív upsert nélkül: UPDATE, ha nem volt ilyen tétel, INSERT ... SELECT
+    allowed_carts = select(_carts.c.cart_id).where(_carts.c.cart_id == cart_id)
+    if owner_id is not None:
+        allowed_carts = allowed_carts.where(_carts.c.user_id == owner_id)
+    updated = db.execute(
+        update(_cart_items)
+        .where(_cart_items.c.cart_id.in_(allowed_carts), _cart_items.c.product_id == product_id)
+        .values(quantity=_cart_items.c.quantity + quantity)
+    ).rowcount
+    if not updated and not db.execute(insert(_cart_items).from_select(columns, source)).rowcount:
+        return None
+    return db.execute(
+        select(*_RETURNED).where(_cart_items.c.cart_id == cart_id, _cart_items.c.product_id == product_id)
+    ).first()
+
+
+# ---- Kötegelt módosítás (teljes kosár szinkron) ----
+# A műveleteket termékenként sorrendben összevonjuk: ami a kötegben set-et vagy
+# remove-ot kapott, annak a végső mennyisége ismert (abszolút érték), a csak
+# increment-et kapott termékeknél a növelés az adatbázisban adódik hozzá (így egy
+# párhuzamos hozzáadás sem vész el). Így terméktől függetlenül legfeljebb három
+# utasítás fut: egy DELETE, egy "set" és egy "increment" executemany.
+
+def fold_operations(operations) -> tuple[dict, dict, list]:
+    """(op, product_id, quantity) műveletek -> (set: {product_id: quantity},
+    increment: {product_id: quantity}, remove: [product_id])."""
+    final = {}
+    for op, product_id, quantity in operations:
+        previous = final.get(product_id)
+        if op == "remove":
+            final[product_id] = ("set", None)
+        elif op == "set":
+            final[product_id] = ("set", quantity)
+        elif previous is None:
+            final[product_id] = ("increment", quantity)
+        else:
+            kind, current = previous
+            final[product_id] = (kind, (current or 0) + quantity)
+
+    to_set, to_increment, to_remove = {}, {}, []
+    for product_id, (kind, quantity) in final.items():
+        if kind == "increment":
+            to_increment[product_id] = quantity
+        elif quantity is None:
+            to_remove.append(product_id)
+        else:
+            to_set[product_id] = quantity
+    return to_set, to_increment, to_remove
+
+
+def apply_cart_operations(db: Session, cart_id: int, to_set: dict, to_increment: dict, to_remove: list):
+    """A fold_operations eredményének végrehajtása a futó tranzakcióban (nem commitol).
+    A kosár és a termékek létezését a hívó ellenőrzi."""
+    if to_remove:
+        db.execute(
+            _cart_items.delete()
+            .where(_cart_items.c.cart_id == cart_id, _cart_items.c.product_id.in_(to_remove))
+        )
+
+    stmt = upsert_insert(db, _cart_items)
+    for values, increment in ((to_set, False), (to_increment, True)):
+        if not values:
+            continue
+        rows = [{"cart_id": cart_id, "product_id": p, "quantity": q} for p, q in sorted(values.items())]
+        if stmt is not None:
+            excluded = stmt.excluded.quantity
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[_cart_items.c.cart_id, _cart_items.c.product_id],
+                set_={"quantity": _cart_items.c.quantity + excluded if increment else excluded},
+            ), rows)
+            continue
+        for row in rows:
+            new_quantity = _cart_items.c.quantity + row["quantity"] if increment else row["quantity"]
+            updated = db.execute(
+                update(_cart_items)
+                .where(_cart_items.c.cart_id == cart_id, _cart_items.c.product_id == row["product_id"])
+                .values(quantity=new_quantity)
+            ).rowcount
+            if not updated:
+                db.execute(insert(_cart_items).values(**row))
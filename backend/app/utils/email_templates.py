@@ -0,0 +1,64 @@
+import os
+from dataclasses import dataclass, field
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy.orm import Session
+from app import models
+
+# ---- Email sablonok ----
+# A sablonokat modul betöltésekor (az app indulásakor) egyszer fordítjuk le,
+# a renderelés már csak a lefordított kódot futtatja. A bemeneteket egy
+# joinolt lekérdezés tölti be, így tételenként nincs külön lazy load.
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "emails")
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+)
+ORDER_COMPLETED = env.get_template("order_completed.html")
+
+
+@dataclass
+class OrderEmail:
+    order_id: int
+    recipient: str
+    user_name: str
+    total: float
+    items: list = field(default_factory=list)
+
+    @property
+    def subject(self) -> str:
+        return f"Rendelés #{self.order_id} teljesítve"
+
+
+def load_order_emails(db: Session, order_ids: list) -> list:
+    """A rendelések, a vevők és a tételek terméknévvel, egyetlen lekérdezésben."""
+    rows = (
+        db.query(
+            models.Order.order_id, models.Order.total_price, models.User.name, models.User.email,
+            models.Product.name.label("product_name"), models.OrderItem.quantity, models.OrderItem.unit_price,
+        )
+        .join(models.User, models.User.user_id == models.Order.user_id)
+        .outerjoin(models.OrderItem, models.OrderItem.order_id == models.Order.order_id)
+        .outerjoin(models.Product, models.Product.product_id == models.OrderItem.product_id)
+        .filter(models.Order.order_id.in_(order_ids))
+        .order_by(models.Order.order_id, models.OrderItem.order_item_id)
+        .all()
+    )
+    emails = {}
+    for row in rows:
+        email = emails.get(row.order_id)
+        if email is None:
+            email = emails[row.order_id] = OrderEmail(row.order_id, row.email, row.name, row.total_price)
+        if row.quantity is not None:
+            email.items.append({"product_name": row.product_name, "quantity": row.quantity, "unit_price": row.unit_price})
+    return list(emails.values())
+
+
+def render_order_completed(email: OrderEmail) -> str:
+    return ORDER_COMPLETED.render(user_name=email.user_name, order_id=email.order_id, items=email.items, total=email.total)
+
+
+def render_order_completed_batch(db: Session, order_ids: list) -> list:
+    """Több rendelés levele egyszerre: [(OrderEmail, html), ...], order_id szerint rendezve."""
+    return [(email, render_order_completed(email)) for email in load_order_emails(db, order_ids)]
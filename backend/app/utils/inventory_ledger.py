@@ -0,0 +1,265 @@
+import sys
+from datetime import datetime
+from sqlalchemy import DateTime, func, insert, literal, select, text, union_all, update
+from sqlalchemy.orm import Session
+from app import models
+
+# ---- Készletmozgás napló és időszakos pillanatképek ----
+# Az inventory.quantity minden változása egy előjeles sor az inventory_movements
+# táblában (bevételezés, eladás, áttárolás, leltárkorrekció); a napló csak bővül.
+# A take_snapshot() időnként raktárhelyenként rögzíti a készletet, így a
+# "készlet T időpontban" a T előtti utolsó pillanatkép + az utána következő
+# (kevés) mozgás összege, nem a teljes napló végigolvasása.
+#
+# Pillanatkép szabály: a futás minden sora a last_movement_id-ig (bezárólag)
+# tartalmazza a mozgásokat, és ezek mind taken_at előtt keletkeztek. A delta
+# ezért mindig "movement_id > last_movement_id AND created_at <= T".
+
+_inventory = models.Inventory.__table__
+_movements = models.InventoryMovement.__table__
+_snapshots = models.InventorySnapshot.__table__
+
+# a lebegőpontos összegek kerekítési hibája nem számít eltérésnek
+TOLERANCE = 1e-6
+
+UNTRACKED_NOTE = "nem naplózott változás (pillanatkép)"
+
+
+def _append(db: Session, inventory, kind: models.MovementKind, delta: float, **fields):
+    return db.execute(
+        insert(_movements)
+        .values(
+            inventory_id=inventory.inventory_id, product_id=inventory.product_id, location=inventory.location,
+            kind=kind, quantity=delta, created_at=datetime.utcnow(), **fields,
+        )
+        .returning(*_movements.c)
+    ).one()
+
+
+def record(db: Session, inventory, kind: models.MovementKind, delta: float, **fields):
+    """Mozgás naplózása egy már elvégzett változáshoz (új raktárhely, törlés)."""
+    return _append(db, inventory, kind, delta, **fields)
+
+
+def move(db: Session, inventory, kind: models.MovementKind, delta: float, **fields):
+    """A raktárhely készletének módosítása delta-val és a mozgás naplózása.
+
+    Atomi (quantity = quantity + delta) frissítés; csökkenésnél csak akkor fut le,
+    ha marad elég készlet – különben None, és semmi nem változik.
+    """
+    current = func.coalesce(_inventory.c.quantity, 0)
+    stmt = (
+        update(_inventory)
+        .where(_inventory.c.inventory_id == inventory.inventory_id)
+        .values(quantity=current + delta, updated_at=datetime.utcnow())
+    )
+    if delta < 0:
+        stmt = stmt.where(current + delta >= -TOLERANCE)
+    if db.execute(stmt).rowcount == 0:
+        return None
+    return _append(db, inventory, kind, delta, **fields)
+
+
+def set_quantity(db: Session, inventory, quantity: float, **fields) -> bool:
+    """Leltár szerinti új mennyiség; a különbség leltárkorrekcióként kerül a naplóba.
+
+    Feltételes frissítés a betöltött értékre: ha közben más is módosította a
+    raktárhelyet, False (a különbség már nem lenne igaz).
+    """
+    old = inventory.quantity
+    matches = _inventory.c.quantity.is_(None) if old is None else _inventory.c.quantity == old
+    updated = db.execute(
+        update(_inventory)
+        .where(_inventory.c.inventory_id == inventory.inventory_id, matches)
+        .values(quantity=quantity, updated_at=datetime.utcnow())
+    ).rowcount
+    if not updated:
+        return False
+    delta = quantity - (old or 0)
+    if abs(delta) > TOLERANCE:
+        _append(db, inventory, models.MovementKind.adjustment, delta, **fields)
+    return True
+
+
+# ---- Pillanatkép ----
+# ezeken a dialektusokon biztos a vágási pont (lásd _lock_movements)
+SNAPSHOT_DIALECTS = ("sqlite", "postgresql")
+
+
+def snapshots_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name in SNAPSHOT_DIALECTS
+
+
+def _lock_movements(db: Session):
+    """A napló lezárása új mozgások elől a pillanatkép tranzakciójának végéig.
+
+    A vágási pont (max(movement_id)) csak akkor biztos, ha közben más tranzakció
+    nem ír mozgást: egy kisebb, még nem commitolt movement_id később a vágás alá
+    kerülne. SQLite alatt ezt az egyetlen író biztosítja (az első írás után senki
+    más nem írhat), PostgreSQL alatt a SHARE ROW EXCLUSIVE zár (olvasni lehet,
+    írni nem). Más adatbázison nem készítünk pillanatképet.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(text(f"LOCK TABLE {_movements.name} IN SHARE ROW EXCLUSIVE MODE"))
+    elif dialect not in SNAPSHOT_DIALECTS:
+        raise RuntimeError(f"Inventory snapshots are not supported on {dialect}")
+
+
+def _latest_run(db: Session):
+    """Az utolsó pillanatkép ideje és vágási pontja (None, 0 ha még nincs)."""
+    taken_at = db.execute(select(func.max(_snapshots.c.taken_at))).scalar()
+    if taken_at is None:
+        return None, 0
+    cut = db.execute(
+        select(_snapshots.c.last_movement_id).where(_snapshots.c.taken_at == taken_at).limit(1)
+    ).scalar()
+    return taken_at, cut
+
+
+def take_snapshot(db: Session) -> dict:
+    """Pillanatkép minden raktárhelyről, egy tranzakcióban.
+
+    1. Ami a napló szerint (előző pillanatkép + azóta naplózott mozgások) nem
+       egyezik az inventory táblával – pl. közvetlen SQL írás, régi adatbázis
+       kezdőkészlete –, leltárkorrekcióként bekerül a naplóba.
+    2. Raktárhelyenként egy pillanatkép sor a naplóval egyező mennyiséggel.
+    A napló a tranzakció elején zárolva van (_lock_movements), így közben nem
+    jöhet új mozgás; a taken_at és a vágási pont az 1. lépés után kerül kiolvasásra.
+    """
+    _lock_movements(db)
+    prev_at, prev_cut = _latest_run(db)
+
+    # előjeles tételek raktárhelyenként: napló szerinti (+) és tényleges (-) készlet
+    parts = [
+        select(_movements.c.inventory_id, _movements.c.product_id, _movements.c.location,
+               _movements.c.quantity.label("quantity"))
+        .where(_movements.c.movement_id > prev_cut),
+        select(_inventory.c.inventory_id, _inventory.c.product_id, _inventory.c.location,
+               (-func.coalesce(_inventory.c.quantity, 0)).label("quantity"))
+        .where(_inventory.c.product_id.is_not(None)),
+    ]
+    if prev_at is not None:
+        parts.append(
+            select(_snapshots.c.inventory_id, _snapshots.c.product_id, _snapshots.c.location,
+                   _snapshots.c.quantity.label("quantity"))
+            .where(_snapshots.c.taken_at == prev_at)
+        )
+    ledger = union_all(*parts).subquery()
+    drift = func.sum(ledger.c.quantity)
+    current_location = (
+        select(_inventory.c.location).where(_inventory.c.inventory_id == ledger.c.inventory_id).scalar_subquery()
+    )
+    source = (
+        select(ledger.c.inventory_id, func.max(ledger.c.product_id),
+               func.coalesce(current_location, func.max(ledger.c.location)),
+               literal(models.MovementKind.adjustment.name), -drift, literal(UNTRACKED_NOTE),
+               literal(datetime.utcnow(), DateTime))
+        .group_by(ledger.c.inventory_id)
+        .having(func.abs(drift) > TOLERANCE)
+    )
+    adjustments = db.execute(
+        insert(_movements).from_select(
+            ["inventory_id", "product_id", "location", "kind", "quantity", "note", "created_at"], source)
+    ).rowcount
+
+    # a zár miatt a mi korrekcióinkon kívül nincs új mozgás
+    cut = db.execute(select(func.coalesce(func.max(_movements.c.movement_id), 0))).scalar()
+    taken_at = datetime.utcnow()
+    locations = db.execute(
+        insert(_snapshots).from_select(
+            ["taken_at", "last_movement_id", "inventory_id", "product_id", "location", "quantity"],
+            select(literal(taken_at, DateTime), literal(cut), _inventory.c.inventory_id, _inventory.c.product_id,
+                   _inventory.c.location, func.coalesce(_inventory.c.quantity, 0))
+            .where(_inventory.c.product_id.is_not(None)),
+        )
+    ).rowcount
+    db.commit()
+    return {"taken_at": taken_at, "last_movement_id": cut, "locations": locations, "adjustments": adjustments}
+
+
+def snapshot_if_empty(db: Session):
+    """Régi adatbázis első indításakor: a meglévő készlet lesz a napló nyitókészlete.
+    Nem támogatott dialektuson csak figyelmeztet (az indulást nem akasztja meg)."""
+    if not snapshots_supported(db):
+        print(f"Inventory snapshot skipped: not supported on {db.get_bind().dialect.name}")
+        return
+    if db.query(models.InventorySnapshot.snapshot_id).first() is None and db.query(models.Inventory.inventory_id).first() is not None:
+        take_snapshot(db)
+
+
+# ---- Készlet egy adott időpontban ----
+def stock_at(db: Session, product_id: int, at: datetime) -> dict:
+    """Termék készlete raktárhelyenként az 'at' időpontban: a legutóbbi
+    pillanatkép (at előtt) + az utána naplózott, at-ig keletkezett mozgások."""
+    latest = (
+        select(func.max(_snapshots.c.taken_at))
+        .where(_snapshots.c.product_id == product_id, _snapshots.c.taken_at <= at)
+        .scalar_subquery()
+    )
+    base = db.execute(
+        select(_snapshots.c.inventory_id, _snapshots.c.location, _snapshots.c.quantity,
+               _snapshots.c.taken_at, _snapshots.c.last_movement_id)
+        .where(_snapshots.c.product_id == product_id, _snapshots.c.taken_at == latest)
+    ).all()
+    cut = base[0].last_movement_id if base else 0
+
+    delta = db.execute(
+        select(_movements.c.inventory_id, func.max(_movements.c.location).label("location"),
+               func.sum(_movements.c.quantity).label("quantity"), func.count().label("movements"))
+        .where(_movements.c.product_id == product_id, _movements.c.movement_id > cut, _movements.c.created_at <= at)
+        .group_by(_movements.c.inventory_id)
+    ).all()
+
+    locations = {row.inventory_id: {"inventory_id": row.inventory_id, "location": row.location, "quantity": row.quantity}
+                 for row in base}
+    for row in delta:
+        entry = locations.setdefault(row.inventory_id, {"inventory_id": row.inventory_id, "location": row.location, "quantity": 0})
+        entry["quantity"] += row.quantity
+    return {
+        "product_id": product_id,
+        "at": at,
+        "quantity": sum(entry["quantity"] for entry in locations.values()),
+        "snapshot_at": base[0].taken_at if base else None,
+        "movements_applied": sum(row.movements for row in delta),
+        "locations": [locations[key] for key in sorted(locations)],
+    }
+
+
+def movement_report(db: Session, product_id: int, start: datetime, end: datetime) -> dict:
+    """Nyitó készlet (start), mozgások fajtánként (start, end] között, záró készlet."""
+    opening = stock_at(db, product_id, start)
+    rows = db.execute(
+        select(_movements.c.kind, func.count().label("movements"), func.sum(_movements.c.quantity).label("quantity"))
+        .where(_movements.c.product_id == product_id, _movements.c.created_at > start, _movements.c.created_at <= end)
+        .group_by(_movements.c.kind)
+        .order_by(_movements.c.kind)
+    ).all()
+    by_kind = [{"kind": row.kind, "movements": row.movements, "quantity": row.quantity} for row in rows]
+    return {
+        "product_id": product_id,
+        "start": start,
+        "end": end,
+        "opening": opening["quantity"],
+        "closing": opening["quantity"] + sum(row["quantity"] for row in by_kind),
+        "movements": sum(row["movements"] for row in by_kind),
+        "by_kind": by_kind,
+    }
+
+
+# Használat (a backend mappából, pl. éjszakai cron): python -m app.utils.inventory_ledger --snapshot
+if __name__ == "__main__":
+    from app.database import SessionLocal, Base, engine
+    from app.utils.stock_levels import ensure_stock_triggers
+
+    if "--snapshot" not in sys.argv:
+        print("Használat: python -m app.utils.inventory_ledger --snapshot")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_stock_triggers(engine)
+    session = SessionLocal()
+    try:
+        print(f"Készlet pillanatkép: {take_snapshot(session)}")
+    finally:
+        session.close()
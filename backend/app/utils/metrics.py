@@ -0,0 +1,245 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from sqlalchemy import event
+from app.utils import query_budget
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Kérés- és SQL-metrikák (Prometheus szöveges formátum) ----
+# Az ASGI middleware útvonal-sablononként (pl. /products/{product_id}) méri a
+# késleltetést és a státuszkódokat; az engine eseménykezelői a futó kéréshez
+# (contextvar) adják hozzá a lekérdezések számát és idejét. Az export a /metrics
+# végponton érhető el. METRICS_ENABLED=0 esetén a middleware nem mér semmit.
+# QUERY_BUDGET_CHECK=1 esetén a kérés SQL utasításait is eltesszük, és a
+# kérés végén az app.utils.query_budget ellenőrzi őket (N+1, keret túllépés).
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+# a nem illeszkedő útvonalak (404) egy címkére kerülnek, így a címkék száma korlátos
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self, collect_statements: bool = False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = [] if collect_statements else None
+
+
+# a sync végpontok threadpoolban futnak, de a kontextus másolatát kapják,
+# így ugyanazt a RequestStats objektumot növelik
+_current_request: contextvars.ContextVar = contextvars.ContextVar("metrics_request", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = {}          # (method, route, status) -> darab
+        self.latency = {}           # (method, route) -> Histogram
+        self.queries = {}           # (method, route) -> Histogram (lekérdezés / kérés)
+        self.db_seconds = {}        # (method, route) -> összes DB idő
+        self.background_queries = 0
+        self.background_db_seconds = 0.0
+
+    def start_request(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.db_seconds[key] = 0.0
+            latency.observe(seconds)
+            self.queries[key].observe(stats.queries)
+            self.db_seconds[key] += stats.db_seconds
+
+    def record_background_query(self, seconds: float):
+        # kérésen kívüli lekérdezés (startup, outbox worker)
+        with self._lock:
+            self.background_queries += 1
+            self.background_db_seconds += seconds
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.queries.clear()
+            self.db_seconds.clear()
+            self.background_queries = 0
+            self.background_db_seconds = 0.0
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+                "# HELP http_requests_total Completed requests by route template and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+            lines += [
+                "# HELP http_request_duration_seconds Request latency by route template.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for key, histogram in sorted(self.latency.items()):
+                lines += _histogram_lines("http_request_duration_seconds", _labels(key), histogram)
+
+            lines += [
+                "# HELP db_queries_per_request SQL statements executed per request.",
+                "# TYPE db_queries_per_request histogram",
+            ]
+            for key, histogram in sorted(self.queries.items()):
+                lines += _histogram_lines("db_queries_per_request", _labels(key), histogram)
+
+            lines += [
+                "# HELP db_query_duration_seconds_total Time spent executing SQL per route template.",
+                "# TYPE db_query_duration_seconds_total counter",
+            ]
+            for key, seconds in sorted(self.db_seconds.items()):
+                lines.append(f"db_query_duration_seconds_total{{{_labels(key)}}} {seconds:.6f}")
+
+            lines += [
+                "# HELP db_background_queries_total SQL statements executed outside of requests.",
+                "# TYPE db_background_queries_total counter",
+                f"db_background_queries_total {self.background_queries}",
+                "# HELP db_background_query_duration_seconds_total Time spent on SQL outside of requests.",
+                "# TYPE db_background_query_duration_seconds_total counter",
+                f"db_background_query_duration_seconds_total {self.background_db_seconds:.6f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key) -> str:
+    method, route = key
+    return f'method="{method}",route="{_escape(route)}"'
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> list:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {round(histogram.sum, 6)}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def current_request_stats():
+    """A futó kérés számlálói (None, ha nem kérésen belül vagyunk)."""
+    return _current_request.get()
+
+
+# ---- SQL számlálás ----
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current_request.get()
+    if stats is None:
+        registry.record_background_query(elapsed)
+    else:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+def _handle_error(exception_context):
+    # hibás utasításnál az after_cursor_execute nem fut le, a kezdőidőt el kell dobni
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("metrics_query_start"):
+        connection.info["metrics_query_start"].pop()
+
+
+def instrument_engine(sync_engine):
+    """SQL számlálás bekapcsolása egy (sync) engine-en; async engine-nél a .sync_engine-t kell átadni."""
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# ---- ASGI middleware ----
+
+class MetricsMiddleware:
+    """Tiszta ASGI middleware (nem BaseHTTPMiddleware), így nem pufferel és nem indít extra taskot."""
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(collect_statements=query_budget.QUERY_BUDGET_CHECK)
+        token = _current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.start_request()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            # a FastAPI router illesztéskor a scope-ba teszi az útvonalat
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.registry.finish_request(scope["method"], route_path, status, elapsed, stats)
+            if stats.statements is not None:
+                query_budget.report_request(scope["method"], route, stats.statements)
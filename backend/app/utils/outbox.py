@@ -0,0 +1,235 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app import models
+from app.database import SessionLocal
+from app.utils.email_utils import conf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Email outbox ----
+# enqueue_email() a hívó tranzakciójában ír egy sort az email_outbox táblába.
+# A worker kötegekben üríti: kötegenként egyetlen SMTP kapcsolatot nyit, és
+# hiba esetén exponenciális várakozással később újrapróbálja a levelet.
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# ennyi ideig "foglalt" egy kiküldés alatt álló sor, hogy két worker ne küldje kétszer
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+EMAIL_OUTBOX_WORKER = os.getenv("EMAIL_OUTBOX_WORKER", "1").lower() in ("1", "true", "yes")
+
+
+class SmtpSettings:
+    def __init__(self, host: str = conf.MAIL_SERVER, port: int = conf.MAIL_PORT,
+                 username: str | None = conf.MAIL_USERNAME, password: str | None = None,
+                 starttls: bool = conf.MAIL_STARTTLS, ssl: bool = conf.MAIL_SSL_TLS,
+                 use_credentials: bool = conf.USE_CREDENTIALS, sender: str = str(conf.MAIL_FROM),
+                 sender_name: str | None = conf.MAIL_FROM_NAME, suppress_send: bool = bool(conf.SUPPRESS_SEND),
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        if password is None:
+            password = getattr(conf.MAIL_PASSWORD, "get_secret_value", lambda: conf.MAIL_PASSWORD)()
+        self.password = password
+        self.starttls = starttls
+        self.ssl = ssl
+        self.use_credentials = use_credentials
+        self.sender = sender
+        self.sender_name = sender_name
+        self.suppress_send = suppress_send
+        self.timeout = timeout
+
+    def connect(self) -> smtplib.SMTP:
+        smtp_class = smtplib.SMTP_SSL if self.ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        if self.starttls and not self.ssl:
+            smtp.starttls()
+        if self.use_credentials and self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+
+def enqueue_email(db: Session, recipient: str, subject: str, body: str, subtype: str = "html") -> models.EmailOutbox:
+    """A levelet a hívó tranzakciójában teszi a sorba (commit a hívó dolga)."""
+    entry = models.EmailOutbox(recipient=recipient, subject=subject, body=body, subtype=subtype)
+    db.add(entry)
+    return entry
+
+
+def _build_message(entry: models.EmailOutbox, settings: SmtpSettings) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((settings.sender_name, settings.sender)) if settings.sender_name else settings.sender
+    message["To"] = entry.recipient
+    message["Subject"] = entry.subject
+    message.set_content(entry.body, subtype=entry.subtype or "plain")
+    return message
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+def _claim_batch(db: Session, batch_size: int, now: datetime) -> list:
+    candidates = (
+        db.query(models.EmailOutbox)
+        .filter(models.EmailOutbox.status == "pending", models.EmailOutbox.next_attempt_at <= now)
+        .order_by(models.EmailOutbox.next_attempt_at, models.EmailOutbox.outbox_id)
+        .limit(batch_size)
+        .all()
+    )
+    lease_until = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    claimed = []
+    for entry in candidates:
+        # feltételes foglalás: ha egy másik worker már elvitte, kihagyjuk
+        taken = db.execute(
+            update(models.EmailOutbox)
+            .where(models.EmailOutbox.outbox_id == entry.outbox_id,
+                   models.EmailOutbox.next_attempt_at == entry.next_attempt_at)
+            .values(next_attempt_at=lease_until)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if taken:
+            claimed.append(entry)
+    db.commit()
+    return claimed
+
+
+def _mark_failed(entry: models.EmailOutbox, error: Exception, now: datetime):
+    entry.attempts += 1
+    entry.last_error = f"{type(error).__name__}: {error}"
+    if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+        entry.status = "failed"
+    entry.next_attempt_at = now + _backoff(entry.attempts)
+
+
+def deliver_batch(db: Session, settings: SmtpSettings | None = None, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Kiküld egy köteget egyetlen SMTP kapcsolaton; a feldolgozott sorok számát adja vissza."""
+    settings = settings or SmtpSettings()
+    now = datetime.utcnow()
+    batch = _claim_batch(db, batch_size, now)
+    if not batch:
+        return 0
+
+    smtp = None
+    try:
+        if not settings.suppress_send:
+            smtp = settings.connect()
+    except (smtplib.SMTPException, OSError) as exc:
+        # nincs kapcsolat: a teljes köteg később újrapróbálódik
+        for entry in batch:
+            _mark_failed(entry, exc, now)
+        db.commit()
+        return len(batch)
+
+    try:
+        for entry in batch:
+            try:
+                if smtp is not None:
+                    smtp.send_message(_build_message(entry, settings))
+                entry.status = "sent"
+                entry.sent_at = datetime.utcnow()
+                entry.last_error = None
+            except smtplib.SMTPServerDisconnected as exc:
+                _mark_failed(entry, exc, now)
+                smtp = None
+                try:
+                    smtp = settings.connect()
+                except (smtplib.SMTPException, OSError):
+                    break
+            except (smtplib.SMTPException, OSError) as exc:
+                _mark_failed(entry, exc, now)
+    finally:
+        # ami a kapcsolat elvesztése miatt kimaradt, a foglalás lejártakor újra sorra kerül
+        db.commit()
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return len(batch)
+
+
+class OutboxWorker(threading.Thread):
+    """Háttérszál, amely addig üríti a sort, amíg van esedékes levél; utána
+    OUTBOX_POLL_INTERVAL-onként, vagy notify() hatására azonnal újra ránéz."""
+
+    def __init__(self, session_factory=SessionLocal, settings: SmtpSettings | None = None,
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL):
+        super().__init__(name="email-outbox", daemon=True)
+        self.session_factory = session_factory
+        self.settings = settings
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self, timeout: float | None = 10):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def run(self):
+        while not self._stopping.is_set():
+            processed = 0
+            db = self.session_factory()
+            try:
+                processed = deliver_batch(db, self.settings, self.batch_size)
+            except Exception as exc:  # a worker ne álljon le egy váratlan hiba miatt
+                print(f"Email outbox hiba: {exc}")
+                time.sleep(1)
+            finally:
+                db.close()
+            if not processed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+_worker: OutboxWorker | None = None
+
+
+def start_worker(settings: SmtpSettings | None = None) -> OutboxWorker | None:
+    global _worker
+    if EMAIL_OUTBOX_WORKER and _worker is None:
+        _worker = OutboxWorker(settings=settings)
+        _worker.start()
+    return _worker
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def notify_worker():
+    if _worker is not None:
+        _worker.notify()
+
+
+# Önálló futtatás (a backend mappából): python -m app.utils.outbox
+if __name__ == "__main__":
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    worker = OutboxWorker()
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(1)
+    except KeyboardInterrupt:
+        worker.stop()
@@ -0,0 +1,27 @@
+import base64
+import json
+from fastapi import HTTPException
+
+# ---- Keyset (cursor alapú) lapozás segédfüggvényei ----
+# A cursor egy átlátszatlan token: az utolsó visszaadott sor rendezési kulcsa
+# base64url kódolt JSON-ként. Így a kliens nem függ a belső felépítéstől.
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """Visszaadja a cursorban tárolt kulcsértékeket a megadott típusokra
+    konvertálva (pl. decode_cursor(token, str, int)); hibás token esetén 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return [t(v) for t, v in zip(types, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Jelszó hash-elés ----
+# A bcrypt CPU-igényes, ezért a kérésekből egy külön, korlátos méretű
+# process poolba küldjük, így nem foglalja az event loopot és a threadpoolt.
+# Ez a modul szándékosan könnyű: a pool worker folyamatai csak ezt importálják.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 esetén nincs process pool, a hash-elés a hívó folyamatban fut
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+# ha a BCRYPT_ROUNDS megváltozik, a régi hash-ek needs_update-et jeleznek,
+# és bejelentkezéskor újrahash-eljük őket
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_pw: str, hashed_pw: str) -> bool:
+    return pwd_context.verify(plain_pw, hashed_pw)
+
+
+def verify_and_update_password(plain_pw: str, hashed_pw: str):
+    """(érvényes-e, új hash vagy None) - új hash csak akkor, ha a költség megváltozott."""
+    return pwd_context.verify_and_update(plain_pw, hashed_pw)
+
+
+def get_hash_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None and PASSWORD_HASH_WORKERS > 0:
+            # spawn: a szerver szálait nem örökli a gyerekfolyamat
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def shutdown_hash_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def _run(func, *args):
+    executor = get_hash_executor()
+    if executor is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_pw: str, hashed_pw: str) -> bool:
+    return await _run(verify_password, plain_pw, hashed_pw)
+
+
+async def verify_and_update_password_async(plain_pw: str, hashed_pw: str):
+    return await _run(verify_and_update_password, plain_pw, hashed_pw)
@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from sqlalchemy import event
+from starlette.routing import Match
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---- Lekérdezés-keret és N+1 felismerés ----
+# A végpontok @query_budget(n)-nel deklarálják, legfeljebb hány SQL utasítást
+# futtathatnak egy kérésben. Ha ugyanaz az utasítás-alak (a paraméterektől
+# eltekintve) QUERY_REPEAT_THRESHOLD-szor vagy többször fut egy kérésben, az
+# szinte mindig egy ciklusban lazy betöltött kapcsolat (N+1).
+# QUERY_BUDGET_CHECK=1 (fejlesztéskor) esetén a metrics middleware minden kérés
+# után ellenőriz és kiírja a problémákat; a tesztek az assert_query_budget-et használják.
+
+QUERY_BUDGET_CHECK = os.getenv("QUERY_BUDGET_CHECK", "0").lower() in ("1", "true", "yes")
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+# IN (?, ?, ?) -> IN (?...): a kibontott listák hossza ne számítson külön alaknak
+_PARAM = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+
+
+def query_budget(max_queries: int):
+    """Végpont dekorátor: a kérésenként megengedett SQL utasítások száma."""
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def repeated_statements(statements, threshold: int = QUERY_REPEAT_THRESHOLD) -> dict:
+    """A threshold-nál többször futó utasítás-alakok és darabszámuk."""
+    counts = Counter(statement_shape(s) for s in statements)
+    return {shape: count for shape, count in counts.items() if count >= threshold}
+
+
+def find_problems(statements, budget: int | None, threshold: int = QUERY_REPEAT_THRESHOLD) -> list:
+    problems = []
+    if budget is not None and len(statements) > budget:
+        problems.append(f"{len(statements)} queries, budget is {budget}")
+    for shape, count in repeated_statements(statements, threshold).items():
+        problems.append(f"possible N+1: {count}x {shape[:200]}")
+    return problems
+
+
+def endpoint_budget(endpoint):
+    return getattr(endpoint, "query_budget", None)
+
+
+def report_request(method: str, route, statements: list):
+    """A metrics middleware hívja kérésenként, ha QUERY_BUDGET_CHECK be van kapcsolva."""
+    problems = find_problems(statements, endpoint_budget(getattr(route, "endpoint", None)))
+    if problems:
+        path = getattr(route, "path", "?")
+        print(f"Query budget ({method} {path}): " + "; ".join(problems))
+
+
+class CapturedQueries:
+    def __init__(self):
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # a TestClient a kérést másik szálon futtatja, ezért engine szinten figyelünk
+        with self._lock:
+            self.statements.append(statement)
+
+
+@contextmanager
+def capture_queries(bind=None):
+    """Az engine-en a blokk alatt futó összes SQL utasítás összegyűjtése."""
+    if bind is None:
+        from app.database import engine as bind
+    captured = CapturedQueries()
+    event.listen(bind, "before_cursor_execute", captured._record)
+    try:
+        yield captured
+    finally:
+        event.remove(bind, "before_cursor_execute", captured._record)
+
+
+def iter_routes(routes):
+    for route in routes:
+        # újabb FastAPI verziókban a beillesztett routerek nem lapulnak ki
+        nested = getattr(route, "original_router", None)
+        if nested is not None:
+            yield from iter_routes(nested.routes)
+        elif hasattr(route, "endpoint"):
+            yield route
+
+
+def _resolve_endpoint(app, method: str, path: str):
+    scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+    for route in iter_routes(app.router.routes):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.endpoint
+    return None
+
+
+def assert_query_budget(client, method: str, url: str, budget: int | None = None,
+                        threshold: int = QUERY_REPEAT_THRESHOLD, **kwargs):
+    """Teszt segéd: elküldi a kérést, és ellenőrzi, hogy a végpont a deklarált
+    (vagy a megadott) kereten belül maradt, és nincs benne ismétlődő lekérdezés."""
+    method = method.upper()
+    if budget is None:
+        budget = endpoint_budget(_resolve_endpoint(client.app, method, urlsplit(url).path))
+        assert budget is not None, f"{method} {url} has no @query_budget"
+
+    with capture_queries() as queries:
+        response = client.request(method, url, **kwargs)
+    problems = find_problems(queries.statements, budget, threshold)
+    assert not problems, f"{method} {url}: " + "; ".join(problems) + "\n" + "\n".join(queries.statements)
+    return response
@@ -0,0 +1,95 @@
+import re
+from sqlalchemy import column, func, inspect, literal_column, select, table, text
+from sqlalchemy.orm import Session
+from app import models
+
+# ---- Termékkeresés ----
+# SQLite alatt az FTS5 indexet használjuk (ékezetfüggetlen, prefix keresés,
+# bm25 szerinti rangsor). Más adatbázison visszaesünk az ILIKE szűrésre.
+
+products_fts = table("products_fts", column("rowid"))
+# MATCH és bm25() a tábla nevét várja oszlopként
+FTS_TABLE = literal_column("products_fts")
+# bm25 súlyok oszloponként: name, description, category
+RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_index(engine):
+    """Létrehozza az FTS indexet egy már létező adatbázisban is, és ha most
+    jött létre, feltölti a meglévő termékekből. A triggereket mindig lecseréli
+    (a CREATE TRIGGER IF NOT EXISTS a régi változatot megtartaná)."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if not inspect(conn).has_table("products"):
+            return
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'")
+        ).first()
+        for name in models.PRODUCT_SEARCH_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for stmt in models.PRODUCT_SEARCH_DDL:
+            conn.execute(text(stmt))
+        if not existed:
+            rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def _match_terms(value: str, columns: str | None = None) -> list[str]:
+    # minden szóból prefix-kifejezés lesz; az idézőjel miatt az FTS5
+    # operátorok (AND, NEAR, *, ...) nem értelmeződnek a felhasználói inputban
+    terms = [f'"{token}"*' for token in _TOKEN_RE.findall(value)]
+    if columns:
+        terms = [f"{columns} : {term}" for term in terms]
+    return terms
+
+
+def build_match_query(q: str | None = None, name: str | None = None, category: str | None = None) -> str:
+    terms = []
+    if q:
+        terms += _match_terms(q)
+    if name:
+        terms += _match_terms(name, "name")
+    if category:
+        terms += _match_terms(category, "category")
+    return " AND ".join(terms)
+
+
+def build_search_statement(dialect: str, q: str | None, name: str | None, category: str | None, limit: int):
+    """A keresés SELECT utasítása; sync és async sessionnel is futtatható."""
+    stmt = select(models.Product)
+
+    if dialect != "sqlite":
+        for column, value in ((models.Product.name, name or q), (models.Product.category, category)):
+            if value:
+                stmt = stmt.where(column.ilike(f"%{value}%"))
+        return stmt.order_by(models.Product.product_id).limit(limit)
+
+    match = build_match_query(q, name, category)
+    if not match:
+        return stmt.order_by(models.Product.product_id).limit(limit)
+
+    # előbb csak az FTS táblán rangsorolunk és vágunk, a termék sorokat
+    # már csak a találati oldalhoz olvassuk be
+    rank = func.bm25(FTS_TABLE, *RANK_WEIGHTS).label("rank")
+    hits = (
+        select(products_fts.c.rowid, rank)
+        .where(FTS_TABLE.op("MATCH")(match))
+        .order_by(rank)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        stmt.join(hits, hits.c.rowid == models.Product.product_id)
+        .order_by(hits.c.rank, models.Product.product_id)
+    )
+
+
+def search_products(db: Session, q: str | None, name: str | None, category: str | None, limit: int):
+    stmt = build_search_statement(db.get_bind().dialect.name, q, name, category, limit)
+    return db.scalars(stmt).all()
@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from app import models
 from app.database import get_db
 from sqlalchemy.orm import Session
+from app.utils.passwords import hash_password, verify_password, pwd_context
+from app.utils.cache import TTLCache
 from dotenv import load_dotenv
+import hashlib
 import os
+import time
 
 load_dotenv()
 
@@ -15,15 +18,17 @@ SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-
+# ---- Hitelesítési cache ----
+# token hash -> user_id (a JWT dekódolás megspórolására), user_id -> User.
+# A user módosítása/törlése explicit invalidálja; a TTL több worker esetén
+# korlátozza, meddig látható egy másik folyamatban történt változás.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
+token_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
 
-def verify_password(plain_pw, hashed_pw):
-    return pwd_context.verify(plain_pw, hashed_pw)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -35,8 +40,16 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 def get_password_hash(password: str):
     return hash_password(password)
 
-# --- Tokenből user kinyerése ---
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate(user_id)
+
+
+def _decode_user_id(token: str) -> int:
+    key = hashlib.sha256(token.encode()).digest()
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
@@ -45,9 +58,28 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    # lejárt tokent ne szolgáljunk ki a cache-ből
+    if payload.get("exp"):
+        token_cache.set(key, user_id, ttl=payload["exp"] - time.time())
+    return user_id
+
+
+# --- Tokenből user kinyerése ---
+# A visszaadott User a sessionről leválasztott példány: csak az oszlop
+# attribútumai olvashatók, kapcsolatai nem töltődnek be.
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    user_id = _decode_user_id(token)
+
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    generation = principal_cache.generation
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    db.expunge(user)
+    principal_cache.set(user_id, user, generation=generation)
     return user
 
 
@@ -0,0 +1,168 @@
+import sys
+from datetime import date
+from sqlalchemy import Date, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+from app import models
+from app.utils.upsert import upsert_insert
+
+# ---- Rendelés statisztika rollup karbantartása ----
+# Az order_stats_daily sorait a rendelés útvonalak inkrementálisan frissítik;
+# a heti/havi/éves nézetek a napi sorokból állnak elő, így a lekérdezés ideje
+# a napok számától függ, nem a rendelésekétől.
+
+# SQLite strftime formátumok; a MySQL DATE_FORMAT ugyanezeket érti
+# (a hét ott %u: hétfővel kezdődő, 00-53, mint az SQLite %W)
+PERIOD_FORMATS = {
+    "daily": "%Y-%m-%d",
+    "weekly": "%Y-%W",
+    "monthly": "%Y-%m",
+    "yearly": "%Y",
+}
+# PostgreSQL to_char megfelelői (ott a hét ISO hét)
+PG_PERIOD_FORMATS = {
+    "daily": "YYYY-MM-DD",
+    "weekly": "IYYY-IW",
+    "monthly": "YYYY-MM",
+    "yearly": "YYYY",
+}
+
+
+def _period_label(db: Session, interval: str, day):
+    """Időszak címke SQL-ben; SQLite, PostgreSQL és MySQL / MariaDB támogatott."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.to_char(day, PG_PERIOD_FORMATS[interval])
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(day, PERIOD_FORMATS[interval].replace("%W", "%u"))
+    if dialect == "sqlite":
+        return func.strftime(PERIOD_FORMATS[interval], day)
+    raise RuntimeError(f"Period statistics are not supported on {dialect}")
+
+
+def _add(db: Session, day: date, status: models.OrderStatus, orders: int, revenue: float):
+    table = models.OrderStatsDaily.__table__
+    stmt = upsert_insert(db, table)
+    if stmt is not None:
+        stmt = stmt.values(day=day, status=status, orders=orders, revenue=revenue)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.status],
+            set_={"orders": table.c.orders + stmt.excluded.orders, "revenue": table.c.revenue + stmt.excluded.revenue},
+        ))
+        return
+
+    updated = db.execute(
+        update(table)
+        .where(table.c.day == day, table.c.status == status)
+        .values(orders=table.c.orders + orders, revenue=table.c.revenue + revenue)
+    ).rowcount
+    if not updated:
+        db.execute(insert(table).values(day=day, status=status, orders=orders, revenue=revenue))
+
+
+def record_order(db: Session, order: models.Order):
+    """Új rendelés (flush után, hogy created_at és status már ki legyen töltve)."""
+    _add(db, order.created_at.date(), order.status, 1, order.total_price or 0)
+
+
+def move_order_status(db: Session, order: models.Order, old_status: models.OrderStatus, new_status: models.OrderStatus):
+    day = order.created_at.date()
+    _add(db, day, old_status, -1, -(order.total_price or 0))
+    _add(db, day, new_status, 1, order.total_price or 0)
+
+
+def remove_order(db: Session, order: models.Order):
+    _add(db, order.created_at.date(), order.status, -1, -(order.total_price or 0))
+
+
+def period_stats(db: Session, interval: str, start: date, end: date) -> list:
+    """A napi sorokból összesíti a kért intervallumot (daily/weekly/monthly/yearly).
+
+    Az összegzés SQL-ben fut (időszak × státusz csoportok); Pythonban csak az
+    időszakonkénti státusz bontás áll össze.
+    """
+    stats = models.OrderStatsDaily
+    period = _period_label(db, interval, stats.day).label("period")
+    rows = (
+        db.query(period, stats.status, func.sum(stats.orders).label("orders"), func.sum(stats.revenue).label("revenue"))
+        .filter(stats.day.between(start, end), stats.orders != 0)
+        .group_by(period, stats.status)
+        .order_by(period)
+        .all()
+    )
+
+    periods = {}
+    for row in rows:
+        entry = periods.setdefault(row.period, {"period": row.period, "orders": 0, "revenue": 0.0, "statuses": {}})
+        entry["orders"] += row.orders
+        entry["revenue"] += row.revenue
+        entry["statuses"][row.status.value] = row.orders
+    return list(periods.values())
+
+
+def _rollup_source(db: Session):
+    """A rendelések napi × státusz összesítése egy GROUP BY-jal."""
+    orders = models.Order.__table__
+    if db.get_bind().dialect.name == "sqlite":
+        day = func.date(orders.c.created_at)
+    else:
+        day = cast(orders.c.created_at, Date)
+    status = func.coalesce(orders.c.status, literal(models.OrderStatus.pending, orders.c.status.type))
+    return (
+        select(day, status, func.count(), func.coalesce(func.sum(orders.c.total_price), 0))
+        .where(orders.c.created_at.is_not(None))
+        .group_by(day, status)
+    )
+
+
+_ROLLUP_COLUMNS = ["day", "status", "orders", "revenue"]
+
+
+def backfill(db: Session) -> int:
+    """Újraépíti a rollup táblát az orders táblából.
+
+    Törlés és INSERT ... SELECT egy tranzakcióban: közben beérkező rendelés
+    nem veszhet el két lépés között.
+    """
+    table = models.OrderStatsDaily.__table__
+    db.execute(delete(table))
+    rows = db.execute(insert(table).from_select(_ROLLUP_COLUMNS, _rollup_source(db))).rowcount
+    db.commit()
+    return rows
+
+
+def backfill_if_empty(db: Session) -> int:
+    """Régi adatbázis első indításakor: van rendelés, de még nincs rollup.
+
+    Minden induláskor fut, akár több worker egyszerre is: a feltöltés egyetlen
+    feltételes INSERT ... SELECT (csak üres táblába), ütközésnél nem ír semmit,
+    így a párhuzamos indítások nem duplikálnak.
+    """
+    table = models.OrderStatsDaily.__table__
+    if db.query(models.OrderStatsDaily.day).first() is not None:
+        return 0
+    source = _rollup_source(db).where(~exists().where(table.c.day.is_not(None)))
+    stmt = upsert_insert(db, table)
+    if stmt is not None:
+        stmt = stmt.from_select(_ROLLUP_COLUMNS, source).on_conflict_do_nothing(
+            index_elements=[table.c.day, table.c.status])
+    else:
+        stmt = insert(table).from_select(_ROLLUP_COLUMNS, source)
+    rows = db.execute(stmt).rowcount
+    db.commit()
+    return rows
+
+
+# Használat (a backend mappából): python -m app.utils.stats_rollup --backfill
+if __name__ == "__main__":
+    from app.database import SessionLocal, Base, engine
+
+    if "--backfill" not in sys.argv:
+        print("Használat: python -m app.utils.stats_rollup --backfill")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"order_stats_daily újraépítve: {backfill(session)} sor")
+    finally:
+        session.close()
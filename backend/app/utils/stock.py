@@ -0,0 +1,93 @@
+from collections import defaultdict
+from fastapi import HTTPException
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from app import models
+
+# ---- Készletfoglalás ----
+# A Product.stock_quantity a szabad készlet. Foglaláskor feltételes UPDATE-tel
+# csökkentjük (csak ha van elég), így nincs read-modify-write verseny és
+# nem kell zárolni a sorokat. Visszaadáskor (lemondás) növeljük.
+# Az összes termék egyetlen executemany UPDATE-tel megy, nem termékenként
+# külön utasítással; a módosított sorok összegéből látszik, hogy mindegyik sikerült-e.
+
+_products = models.Product.__table__
+
+# a még foglaló rendelés állapotok (az inventory triggerek is ezt használják)
+RESERVING_STATUSES = models.RESERVING_STATUSES
+
+_RESERVE = (
+    update(_products)
+    .where(_products.c.product_id == bindparam("b_product_id"), _products.c.stock_quantity >= bindparam("b_quantity"))
+    .values(stock_quantity=_products.c.stock_quantity - bindparam("b_quantity"))
+)
+_RELEASE = (
+    update(_products)
+    .where(_products.c.product_id == bindparam("b_product_id"))
+    .values(stock_quantity=_products.c.stock_quantity + bindparam("b_quantity"))
+)
+
+
+def _quantities_by_product(items) -> dict:
+    totals = defaultdict(float)
+    for item in items:
+        totals[item.product_id] += item.quantity
+    # mindig azonos sorrendben módosítunk, így párhuzamos foglalások nem akadnak össze
+    return dict(sorted(totals.items()))
+
+
+def _params(quantities: dict) -> list:
+    return [{"b_product_id": product_id, "b_quantity": quantity} for product_id, quantity in quantities.items()]
+
+
+def reserve_stock(db: Session, items):
+    """Lefoglalja a tételek (product_id, quantity) készletét a futó tranzakcióban.
+
+    Ha bármelyik termékből nincs elég, visszagörgeti a tranzakciót és 409-et dob
+    a hiányzó termékek listájával.
+    """
+    quantities = _quantities_by_product(items)
+    if not quantities:
+        return
+
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        reserved = db.execute(_RESERVE, _params(quantities)).rowcount
+        if reserved == len(quantities):
+            return
+        failed = None  # a visszagörgetés után a friss készletből derül ki
+    else:
+        # a driver executemany-nél nem ad megbízható rowcount-ot: termékenként
+        failed = [
+            product_id for product_id, quantity in quantities.items()
+            if not db.execute(_RESERVE, {"b_product_id": product_id, "b_quantity": quantity}).rowcount
+        ]
+        if not failed:
+            return
+
+    db.rollback()
+    available = dict(
+        db.query(models.Product.product_id, models.Product.stock_quantity)
+        .filter(models.Product.product_id.in_(list(quantities)))
+        .all()
+    )
+    if failed is None:
+        failed = [p for p, quantity in quantities.items() if (available.get(p) or 0) < quantity]
+        # közben egy másik tranzakció visszaadott készletet: mindet jelezzük
+        failed = failed or list(quantities)
+    conflicts = [
+        {"product_id": product_id, "requested": quantities[product_id], "available": available.get(product_id, 0) or 0}
+        for product_id in failed
+    ]
+    raise HTTPException(status_code=409, detail={"message": "Insufficient stock", "products": conflicts})
+
+
+def release_stock(db: Session, order_id: int):
+    """Visszaadja egy rendelés tételeinek készletét (pl. lemondáskor)."""
+    items = (
+        db.query(models.OrderItem.product_id, models.OrderItem.quantity)
+        .filter(models.OrderItem.order_id == order_id)
+        .all()
+    )
+    quantities = _quantities_by_product(items)
+    if quantities:
+        db.execute(_RELEASE, _params(quantities))
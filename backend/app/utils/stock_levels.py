@@ -0,0 +1,145 @@
+import sys
+from datetime import datetime
+from sqlalchemy import delete, exists, func, insert, inspect, literal, or_, select, text, update, DateTime
+from sqlalchemy.orm import Session
+from app import models
+from app.utils.cache import catalog_cache
+from app.utils.upsert import upsert_insert
+
+# ---- Készlet összesítő (product_stock) és egyeztetés ----
+# A product_stock termékenként a raktárhelyek összegét tartja, így a teljes
+# készlet egy elsődleges kulcsos olvasás, a raktárhelyenkénti bontás pedig az
+# inventory.product_id indexén megy. SQLite és PostgreSQL alatt az inventory
+# triggerei (models.INVENTORY_STOCK_DDL / INVENTORY_STOCK_PG_DDL) tartják karban,
+# ugyanabban a tranzakcióban; minden más esetben (régi adatbázis, más dialektus,
+# kézi javítás) a reconcile() egy menetben, halmazműveletekkel
+# javítja az eltérést az egész katalógusra.
+
+_inventory = models.Inventory.__table__
+_stock = models.ProductStock.__table__
+_products = models.Product.__table__
+
+# a lebegőpontos összegek kerekítési hibája nem számít eltérésnek
+TOLERANCE = 1e-6
+
+
+def ensure_stock_triggers(engine):
+    """A triggerek létrehozása egy már létező (SQLite / PostgreSQL) adatbázisban is.
+
+    A régi változatú triggereket lecseréli (a CREATE TRIGGER IF NOT EXISTS
+    magától nem frissítené őket)."""
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        return
+    with engine.begin() as conn:
+        if not inspect(conn).has_table("inventory"):
+            return
+        if engine.dialect.name == "postgresql":
+            for stmt in models.INVENTORY_STOCK_PG_DDL:
+                conn.exec_driver_sql(stmt)
+            return
+        for name in models.INVENTORY_STOCK_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for stmt in models.INVENTORY_STOCK_DDL:
+            conn.execute(text(stmt))
+
+
+def _inventory_total(product_id_column):
+    return func.coalesce(
+        select(func.sum(_inventory.c.quantity)).where(_inventory.c.product_id == product_id_column).scalar_subquery(),
+        0,
+    )
+
+
+def _differs(a, b):
+    return func.abs(a - b) > TOLERANCE
+
+
+def reconcile(db: Session) -> dict:
+    """Az összesítő újraszámolása az inventory táblából, egy tranzakcióban.
+
+    1. Ahol a tárolt összeg eltér a valóditól, a különbséget a products.stock_quantity-re
+       is rávezetjük (a rendelések foglalása így megmarad).
+    2. A product_stock sorai a valódi összeget és raktárhely-számot kapják.
+    3. A raktárhely nélküli termékek összesítő sora törlődik.
+    Az összesítő nélküli termékek szabad készletéhez nem nyúlunk (nincs mihez mérni).
+    """
+    actual = _inventory_total(_stock.c.product_id)
+    corrected = db.execute(
+        update(_products)
+        .where(_products.c.product_id == _stock.c.product_id, _differs(actual, _stock.c.quantity))
+        .values(stock_quantity=func.coalesce(_products.c.stock_quantity, 0) + actual - _stock.c.quantity)
+    ).rowcount
+
+    columns = ["product_id", "quantity", "locations", "updated_at"]
+    source = (
+        select(_inventory.c.product_id, func.coalesce(func.sum(_inventory.c.quantity), 0), func.count(),
+               literal(datetime.utcnow(), DateTime))
+        .where(_inventory.c.product_id.is_not(None))
+        .group_by(_inventory.c.product_id)
+    )
+    stmt = upsert_insert(db, _stock)
+    if stmt is not None:
+        stmt = stmt.from_select(columns, source)
+        excluded = stmt.excluded
+        refreshed = db.execute(stmt.on_conflict_do_update(
+            index_elements=[_stock.c.product_id],
+            set_={"quantity": excluded.quantity, "locations": excluded.locations, "updated_at": excluded.updated_at},
+            where=or_(_differs(_stock.c.quantity, excluded.quantity), _stock.c.locations != excluded.locations),
+        )).rowcount
+    else:
+        db.execute(delete(_stock))
+        refreshed = db.execute(insert(_stock).from_select(columns, source)).rowcount
+
+    removed = db.execute(
+        delete(_stock).where(~exists().where(_inventory.c.product_id == _stock.c.product_id))
+    ).rowcount
+    db.commit()
+    if corrected:
+        catalog_cache.bump()
+    return {"products_corrected": corrected, "aggregates_refreshed": refreshed, "aggregates_removed": removed}
+
+
+def reconcile_if_empty(db: Session):
+    """Régi adatbázis első indításakor: van raktárbejegyzés, de még nincs összesítő."""
+    if db.query(models.ProductStock.product_id).first() is None and db.query(models.Inventory.inventory_id).first() is not None:
+        reconcile(db)
+
+
+def stock_level(db: Session, product_id: int) -> dict | None:
+    """Egy termék teljes és raktárhelyenkénti készlete; None, ha nincs ilyen termék."""
+    row = db.execute(
+        select(_products.c.stock_quantity, _stock.c.quantity, _stock.c.updated_at)
+        .select_from(_products.outerjoin(_stock, _stock.c.product_id == _products.c.product_id))
+        .where(_products.c.product_id == product_id)
+    ).first()
+    if row is None:
+        return None
+    locations = db.execute(
+        select(_inventory.c.inventory_id, _inventory.c.location, _inventory.c.quantity)
+        .where(_inventory.c.product_id == product_id)
+        .order_by(_inventory.c.inventory_id)
+    ).all()
+    return {
+        "product_id": product_id,
+        "quantity": row.quantity or 0,
+        "available": row.stock_quantity or 0,
+        "updated_at": row.updated_at,
+        "locations": [location._asdict() for location in locations],
+    }
+
+
+# Használat (a backend mappából): python -m app.utils.stock_levels --reconcile
+if __name__ == "__main__":
+    from app.database import SessionLocal, Base, engine
+
+    if "--reconcile" not in sys.argv:
+        print("Használat: python -m app.utils.stock_levels --reconcile")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_stock_triggers(engine)
+    session = SessionLocal()
+    try:
+        print(f"Készlet egyeztetve: {reconcile(session)}")
+    finally:
+        session.close()
@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+# ---- Dialektusfüggő INSERT ... ON CONFLICT ----
+# SQLite és PostgreSQL alatt natív upsert; más adatbázison None, ekkor a hívó
+# UPDATE-tel, majd szükség esetén INSERT-tel oldja meg.
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def upsert_insert(db, table):
+    insert_fn = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    return insert_fn(table) if insert_fn else None
@@ -0,0 +1,94 @@
+"""
+Értékesítési elemzés (/stats/analytics) mérése sok rendelési tételen.
+
+Ideiglenes SQLite adatbázisba N order_items sort tölt (rendelésenként 1-20
+tétel), majd lefuttatja a teljes elemzést, és kiírja az időt, a Python heap
+csúcsát (tracemalloc, a numpy/pandas puffereket is beleértve) és az RSS
+növekedését. Az RSS tartalmazza az SQLite mmap által leképezett fájllapokat is.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_analytics --items 10000000
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, engine, SessionLocal
+from app import models
+from app.utils import analytics, stats_rollup
+
+CATEGORIES = ["beltéri festék", "kültéri festék", "fa és fém", "eszköz", "kiegészítő"]
+
+
+def load(items: int, products: int, batch: int = 100_000):
+    rnd = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert().values(name="bench", email="bench@example.com", password_hash="x"))
+        conn.execute(models.Product.__table__.insert(), [
+            {"name": f"Termék {i}", "category": CATEGORIES[i % len(CATEGORIES)], "price": 500 + i % 5000, "stock_quantity": 0}
+            for i in range(products)
+        ])
+
+    start = datetime(2023, 1, 1)
+    order_id, written = 0, 0
+    while written < items:
+        orders, order_items = [], []
+        while len(order_items) < batch and written + len(order_items) < items:
+            order_id += 1
+            lines = min(rnd.randint(1, 20), items - written - len(order_items))
+            total = 0.0
+            for _ in range(lines):
+                price = rnd.randint(500, 20000)
+                quantity = rnd.randint(1, 5)
+                total += price * quantity
+                order_items.append({"order_id": order_id, "product_id": rnd.randint(1, products),
+                                    "quantity": quantity, "unit_price": price})
+            orders.append({"order_id": order_id, "user_id": 1, "status": models.OrderStatus.completed,
+                           "total_price": total, "created_at": start + timedelta(minutes=order_id % 525_600)})
+        with engine.begin() as conn:
+            conn.execute(models.Order.__table__.insert(), orders)
+            conn.execute(models.OrderItem.__table__.insert(), order_items)
+        written += len(order_items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=analytics.ANALYTICS_CHUNK_SIZE)
+    args = parser.parse_args()
+    analytics.ANALYTICS_CHUNK_SIZE = args.chunk_size
+
+    Base.metadata.create_all(bind=engine)
+    t0 = time.perf_counter()
+    load(args.items, args.products)
+    db = SessionLocal()
+    stats_rollup.backfill(db)
+    print(f"betöltés: {args.items} tétel, {time.perf_counter() - t0:.1f} s")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = analytics.sales_analytics(db, datetime(2022, 1, 1), datetime(2025, 1, 1), top=10)
+    elapsed = time.perf_counter() - t0
+    heap_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    db.close()
+
+    print(f"elemzés: {elapsed:.2f} s ({args.items / elapsed:,.0f} tétel/s), chunk={args.chunk_size}")
+    print(f"heap csúcs: {heap_peak / 2**20:.0f} MB, RSS növekedés (mmap-pel együtt): {(rss_after - rss_before) / 1024:.0f} MB")
+    print(f"rendelések: {result['order_count']}, AOV: {result['average_order_value']:.0f}, "
+          f"top termék: {result['top_by_revenue'][0]['name']}")
+
+
+if __name__ == "__main__":
+    main()
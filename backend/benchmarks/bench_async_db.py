@@ -0,0 +1,95 @@
+"""
+Sync vs async adatbázis-elérés összehasonlítása a katalógus végpontokon.
+
+Mindkét módot külön folyamatban futtatja (DB_ASYNC=0 / DB_ASYNC=1), a
+katalógus cache kikapcsolásával, és N párhuzamos kliens átviteli sebességét méri
+in-process ASGI transporttal.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_async_db --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def run_worker(args):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import httpx
+    from app.main import app
+    from app import database
+    from app.database import Base, engine
+    from app import models
+    from app.utils.search import ensure_search_index
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    rnd = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [
+            {"name": f"Festék {i} {rnd.choice(['matt', 'fényes', 'selyem'])}", "price": 1000 + i, "stock_quantity": 10}
+            for i in range(args.products)
+        ])
+
+    paths = [f"/products/{rnd.randint(1, args.products)}" for _ in range(args.requests // 2)]
+    paths += [f"/products/search/?q={rnd.choice(['matt', 'fenyes', 'selyem'])}&limit=20" for _ in range(args.requests // 2)]
+    rnd.shuffle(paths)
+
+    async def main():
+        queue = asyncio.Queue()
+        for p in paths:
+            queue.put_nowait(p)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def user():
+                while not queue.empty():
+                    res = await client.get(queue.get_nowait())
+                    assert res.status_code == 200, res.text
+
+            start = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+        return elapsed
+
+    elapsed = asyncio.run(main())
+    print(json.dumps({"requests": len(paths), "seconds": elapsed, "rps": len(paths) / elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+
+    for mode in ("0", "1"):
+        env = {
+            **os.environ,
+            "DB_ASYNC": mode,
+            "CATALOG_CACHE_SIZE": "0",
+            "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+        }
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_async_db", "--worker",
+             "--products", str(args.products), "--requests", str(args.requests),
+             "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(out)
+        print(f"DB_ASYNC={mode}: {result['requests']} kérés {result['seconds']:.2f} s alatt, {result['rps']:.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
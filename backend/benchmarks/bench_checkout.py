@@ -0,0 +1,68 @@
+"""
+Checkout (POST /orders/) késleltetése a kosár méretének függvényében.
+
+Kosárméretenként N kosarat készít elő közvetlen INSERT-ekkel, majd mindegyiket
+megrendeli az API-n keresztül, és a p50/p95/p99 időket írja ki.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_checkout --sizes 1 10 50 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import engine
+from app import models
+from app.utils.security import create_access_token
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--orders", type=int, default=200, help="rendelések száma kosárméretenként")
+    parser.add_argument("--products", type=int, default=1000)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        with engine.begin() as conn:
+            conn.execute(models.Product.__table__.insert(), [
+                {"name": f"Festék {i}", "price": 1000 + i, "stock_quantity": 1_000_000} for i in range(args.products)
+            ])
+            conn.execute(models.User.__table__.insert().values(name="bench", email="bench@example.com", password_hash="x"))
+        headers = {"Authorization": "Bearer " + create_access_token({"user_id": 1, "role": "user"})}
+
+        for size in args.sizes:
+            with engine.begin() as conn:
+                cart_ids = [
+                    conn.execute(models.Cart.__table__.insert().values(user_id=1, ordered=False)).inserted_primary_key[0]
+                    for _ in range(args.orders)
+                ]
+                conn.execute(models.CartItem.__table__.insert(), [
+                    {"cart_id": cart_id, "product_id": (cart_id * 7 + i) % args.products + 1, "quantity": 1 + i % 3}
+                    for cart_id in cart_ids for i in range(size)
+                ])
+
+            timings = []
+            for cart_id in cart_ids:
+                start = time.perf_counter()
+                res = client.post("/orders/", json={"user_id": 1, "cart_id": cart_id}, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert res.status_code == 200, res.text
+
+            print(f"kosár {size:4d} tétel: p50={percentile(timings, 50):6.2f} ms  "
+                  f"p95={percentile(timings, 95):6.2f} ms  p99={percentile(timings, 99):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
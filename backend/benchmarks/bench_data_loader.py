@@ -0,0 +1,78 @@
+"""
+DatabaseLoader tömeges betöltésének mérése.
+
+Ideiglenes könyvtárba generál egy termék CSV-t, egy termék JSON tömböt és egy
+felhasználó JSON-t, majd betölti őket egy ideiglenes SQLite adatbázisba.
+Kiírja a sor/s értéket és a Python heap csúcsát (tracemalloc). A felhasználók
+ideje a BCRYPT_ROUNDS-tól és a PASSWORD_HASH_WORKERS-től függ.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_data_loader --products 1000000 --users 100000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, engine
+from app.data_loader import DatabaseLoader
+from app.utils.passwords import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, shutdown_hash_executor
+
+
+def write_products_csv(path, n):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "description", "category", "price", "stock_quantity", "unit"])
+        for i in range(n):
+            writer.writerow([f"Termék {i}", "Vízbázisú beltéri falfesték", "beltéri festék", 1000 + i % 9000, i % 50, "l"])
+
+
+def write_json(path, n, make):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(n):
+            f.write(("," if i else "") + json.dumps(make(i), ensure_ascii=False) + "\n")
+        f.write("]\n")
+
+
+def measure(label, n, path, entity):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with DatabaseLoader() as loader:
+        ok = loader.load_data_from_file(path, entity)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<22} {'OK ' if ok else 'HIBA'} {elapsed:7.2f} s  {n / elapsed:>10,.0f} sor/s  heap csúcs: {peak / 2**20:5.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    products_csv = os.path.join(_tmp, "products.csv")
+    products_json = os.path.join(_tmp, "products.json")
+    users_json = os.path.join(_tmp, "users.json")
+    write_products_csv(products_csv, args.products)
+    write_json(products_json, args.products, lambda i: {"name": f"Termék {i}", "category": "kültéri festék", "price": 2000 + i % 5000})
+    write_json(users_json, args.users, lambda i: {"name": f"Vevő {i}", "email": f"vevo{i}@example.com", "password": f"jelszo{i}"})
+
+    measure("termékek (CSV)", args.products, products_csv, "products")
+    measure("termékek (JSON)", args.products, products_json, "products")
+    print(f"bcrypt rounds={BCRYPT_ROUNDS}, hash workerek={PASSWORD_HASH_WORKERS}")
+    measure("felhasználók (JSON)", args.users, users_json, "users")
+    shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    main()
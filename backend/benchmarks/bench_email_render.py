@@ -0,0 +1,90 @@
+"""
+Rendelés-visszaigazoló email renderelésének mérése.
+
+Ideiglenes SQLite adatbázisba N darab, egyenként --items tételes rendelést ír,
+majd összeveti a régi megoldást (f-string összefűzés, tételenként lazy
+betöltött item.product) az előre lefordított Jinja2 sablonnal és az egy
+joinolt lekérdezéssel betöltött bemenetekkel. Kiírja a rendelésenkénti
+időt és a lekérdezések számát, egyenként és kötegben renderelve.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_email_render --orders 200 --items 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app.database import Base, engine, SessionLocal
+from app import models
+from app.utils.email_templates import render_order_completed_batch
+
+
+def legacy_render(db, order_id):
+    # a korábbi build_completed_order_html lényege: tételenként lazy item.product
+    order = db.get(models.Order, order_id)
+    user = db.get(models.User, order.user_id)
+    items = db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).all()
+    items_html = ""
+    for item in items:
+        items_html += f"""
+        <tr>
+            <td style="padding: 8px; border-bottom: 1px solid #ddd;">{item.product.name}</td>
+            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:center;">{item.quantity} db</td>
+            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:right;">{item.unit_price:.0f} Ft</td>
+        </tr>
+        """
+    return f"<p>Kedves {user.name}, #{order_id}</p><table>{items_html}</table><h3>Összesen: {order.total_price:.0f} Ft</h3>"
+
+
+def load(orders: int, items: int):
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert().values(name="bench", email="bench@example.com", password_hash="x"))
+        conn.execute(models.Product.__table__.insert(), [
+            {"name": f"Termék {i}", "price": 1000 + i, "stock_quantity": 0} for i in range(orders * items)
+        ])
+        conn.execute(models.Order.__table__.insert(), [
+            {"order_id": o + 1, "user_id": 1, "total_price": 0} for o in range(orders)
+        ])
+        # minden tétel más termék, így az identity map nem takarja el az N+1-et
+        conn.execute(models.OrderItem.__table__.insert(), [
+            {"order_id": o + 1, "product_id": o * items + i + 1, "quantity": 1, "unit_price": 1000 + i}
+            for o in range(orders) for i in range(items)
+        ])
+
+
+def measure(label, orders, fn):
+    queries = []
+    listener = lambda *args: queries.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    db = SessionLocal()
+    t0 = time.perf_counter()
+    fn(db)
+    elapsed = time.perf_counter() - t0
+    db.close()
+    event.remove(engine, "before_cursor_execute", listener)
+    print(f"{label:<28} {elapsed / orders * 1000:8.3f} ms/rendelés  {len(queries) / orders:7.3f} lekérdezés/rendelés")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--items", type=int, default=100)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    load(args.orders, args.items)
+    ids = list(range(1, args.orders + 1))
+    print(f"{args.orders} rendelés, rendelésenként {args.items} tétel")
+
+    measure("régi (f-string, lazy load)", args.orders, lambda db: [legacy_render(db, i) for i in ids])
+    measure("sablon, egyenként", args.orders, lambda db: [render_order_completed_batch(db, [i]) for i in ids])
+    measure("sablon, kötegben", args.orders, lambda db: render_order_completed_batch(db, ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Tömeges termék import (POST /products/import) áteresztőképessége.
+
+Ideiglenes CSV árlistát generál, és kétszer tölti fel az API-n keresztül: először
+minden sor új termék (INSERT), másodszor ugyanazok a cikkszámok új árral (UPDATE).
+Minden 1000. sor hibás (nem szám ár), így a hibajelentés költsége is benne van.
+Kiírja a teljes kérés idejét és a sor/s értéket.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_product_import --rows 100000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import engine
+from app import models
+from app.data_loader import PRODUCT_IMPORT_BATCH_SIZE
+from app.utils.security import create_access_token
+
+
+def write_price_list(path, n, price_offset):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sku", "name", "description", "category", "price", "stock_quantity", "unit"])
+        for i in range(n):
+            price = "n/a" if i % 1000 == 999 else 1000 + (i + price_offset) % 9000
+            writer.writerow([f"SKU-{i:08d}", f"Termék {i}", "Vízbázisú beltéri falfesték", "beltéri festék", price, i % 50, "l"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        with engine.begin() as conn:
+            conn.execute(models.User.__table__.insert().values(
+                name="bench", email="bench@example.com", password_hash="x", role=models.UserRole.admin))
+        headers = {"Authorization": "Bearer " + create_access_token({"user_id": 1, "role": "admin"})}
+
+        print(f"{args.rows:,} sor, köteg: {PRODUCT_IMPORT_BATCH_SIZE}")
+        for label, offset in (("új termékek", 0), ("árfrissítés", 7)):
+            path = os.path.join(_tmp, f"arlista-{offset}.csv")
+            write_price_list(path, args.rows, offset)
+            with open(path, "rb") as f:
+                start = time.perf_counter()
+                res = client.post("/products/import", files={"file": ("arlista.csv", f, "text/csv")}, headers=headers)
+                elapsed = time.perf_counter() - start
+            report = res.json()
+            print(f"{label:<14} {res.status_code} {elapsed:7.2f} s  {args.rows / elapsed:>10,.0f} sor/s "
+                  f"(importálva: {report['imported']:,}, hibás: {report['failed']:,}, "
+                  f"import: {report['rows_per_second']:,.0f} sor/s)")
+
+
+if __name__ == "__main__":
+    main()
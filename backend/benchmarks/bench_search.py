@@ -0,0 +1,71 @@
+"""
+Termékkeresés mérése: N termék betöltése egy ideiglenes SQLite adatbázisba,
+majd néhány tipikus keresés átlagos és p95 ideje.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_search --products 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, engine, SessionLocal
+from app import models
+from app.utils.search import search_products
+
+TYPES = ["falfesték", "zománc", "alapozó", "lazúr", "hígító", "ecset", "henger", "glett", "szalag", "gipsz",
+         "fugázó", "tapéta", "ragasztó", "vakolat", "betonfesték", "padlófesték", "radiátorfesték", "kréta"]
+COLORS = ["fehér", "szürke", "antracit", "bézs", "vanília", "homok", "olíva", "türkiz", "bordó", "mályva",
+          "okker", "grafit", "mentazöld", "égszínkék", "terrakotta", "pisztácia", "levendula", "barack"]
+FINISH = ["matt", "selyemfényű", "fényes", "vízbázisú", "oldószeres", "beltéri", "kültéri", "prémium"]
+SYLLABLES = ["ba", "ko", "ri", "lu", "me", "sza", "dé", "vo", "ti", "né", "gra", "pol", "ex", "tor", "fix"]
+CATEGORIES = ["beltéri festék", "kültéri festék", "fa és fém", "eszköz", "kiegészítő", "szigetelés"]
+QUERIES = [("falfestek antra", None, None), ("vizbaz lazur", None, None), (None, "zomanc bord", None),
+           (None, "tur", "kulteri")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(42)
+    brands = ["".join(rnd.choice(SYLLABLES) for _ in range(3)).capitalize() for _ in range(400)]
+    rows = [
+        {
+            "name": f"{rnd.choice(brands)} {rnd.choice(TYPES)} {rnd.choice(COLORS)} {rnd.randint(1, 20)}L",
+            "description": " ".join(rnd.sample(FINISH, 2) + rnd.sample(TYPES, 2)),
+            "category": rnd.choice(CATEGORIES),
+            "price": rnd.randint(500, 20000),
+            "stock_quantity": rnd.randint(0, 100),
+        }
+        for _ in range(args.products)
+    ]
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), rows)
+
+    db = SessionLocal()
+    try:
+        for q, name, category in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                search_products(db, q, name, category, 50)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"q={q!r:12} name={name!r:10} category={category!r:10} "
+                  f"mean={statistics.mean(timings):.2f} ms  p95={timings[int(len(timings) * 0.95)]:.2f} ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Olvasás/írás versengés SQLite alatt: gyári beállítások vs. a hangolt profil
+(WAL, synchronous=NORMAL, busy_timeout, mmap, ...).
+
+Író szálak kosártételeket szúrnak be (a már kosárban lévő terméknél a
+mennyiséget növelik, mint a kosár végpont) és commitolnak, olvasó szálak közben a
+termékkatalógust és a kosarakat kérdezik le. Profilonként ugyanannyi ideig fut.
+
+Futtatás (a backend mappából): python -m benchmarks.bench_sqlite_contention --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from app.database import Base, build_engine
+from app import models
+
+
+def run_profile(profile: str, args) -> dict:
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'contention.db')}"
+    engine = build_engine(url, profile)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [
+            {"name": f"Festék {i}", "price": 1000 + i, "stock_quantity": 100} for i in range(args.products)
+        ])
+        conn.execute(models.User.__table__.insert(), [
+            {"name": f"u{i}", "email": f"u{i}@example.com", "password_hash": "x"} for i in range(args.writers)
+        ])
+        conn.execute(models.Cart.__table__.insert(), [{"user_id": i + 1, "ordered": False} for i in range(args.writers)])
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + args.seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    cart_items = models.CartItem.__table__
+
+    def writer(cart_id: int):
+        i = 0
+        while time.monotonic() < stop:
+            # (cart_id, product_id) egyedi: körbeérve ugyanazt a sort növeljük
+            stmt = sqlite_insert(cart_items).values(cart_id=cart_id, product_id=i % args.products + 1, quantity=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[cart_items.c.cart_id, cart_items.c.product_id],
+                set_={"quantity": cart_items.c.quantity + stmt.excluded.quantity},
+            )
+            try:
+                with engine.begin() as conn:
+                    conn.execute(stmt)
+                count("writes")
+            except OperationalError:
+                count("errors")
+            i += 1
+
+    def reader():
+        i = 0
+        while time.monotonic() < stop:
+            # fix méretű olvasások, hogy a növekvő cart_items ne torzítsa az eredményt
+            after = (i * 50) % args.products
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(models.Product).where(models.Product.product_id > after)
+                        .order_by(models.Product.product_id).limit(50)
+                    ).all()
+                    conn.execute(select(models.Cart).where(models.Cart.cart_id == i % args.writers + 1)).all()
+                count("reads")
+            except OperationalError:
+                count("errors")
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--products", type=int, default=2000)
+    args = parser.parse_args()
+
+    for profile in ("default", "tuned"):
+        c = run_profile(profile, args)
+        print(f"{profile:8}: olvasás {c['reads'] / args.seconds:8.0f}/s  írás {c['writes'] / args.seconds:8.0f}/s  "
+              f"hiba (database is locked) {c['errors']}")
+
+
+if __name__ == "__main__":
+    main()
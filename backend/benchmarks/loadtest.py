@@ -0,0 +1,286 @@
+"""
+In-process terheléses teszt az összes fő útvonalra.
+
+Egy ideiglenes SQLite adatbázist tölt fel az app.synthetic_data generátorral,
+majd N virtuális felhasználó párhuzamosan, súlyozottan futtatja a
+forgatókönyveket (katalógus böngészés, keresés, kosárba tétel, checkout,
+admin státuszváltás, statisztika) httpx ASGI transporton keresztül.
+Útvonalanként kiírja az átviteli sebességet és a p50/p95/p99 késleltetést.
+
+--save: az eredmény mentése JSON baseline-ként.
+--baseline: összevetés egy korábbi baseline-nal; ha egy útvonal p95-je
+--threshold aránynál (és legalább --min-delta-ms ezredmásodpercnél) jobban
+romlott, vagy valamelyik útvonal váratlan státuszkódot adott, a kilépési kód 1.
+
+Futtatás (a backend mappából):
+    python -m benchmarks.loadtest --users 50 --duration 30 --save benchmarks/baseline.json
+    python -m benchmarks.loadtest --users 50 --duration 30 --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+os.environ["EMAIL_OUTBOX_WORKER"] = "0"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import update
+from app.main import app
+from app.database import Base, engine
+from app import models
+from app.synthetic_data import SCALES, DEFAULT_END, SyntheticDataGenerator
+from app.utils.search import ensure_search_index
+from app.utils.security import create_access_token
+
+SEARCH_TERMS = ["falfestek", "falfesték", "homlokzat", "zomanc", "alapozó", "lazur", "hígító", "ecset", "Dulux", "Poli-Farbe"]
+ORDER_STATUSES = ["shipped", "completed", "cancelled", "pending"]
+
+# forgatókönyv -> súly (a virtuális felhasználók ilyen arányban választanak)
+SCENARIO_WEIGHTS = {
+    "browse": 40,
+    "search": 20,
+    "add_to_cart": 20,
+    "checkout": 8,
+    "admin_orders": 7,
+    "stats": 5,
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+        self.active = False
+
+    def record(self, route: str, elapsed: float, response: httpx.Response, expected):
+        if not self.active:
+            return
+        self.latencies[route].append(elapsed)
+        if response.status_code not in expected:
+            self.errors[route] += 1
+            self.error_samples.setdefault(route, f"{response.status_code} {response.text[:200]}")
+
+    def summary(self, seconds: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "rps": len(values) / seconds,
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {"seconds": seconds, "requests": total, "rps": total / seconds, "routes": routes}
+
+
+class VirtualUser:
+    """Egy bejelentkezett vásárló (és opcionálisan admin) saját kosárral."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random,
+                 user_id: int, admin_token: str, dataset: dict):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {create_access_token({'user_id': user_id, 'role': 'user'})}"}
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        self.dataset = dataset
+        self.cart_id = None
+
+    async def request(self, route: str, method: str, url: str, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.recorder.record(route, time.perf_counter() - started, response, expected)
+        return response
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.dataset["products"])
+
+    # ---- forgatókönyvek ----
+
+    async def browse(self):
+        res = await self.request("GET /products/", "GET", "/products/", params={"limit": 50})
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor:
+            await self.request("GET /products/", "GET", "/products/", params={"limit": 50, "cursor": cursor})
+        for _ in range(3):
+            await self.request("GET /products/{id}", "GET", f"/products/{self.product_id()}")
+
+    async def search(self):
+        await self.request("GET /products/search/", "GET", "/products/search/",
+                           params={"q": self.rng.choice(SEARCH_TERMS), "limit": 20})
+
+    async def _new_cart(self) -> int:
+        res = await self.request("POST /carts/", "POST", "/carts/", json={"user_id": self.user_id})
+        return res.json()["cart_id"]
+
+    async def _add_item(self, cart_id: int):
+        await self.request("POST /carts/{id}/items", "POST", f"/carts/{cart_id}/items", headers=self.headers,
+                           json={"product_id": self.product_id(), "quantity": self.rng.randint(1, 3)})
+
+    async def add_to_cart(self):
+        if self.cart_id is None:
+            self.cart_id = await self._new_cart()
+        await self._add_item(self.cart_id)
+        await self.request("GET /carts/{id}", "GET", f"/carts/{self.cart_id}", headers=self.headers)
+
+    async def checkout(self):
+        cart_id = await self._new_cart()
+        for _ in range(self.rng.randint(1, 4)):
+            await self._add_item(cart_id)
+        await self.request("POST /orders/", "POST", "/orders/", headers=self.headers,
+                           json={"user_id": self.user_id, "cart_id": cart_id})
+
+    async def admin_orders(self):
+        order_id = self.rng.randint(1, self.dataset["orders"])
+        # 409: két virtuális admin egyszerre váltotta ugyanazt a rendelést
+        await self.request("PATCH /orders/{id}/status", "PATCH", f"/orders/{order_id}/status",
+                           expected=(200, 409), headers=self.admin_headers,
+                           json={"status": self.rng.choice(ORDER_STATUSES)})
+
+    async def stats(self):
+        params = {"start": self.dataset["start"], "end": self.dataset["end"]}
+        await self.request("GET /stats/", "GET", "/stats/", params={**params, "interval": self.rng.choice(["daily", "monthly"])})
+        if self.rng.random() < 0.2:
+            await self.request("GET /stats/analytics", "GET", "/stats/analytics", params=params, headers=self.admin_headers)
+
+
+def prepare_dataset(args) -> dict:
+    counts = dict(SCALES[args.scale])
+    counts["users"] = max(counts["users"], args.users + 1)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    SyntheticDataGenerator(counts, seed=args.seed).generate(log=lambda _: None)
+    with engine.begin() as conn:
+        # az 1-es felhasználó az admin; a checkout ne fogyjon ki a készletből a mérés alatt
+        conn.execute(update(models.User).where(models.User.user_id == 1).values(role=models.UserRole.admin))
+        conn.execute(update(models.Product).values(stock_quantity=1_000_000_000))
+    end = DEFAULT_END.date()
+    return {
+        "products": counts["products"],
+        "orders": counts["orders"],
+        "start": end.replace(month=1, day=1).isoformat(),
+        "end": end.isoformat(),
+        "counts": counts,
+    }
+
+
+async def run(args, dataset: dict) -> dict:
+    recorder = Recorder()
+    scenarios = list(SCENARIO_WEIGHTS)
+    weights = [SCENARIO_WEIGHTS[name] for name in scenarios]
+    admin_token = create_access_token({"user_id": 1, "role": "admin"})
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        vus = [
+            VirtualUser(client, recorder, random.Random(f"{args.seed}:{i}"), i + 2, admin_token, dataset)
+            for i in range(args.users)
+        ]
+        stop_at = time.perf_counter() + args.warmup + args.duration
+
+        async def loop(vu: VirtualUser):
+            while time.perf_counter() < stop_at:
+                await getattr(vu, vu.rng.choices(scenarios, weights)[0])()
+
+        async def measure():
+            await asyncio.sleep(args.warmup)
+            recorder.active = True
+            started = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            recorder.active = False
+            return time.perf_counter() - started
+
+        *_, seconds = await asyncio.gather(*(loop(vu) for vu in vus), measure())
+
+    result = recorder.summary(seconds)
+    result["error_samples"] = recorder.error_samples
+    result["meta"] = {
+        "users": args.users, "duration": args.duration, "scale": args.scale, "seed": args.seed,
+        "dataset": dataset["counts"], "python": platform.python_version(), "machine": platform.machine(),
+    }
+    return result
+
+
+def print_report(result: dict):
+    print(f"{'útvonal':<28} {'kérés':>8} {'hiba':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in result["routes"].items():
+        print(f"{route:<28} {r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+    print(f"{'összesen':<28} {result['requests']:>8} {'':>6} {result['rps']:>9.1f}")
+    for route, sample in result.get("error_samples", {}).items():
+        print(f"  váratlan válasz ({route}): {sample}")
+
+
+def compare(result: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """A baseline-hoz képest romlott útvonalak leírása (üres lista: nincs regresszió)."""
+    failures = []
+    for route, r in result["routes"].items():
+        if r["errors"]:
+            failures.append(f"{route}: {r['errors']} váratlan válasz")
+        base = baseline.get("routes", {}).get(route)
+        if base is None:
+            continue
+        limit = max(base["p95_ms"] * (1 + threshold), base["p95_ms"] + min_delta_ms)
+        if r["p95_ms"] > limit:
+            failures.append(f"{route}: p95 {r['p95_ms']:.2f} ms > {limit:.2f} ms (baseline {base['p95_ms']:.2f} ms)")
+    if result["rps"] < baseline["rps"] * (1 - threshold):
+        failures.append(f"összesen: {result['rps']:.1f} req/s < baseline {baseline['rps']:.1f} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20, help="párhuzamos virtuális felhasználók")
+    parser.add_argument("--duration", type=float, default=20, help="mérési idő másodpercben")
+    parser.add_argument("--warmup", type=float, default=3, help="bemelegítés (nem mérjük)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="adatkészlet mérete")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="eredmény mentése JSON baseline-ként")
+    parser.add_argument("--baseline", help="összevetés egy mentett baseline-nal")
+    parser.add_argument("--threshold", type=float, default=0.25, help="megengedett romlás aránya (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ennél kisebb p95 romlás nem számít regressziónak")
+    args = parser.parse_args()
+
+    dataset = prepare_dataset(args)
+    result = asyncio.run(run(args, dataset))
+    print_report(result)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Baseline mentve: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(result, json.load(f), args.threshold, args.min_delta_ms)
+    else:
+        failures = [f"{route}: {r['errors']} váratlan válasz" for route, r in result["routes"].items() if r["errors"]]
+    if failures:
+        print("\nREGRESSZIÓ:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
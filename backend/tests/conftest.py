@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# a tesztek saját, ideiglenes SQLite adatbázist használnak (nem a test.db-t)
+_tmp_dir = tempfile.mkdtemp(prefix="festekbolt-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'tests.db')}"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# a tesztek maguk hívják a deliver_batch()-et, háttérszál nélkül
+os.environ["EMAIL_OUTBOX_WORKER"] = "0"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import Base, engine, SessionLocal
+from app import models
+from app.utils.security import create_access_token, principal_cache, token_cache
+from app.utils.cache import catalog_cache
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    catalog_cache.bump()
+    principal_cache.clear()
+    token_cache.clear()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as c:
+        yield c
+
+
+def make_user(db, email="user@example.com", role=models.UserRole.user):
+    user = models.User(name=email.split("@")[0], email=email, password_hash="x", role=role)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def auth_headers(user):
+    token = create_access_token({"user_id": user.user_id, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,77 @@
+from datetime import datetime
+from app import models
+from app.utils import analytics, stats_rollup
+from app.utils.query_budget import capture_queries
+from conftest import make_user, auth_headers
+
+
+def test_sales_analytics(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    paint = models.Product(name="Falfesték", category="festék", price=1000, stock_quantity=100)
+    brush = models.Product(name="Ecset", category="eszköz", price=200, stock_quantity=100)
+    db.add_all([paint, brush])
+    db.flush()
+
+    def order(lines, status=models.OrderStatus.pending):
+        o = models.Order(user_id=admin.user_id, created_at=datetime(2024, 6, 1), status=status,
+                         total_price=sum(p.price * q for p, q in lines))
+        db.add(o)
+        db.flush()
+        db.add_all([models.OrderItem(order_id=o.order_id, product_id=p.product_id, quantity=q, unit_price=p.price)
+                    for p, q in lines])
+        stats_rollup.record_order(db, o)
+
+    order([(paint, 2), (brush, 1)])
+    order([(brush, 10)])
+    order([(paint, 50)], status=models.OrderStatus.cancelled)
+    db.commit()
+
+    res = client.get("/stats/analytics", params={"start": "2024-06-01", "end": "2024-06-30", "bins": [1, 2]},
+                     headers=auth_headers(admin))
+    assert res.status_code == 200
+    data = res.json()
+    assert data["order_count"] == 2
+    assert data["average_order_value"] == (2200 + 2000) / 2
+    assert [p["name"] for p in data["top_by_quantity"]] == ["Ecset", "Falfesték"]
+    assert data["top_by_revenue"][0] == {"product_id": brush.product_id, "name": "Ecset", "quantity": 11, "revenue": 2200}
+    assert {c["category"]: c["revenue"] for c in data["categories"]} == {"festék": 2000, "eszköz": 2200}
+    assert data["order_size_histogram"] == [
+        {"min_items": 1, "max_items": 1, "orders": 1},
+        {"min_items": 2, "max_items": None, "orders": 1},
+    ]
+
+
+def test_sales_analytics_for_a_range_without_orders(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    db.add(models.Product(name="Falfesték", category="festék", price=1000, stock_quantity=100))
+    db.commit()
+
+    res = client.get("/stats/analytics", headers=auth_headers(admin))
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["order_count"], data["top_by_quantity"], data["top_by_revenue"], data["categories"]) == (0, [], [], [])
+    assert all(bucket["orders"] == 0 for bucket in data["order_size_histogram"])
+
+
+def test_sales_analytics_requires_admin(client, db):
+    user = make_user(db)
+    assert client.get("/stats/analytics", headers=auth_headers(user)).status_code == 403
+
+
+def test_product_lookup_does_not_grow_with_the_catalog(db):
+    user = make_user(db)
+    products = [models.Product(name=f"Festék {i}", category="festék", price=100, stock_quantity=10) for i in range(1200)]
+    db.add_all(products)
+    db.flush()
+    order = models.Order(user_id=user.user_id, created_at=datetime(2024, 6, 1), total_price=120000)
+    db.add(order)
+    db.flush()
+    db.add_all([models.OrderItem(order_id=order.order_id, product_id=p.product_id, quantity=1, unit_price=100)
+                for p in products])
+    db.commit()
+
+    with capture_queries() as captured:
+        sold = analytics.sold_products(db, datetime(2024, 6, 1), datetime(2024, 6, 30))
+    assert len(sold) == 1200
+    # egyetlen, állandó méretű utasítás (nincs 1200 elemű IN lista)
+    assert len(captured) == 1 and captured.statements[0].count("?") < 10
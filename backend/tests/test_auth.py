@@ -0,0 +1,43 @@
+from passlib.context import CryptContext
+from app import models
+from conftest import make_user, auth_headers
+from app.utils.passwords import verify_password, BCRYPT_ROUNDS
+
+
+def test_register_and_login(client, db):
+    res = client.post("/users/", json={"name": "Teszt Elek", "email": "elek@example.com", "password": "titok123"})
+    assert res.status_code == 200
+    user = db.query(models.User).filter_by(email="elek@example.com").first()
+    assert verify_password("titok123", user.password_hash)
+
+    res = client.post("/auth/login", data={"username": "elek@example.com", "password": "titok123"})
+    assert res.status_code == 200
+    assert res.json()["user"]["user_id"] == user.user_id
+
+    res = client.post("/auth/login", data={"username": "elek@example.com", "password": "rossz"})
+    assert res.status_code == 401
+
+
+def test_login_rehashes_when_cost_changes(client, db):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS + 1).hash("titok123")
+    db.add(models.User(name="Régi", email="regi@example.com", password_hash=old_hash))
+    db.commit()
+
+    assert client.post("/auth/login", data={"username": "regi@example.com", "password": "titok123"}).status_code == 200
+
+    db.expire_all()
+    new_hash = db.query(models.User).filter_by(email="regi@example.com").first().password_hash
+    assert new_hash != old_hash
+    assert f"${BCRYPT_ROUNDS:02d}$" in new_hash
+    assert verify_password("titok123", new_hash)
+
+
+def test_principal_cache_is_invalidated_on_role_change(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db, "user@example.com")
+    headers = auth_headers(user)
+
+    assert client.get("/users/", headers=headers).status_code == 403
+    res = client.put(f"/users/{user.user_id}", json={"role": "admin"}, headers=auth_headers(admin))
+    assert res.status_code == 200
+    assert client.get("/users/", headers=headers).status_code == 200
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import models
+from app.utils import cart_items
+from app.utils.query_budget import assert_query_budget
+from conftest import make_user, auth_headers
+
+
+@pytest.fixture
+def shop(db):
+    user = make_user(db, "vevo@example.com")
+    product = models.Product(name="Falfesték", price=1000, stock_quantity=100)
+    db.add(product)
+    db.flush()
+    cart = models.Cart(user_id=user.user_id)
+    db.add(cart)
+    db.commit()
+    return user, product, cart
+
+
+def _add(client, user, cart_id, product_id, quantity):
+    return client.post(f"/carts/{cart_id}/items", json={"product_id": product_id, "quantity": quantity},
+                       headers=auth_headers(user))
+
+
+@pytest.fixture(params=["upsert", "fallback"])
+def upsert_mode(request, monkeypatch):
+    # a fallback ág a natív ON CONFLICT nélküli adatbázisokat utánozza
+    if request.param == "fallback":
+        monkeypatch.setattr(cart_items, "upsert_insert", lambda db, table: None)
+    return request.param
+
+
+def test_add_item_merges_same_product(client, db, shop, upsert_mode):
+    user, product, cart = shop
+    first = _add(client, user, cart.cart_id, product.product_id, 2)
+    second = _add(client, user, cart.cart_id, product.product_id, 1.5)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == {"cart_item_id": first.json()["cart_item_id"], "product_id": product.product_id, "quantity": 3.5}
+    assert db.query(models.CartItem).filter(models.CartItem.cart_id == cart.cart_id).count() == 1
+
+
+def test_add_item_errors(client, db, shop, upsert_mode):
+    user, product, cart = shop
+    other = make_user(db, "masik@example.com")
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    assert _add(client, user, 999, product.product_id, 1).status_code == 404
+    assert _add(client, user, cart.cart_id, 999, 1).json()["detail"] == "Product not found"
+    assert _add(client, other, cart.cart_id, product.product_id, 1).status_code == 403
+    # admin bárki kosarába tehet
+    assert _add(client, admin, cart.cart_id, product.product_id, 1).status_code == 200
+    assert db.query(models.CartItem).count() == 1
+
+
+def test_concurrent_adds_never_duplicate_lines(client, db, shop):
+    user, product, cart = shop
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda _: _add(client, user, cart.cart_id, product.product_id, 1).status_code, range(24)))
+    assert statuses == [200] * 24
+    db.expire_all()
+    items = db.query(models.CartItem).filter(models.CartItem.cart_id == cart.cart_id).all()
+    assert [(item.product_id, item.quantity) for item in items] == [(product.product_id, 24)]
+
+
+def _sync(client, user, cart_id, operations):
+    return client.patch(f"/carts/{cart_id}/items", json={"operations": operations}, headers=auth_headers(user))
+
+
+def test_batch_update_applies_operations_in_order(client, db, shop, upsert_mode):
+    user, product, cart = shop
+    others = [models.Product(name=f"Ecset {i}", price=200, stock_quantity=10) for i in range(3)]
+    db.add_all(others)
+    db.flush()
+    db.add_all([models.CartItem(cart_id=cart.cart_id, product_id=p.product_id, quantity=5) for p in (product, others[0])])
+    db.commit()
+    a, b, c = (p.product_id for p in others)
+
+    res = _sync(client, user, cart.cart_id, [
+        {"op": "increment", "product_id": product.product_id, "quantity": 2},   # 5 -> 7
+        {"op": "remove", "product_id": a},
+        {"op": "set", "product_id": b, "quantity": 3},
+        {"op": "increment", "product_id": b, "quantity": 1},                     # új tétel: 4
+        {"op": "increment", "product_id": c, "quantity": 1},
+        {"op": "remove", "product_id": c},                                       # nem marad
+    ])
+    assert res.status_code == 200
+    assert {item["product_id"]: item["quantity"] for item in res.json()["items"]} == {product.product_id: 7, b: 4}
+
+
+def test_batch_update_is_all_or_nothing(client, db, shop):
+    user, product, cart = shop
+    other = make_user(db, "masik@example.com")
+    operations = [{"op": "set", "product_id": product.product_id, "quantity": 2}]
+    assert _sync(client, other, cart.cart_id, operations).status_code == 403
+    assert _sync(client, user, 999, operations).status_code == 404
+    assert _sync(client, user, cart.cart_id, [{"op": "set", "product_id": product.product_id}]).status_code == 422
+
+    res = _sync(client, user, cart.cart_id, operations + [{"op": "increment", "product_id": 999, "quantity": 1}])
+    assert res.status_code == 404
+    assert res.json()["detail"]["product_ids"] == [999]
+    assert db.query(models.CartItem).count() == 0
+
+
+def test_batch_update_stays_within_budget(client, db, shop):
+    user, product, cart = shop
+    products = [models.Product(name=f"Festék {i}", price=100 + i, stock_quantity=10) for i in range(30)]
+    db.add_all(products)
+    db.commit()
+    operations = [{"op": "set", "product_id": p.product_id, "quantity": 1} for p in products[:20]]
+    operations += [{"op": "increment", "product_id": p.product_id, "quantity": 2} for p in products[10:]]
+    operations += [{"op": "remove", "product_id": p.product_id} for p in products[:5]]
+    res = assert_query_budget(client, "PATCH", f"/carts/{cart.cart_id}/items", json={"operations": operations},
+                              headers=auth_headers(user))
+    assert len(res.json()["items"]) == 25
@@ -1,3 +1,5 @@
+import json
+from unittest import mock
 import pytest
 from app.data_loader import DatabaseLoader
 from app.models import User
@@ -52,4 +54,57 @@ def test_multiple_users_passwords(setup_database, db_session):
         user = db_session.query(User).filter_by(email=u["email"]).first()
     assert user is not None
     assert user.password_hash != u["password"]
-    assert verify_password(u["password"], user.password_hash)
\ No newline at end of file
+    assert verify_password(u["password"], user.password_hash)
+
+def test_load_products_and_colors_from_files(db, tmp_path):
+    from app.models import Product, Color
+    from app import data_loader
+
+    products_csv = tmp_path / "products.csv"
+    products_csv.write_text(
+        "name,category,price,stock_quantity,unit\n"
+        + "".join(f"Festék {i},beltéri,{1000 + i},{i},l\n" for i in range(25)),
+        encoding="utf-8",
+    )
+    colors_json = tmp_path / "colors.json"
+    colors_json.write_text(json.dumps([{"name": f"Szín {i}", "hex_code": "#FFFFFF", "available": i % 2 == 0} for i in range(300)]))
+
+    # kis olvasási puffer, hogy a JSON objektumok a puffer határán is átnyúljanak
+    with mock.patch.object(data_loader, "JSON_READ_CHUNK", 64), DatabaseLoader(db, batch_size=7) as loader:
+        assert loader.load_data_from_file(str(products_csv), "products")
+        assert loader.load_data_from_file(str(colors_json), "colors")
+
+    assert db.query(Product).count() == 25
+    assert db.query(Product).filter_by(name="Festék 24").one().price == 1024
+    assert db.query(Color).count() == 300
+    assert db.query(Color).filter_by(available=True).count() == 150
+
+
+def test_invalid_file_is_rolled_back(db, tmp_path):
+    from app.models import Product
+
+    products_csv = tmp_path / "products.csv"
+    products_csv.write_text("name,price\nAlapozó,1200\nHibás,nem-szám\n", encoding="utf-8")
+
+    assert not DatabaseLoader(db).load_data_from_file(str(products_csv), "products")
+    assert db.query(Product).count() == 0
+
+
+def test_failure_mid_file_rolls_back_the_whole_file(db, tmp_path):
+    from app.models import Product
+
+    products_csv = tmp_path / "products.csv"
+    products_csv.write_text(
+        "name,price\n" + "".join(f"Festék {i},{1000 + i}\n" for i in range(20)) + "Hibás,nem-szám\nUtolsó,100\n",
+        encoding="utf-8",
+    )
+    loader = DatabaseLoader(db, batch_size=5)
+    assert not loader.load_data_from_file(str(products_csv), "products")
+    assert loader.committed_rows == 0
+    assert db.query(Product).count() == 0
+
+    # köztes commitokkal a már commitolt kötegek megmaradnak, és ez jelentve van
+    loader = DatabaseLoader(db, batch_size=5, commit_rows=10)
+    assert not loader.load_data_from_file(str(products_csv), "products")
+    assert loader.committed_rows == 20
+    assert db.query(Product).count() == 20
@@ -0,0 +1,44 @@
+from sqlalchemy import event
+from app import models
+from app.database import engine
+from app.utils.email_templates import render_order_completed_batch
+from conftest import make_user
+
+
+def _order(db, user, products, quantity=1):
+    order = models.Order(user_id=user.user_id, total_price=sum(p.price * quantity for p in products))
+    db.add(order)
+    db.flush()
+    for product in products:
+        db.add(models.OrderItem(order_id=order.order_id, product_id=product.product_id, quantity=quantity, unit_price=product.price))
+    return order
+
+
+def test_batch_render_uses_one_query_and_escapes(db):
+    products = [models.Product(name=f"Festék {i}", price=1000 + i, stock_quantity=0) for i in range(20)]
+    products.append(models.Product(name="<b>Lakk</b>", price=2500, stock_quantity=0))
+    db.add_all(products)
+    user = make_user(db)
+    orders = [_order(db, user, products, quantity=2) for _ in range(3)]
+    db.commit()
+    order_ids = [o.order_id for o in orders]
+    totals = [o.total_price for o in orders]
+    db.expire_all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        rendered = render_order_completed_batch(db, order_ids)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert [email.order_id for email, _ in rendered] == order_ids
+    email, html = rendered[0]
+    assert email.recipient == user.email and len(email.items) == 21
+    assert "Festék 19" in html
+    assert "2.0 db" in html
+    assert "2500 Ft" in html
+    assert "&lt;b&gt;Lakk&lt;/b&gt;" in html
+    assert f"Összesen: {totals[0]:.0f} Ft" in html
@@ -0,0 +1,302 @@
+from datetime import datetime
+from unittest import mock
+import pytest
+from sqlalchemy import create_mock_engine, text
+from app import models
+from app.database import Base
+from app.data_loader import DatabaseLoader
+from app.seed import seed_data
+from app.utils import inventory_ledger
+from app.utils.query_budget import assert_query_budget
+from conftest import make_user, auth_headers
+
+
+def _stock(client, admin, product_id):
+    return assert_query_budget(client, "GET", f"/inventory/stock/{product_id}", headers=auth_headers(admin)).json()
+
+
+def test_inventory_changes_keep_aggregate_and_available_stock_in_sync(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    paint = models.Product(name="Falfesték", price=1000, stock_quantity=0)
+    brush = models.Product(name="Ecset", price=200, stock_quantity=0)
+    db.add_all([paint, brush])
+    db.commit()
+    headers = auth_headers(admin)
+
+    a = client.post("/inventory/", json={"product_id": paint.product_id, "location": "Budapest", "quantity": 30}, headers=headers).json()
+    client.post("/inventory/", json={"product_id": paint.product_id, "location": "Győr", "quantity": 12}, headers=headers)
+    stock = _stock(client, admin, paint.product_id)
+    assert (stock["quantity"], stock["available"]) == (42, 42)
+    assert [(loc["location"], loc["quantity"]) for loc in stock["locations"]] == [("Budapest", 30), ("Győr", 12)]
+
+    # a rendelés foglalása csak a szabad készletet csökkenti, a bevételezés mindkettőt növeli
+    cart = models.Cart(user_id=admin.user_id)
+    db.add(cart)
+    db.flush()
+    db.add(models.CartItem(cart_id=cart.cart_id, product_id=paint.product_id, quantity=5))
+    db.commit()
+    assert client.post("/orders/", json={"user_id": admin.user_id, "cart_id": cart.cart_id}, headers=headers).status_code == 200
+    client.patch(f"/inventory/{a['inventory_id']}", json={"quantity": 40}, headers=headers)
+    stock = _stock(client, admin, paint.product_id)
+    assert (stock["quantity"], stock["available"]) == (52, 47)
+    # a termékkatalógus (cache) is a friss szabad készletet mutatja
+    assert client.get(f"/products/{paint.product_id}").json()["stock_quantity"] == 47
+
+    client.delete(f"/inventory/{a['inventory_id']}", headers=headers)
+    stock = _stock(client, admin, paint.product_id)
+    assert (stock["quantity"], stock["available"], len(stock["locations"])) == (12, 7, 1)
+
+    assert _stock(client, admin, brush.product_id) == {
+        "product_id": brush.product_id, "quantity": 0, "available": 0, "updated_at": None, "locations": []
+    }
+    assert client.get("/inventory/stock/999", headers=headers).status_code == 404
+
+
+def test_first_location_takes_over_loaded_product_stock(client, db, tmp_path):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    headers = auth_headers(admin)
+    products_csv = tmp_path / "products.csv"
+    products_csv.write_text("name,price,stock_quantity\nAlapozó,3800,40\n", encoding="utf-8")
+    with DatabaseLoader(db) as loader:
+        assert loader.load_data_from_file(str(products_csv), "products")
+    primer = db.query(models.Product).filter_by(name="Alapozó").one()
+
+    cart = models.Cart(user_id=admin.user_id)
+    db.add(cart)
+    db.flush()
+    db.add(models.CartItem(cart_id=cart.cart_id, product_id=primer.product_id, quantity=5))
+    db.commit()
+    assert client.post("/orders/", json={"user_id": admin.user_id, "cart_id": cart.cart_id}, headers=headers).status_code == 200
+
+    # a termékfájl 40 db-ja kerül raktárhelyekre: nem 40 + 40, és a foglalás megmarad
+    client.post("/inventory/", json={"product_id": primer.product_id, "location": "Budapest", "quantity": 25}, headers=headers)
+    client.post("/inventory/", json={"product_id": primer.product_id, "location": "Győr", "quantity": 15}, headers=headers)
+    stock = _stock(client, admin, primer.product_id)
+    assert (stock["quantity"], stock["available"]) == (40, 35)
+
+    # POST /products után ugyanígy
+    product = client.post("/products/", json={"name": "Hígító", "price": 1500, "stock_quantity": 50}, headers=headers).json()
+    client.post("/inventory/", json={"product_id": product["product_id"], "location": "Budapest", "quantity": 50}, headers=headers)
+    stock = _stock(client, admin, product["product_id"])
+    assert (stock["quantity"], stock["available"]) == (50, 50)
+
+
+def test_seeded_stock_is_counted_once(db):
+    seed_data()
+    db.expire_all()
+    totals = {row.product_id: row.quantity for row in db.query(models.ProductStock)}
+    products = db.query(models.Product).all()
+    assert products and all(p.stock_quantity == totals[p.product_id] for p in products)
+    assert db.query(models.Product).filter_by(name="Belső falfesték fehér").one().stock_quantity == 50
+
+
+def test_postgresql_schema_gets_the_stock_trigger():
+    statements = []
+    engine = create_mock_engine("postgresql://", lambda sql, *args, **kw: statements.append(str(sql.compile(dialect=engine.dialect))))
+    Base.metadata.create_all(engine, checkfirst=False)
+    function, = [sql for sql in statements if "FUNCTION inventory_stock_sync()" in sql and "CREATE OR REPLACE" in sql]
+    assert any("CREATE TRIGGER inventory_stock_sync" in sql for sql in statements)
+    # a foglalás a RESERVING_STATUSES-ből jön, nem beégetett lista
+    reserving = ", ".join(f"'{status.name}'" for status in models.RESERVING_STATUSES)
+    assert f"orders.status IN ({reserving})" in function
+    assert all(f"orders.status IN ({reserving})" in ddl for ddl in models.INVENTORY_STOCK_DDL if "orders" in ddl)
+
+
+def test_reconcile_fixes_drift_in_one_pass(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    products = [models.Product(name=f"Festék {i}", price=1000, stock_quantity=0) for i in range(4)]
+    db.add_all(products)
+    db.flush()
+    p1, p2, p3, p4 = (p.product_id for p in products)
+    db.add_all([
+        models.Inventory(product_id=p1, location="A", quantity=10),
+        models.Inventory(product_id=p1, location="B", quantity=5),
+        models.Inventory(product_id=p2, location="A", quantity=8),
+        models.Inventory(product_id=p3, location="A", quantity=3),
+    ])
+    db.commit()
+
+    # eltérés, ahogy trigger nélküli írásnál keletkezne
+    db.execute(text("UPDATE product_stock SET quantity = 11, locations = 1 WHERE product_id = :p"), {"p": p1})
+    db.execute(text("DELETE FROM product_stock WHERE product_id = :p"), {"p": p2})
+    db.execute(text("UPDATE products SET stock_quantity = 100 WHERE product_id = :p"), {"p": p2})
+    db.execute(text("INSERT INTO product_stock (product_id, quantity, locations) VALUES (:p, 6, 1)"), {"p": p4})
+    db.execute(text("UPDATE products SET stock_quantity = 6 WHERE product_id = :p"), {"p": p4})
+    db.commit()
+
+    res = client.post("/inventory/reconcile", headers=auth_headers(admin))
+    assert res.status_code == 200
+    assert res.json() == {"products_corrected": 2, "aggregates_refreshed": 2, "aggregates_removed": 1}
+
+    db.expire_all()
+    stock = {row.product_id: (row.quantity, row.locations) for row in db.query(models.ProductStock)}
+    assert stock == {p1: (15, 2), p2: (8, 1), p3: (3, 1)}
+    available = {p.product_id: p.stock_quantity for p in db.query(models.Product)}
+    # p1: +4 a hiányzó különbség; p2-nek nem volt összesítője, a szabad készlete marad
+    assert available == {p1: 19, p2: 100, p3: 3, p4: 0}
+
+    assert client.post("/inventory/reconcile", headers=auth_headers(admin)).json() == {
+        "products_corrected": 0, "aggregates_refreshed": 0, "aggregates_removed": 0
+    }
+
+
+def _stock_at(client, admin, product_id, at):
+    return assert_query_budget(client, "GET", f"/inventory/stock/{product_id}/at",
+                               params={"time": at.isoformat()}, headers=auth_headers(admin)).json()
+
+
+def _move(client, admin, **data):
+    return client.post("/inventory/movements", json=data, headers=auth_headers(admin))
+
+
+def test_movements_are_logged_and_replayable(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    paint = models.Product(name="Falfesték", price=1000, stock_quantity=0)
+    db.add(paint)
+    db.commit()
+    headers = auth_headers(admin)
+
+    a = client.post("/inventory/", json={"product_id": paint.product_id, "location": "Budapest", "quantity": 10}, headers=headers).json()
+    opened = datetime.utcnow()
+
+    assert _move(client, admin, kind="sale", inventory_id=a["inventory_id"], quantity=3).status_code == 200
+    assert _move(client, admin, kind="receipt", inventory_id=a["inventory_id"], quantity=5, reference="SZ-1").status_code == 200
+    res = assert_query_budget(client, "POST", "/inventory/movements", headers=headers, json={
+        "kind": "transfer", "inventory_id": a["inventory_id"], "quantity": 4, "to_location": "Győr"})
+    assert [(m["kind"], m["location"], m["quantity"]) for m in res.json()] == [
+        ("transfer_out", "Budapest", -4), ("transfer_in", "Győr", 4)]
+    assert res.json()[0]["reference"] == res.json()[1]["reference"]
+    # nincs elég készlet: semmi nem változik
+    assert _move(client, admin, kind="sale", inventory_id=a["inventory_id"], quantity=100).status_code == 409
+    assert _move(client, admin, kind="sale", inventory_id=a["inventory_id"], quantity=-1).status_code == 422
+    assert _move(client, admin, kind="transfer", inventory_id=a["inventory_id"], quantity=1).status_code == 422
+    moved = datetime.utcnow()
+
+    # felülírás: a különbség leltárkorrekció
+    assert_query_budget(client, "PATCH", f"/inventory/{a['inventory_id']}", json={"quantity": 20}, headers=headers)
+    now = datetime.utcnow()
+
+    history = client.get("/inventory/movements", params={"product_id": paint.product_id}, headers=headers).json()
+    assert [(m["kind"], m["quantity"]) for m in history] == [
+        ("adjustment", 12), ("transfer_in", 4), ("transfer_out", -4), ("receipt", 5), ("sale", -3), ("receipt", 10)]
+    page = client.get("/inventory/movements", params={"product_id": paint.product_id, "limit": 4}, headers=headers)
+    rest = client.get("/inventory/movements", params={"product_id": paint.product_id, "cursor": page.headers["X-Next-Cursor"]},
+                      headers=headers).json()
+    assert [m["movement_id"] for m in page.json() + rest] == [m["movement_id"] for m in history]
+
+    assert _stock_at(client, admin, paint.product_id, opened)["quantity"] == 10
+    at_moved = _stock_at(client, admin, paint.product_id, moved)
+    assert [(loc["location"], loc["quantity"]) for loc in at_moved["locations"]] == [("Budapest", 8), ("Győr", 4)]
+    assert (at_moved["quantity"], at_moved["snapshot_at"]) == (12, None)
+    assert _stock_at(client, admin, paint.product_id, now)["quantity"] == _stock(client, admin, paint.product_id)["quantity"] == 24
+
+    report = assert_query_budget(client, "GET", "/inventory/movements/report", headers=headers, params={
+        "product_id": paint.product_id, "start": opened.isoformat(), "end": now.isoformat()}).json()
+    assert (report["opening"], report["closing"], report["movements"]) == (10, 24, 5)
+    assert {row["kind"]: row["quantity"] for row in report["by_kind"]} == {
+        "adjustment": 12, "receipt": 5, "sale": -3, "transfer_in": 4, "transfer_out": -4}
+
+
+def test_snapshots_bound_the_replay_and_capture_untracked_changes(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    paint = models.Product(name="Falfesték", price=1000, stock_quantity=0)
+    db.add(paint)
+    db.flush()
+    # napló nélküli kezdőkészlet (pl. a napló bevezetése előtti adatbázis)
+    a = models.Inventory(product_id=paint.product_id, location="A", quantity=10)
+    b = models.Inventory(product_id=paint.product_id, location="B", quantity=5)
+    db.add_all([a, b])
+    db.commit()
+    before = datetime.utcnow()
+    headers = auth_headers(admin)
+
+    first = assert_query_budget(client, "POST", "/inventory/snapshots", headers=headers).json()
+    assert (first["locations"], first["adjustments"]) == (2, 2)
+    assert _stock_at(client, admin, paint.product_id, before)["quantity"] == 0
+
+    _move(client, admin, kind="sale", inventory_id=a.inventory_id, quantity=2)
+    # közvetlen SQL írás: a következő pillanatkép korrekcióként naplózza
+    db.execute(text("UPDATE inventory SET quantity = 7 WHERE inventory_id = :i"), {"i": b.inventory_id})
+    db.commit()
+    between = datetime.utcnow()
+    second = client.post("/inventory/snapshots", headers=headers).json()
+    assert (second["locations"], second["adjustments"]) == (2, 1)
+    assert client.post("/inventory/snapshots", headers=headers).json()["adjustments"] == 0
+
+    _move(client, admin, kind="receipt", inventory_id=a.inventory_id, quantity=1)
+    client.delete(f"/inventory/{b.inventory_id}", headers=headers)
+    now = datetime.utcnow()
+
+    at = _stock_at(client, admin, paint.product_id, between)
+    assert (at["quantity"], at["movements_applied"]) == (13, 1)
+    # csak a legutóbbi pillanatkép utáni két mozgást kell hozzáadni
+    at = _stock_at(client, admin, paint.product_id, now)
+    assert (at["quantity"], at["movements_applied"]) == (9, 2)
+    assert [(loc["location"], loc["quantity"]) for loc in at["locations"]] == [("A", 9), ("B", 0)]
+    assert at["snapshot_at"] is not None
+
+    history = client.get("/inventory/movements", params={"inventory_id": b.inventory_id}, headers=headers).json()
+    assert [(m["kind"], m["quantity"], m["note"]) for m in history] == [
+        ("adjustment", -7, "raktárhely törölve"),
+        ("adjustment", 2, inventory_ledger.UNTRACKED_NOTE),
+        ("adjustment", 5, inventory_ledger.UNTRACKED_NOTE),
+    ]
+
+
+def _pages(client, admin, **params):
+    pages, cursor = [], None
+    while True:
+        res = assert_query_budget(client, "GET", "/inventory/", headers=auth_headers(admin),
+                                  params={**params, **({"cursor": cursor} if cursor else {})})
+        pages.append(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_snapshot_locks_the_ledger_outside_sqlite():
+    session = mock.Mock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    inventory_ledger._lock_movements(session)
+    assert str(session.execute.call_args.args[0]) == "LOCK TABLE inventory_movements IN SHARE ROW EXCLUSIVE MODE"
+
+    session.get_bind.return_value.dialect.name = "mysql"
+    with pytest.raises(RuntimeError):
+        inventory_ledger._lock_movements(session)
+    # induláskor csak kihagyja, nem akasztja meg az alkalmazást
+    session.reset_mock()
+    inventory_ledger.snapshot_if_empty(session)
+    session.execute.assert_not_called()
+    session.query.assert_not_called()
+
+
+def test_inventory_listing_filters_and_pages_by_location(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    paint = models.Product(name="Falfesték", price=1000, stock_quantity=0, unit="l")
+    brush = models.Product(name="Ecset", price=200, stock_quantity=0, unit="db")
+    db.add_all([paint, brush])
+    db.flush()
+    rows = [(paint, "Győr", 2), (brush, "Budapest", 40), (paint, "Budapest", 3), (brush, None, 1),
+            (paint, "Győr", 50), (brush, "Győr", 4), (paint, None, 7)]
+    db.add_all([models.Inventory(product_id=p.product_id, location=loc, quantity=q) for p, loc, q in rows])
+    db.commit()
+
+    everything = client.get("/inventory/", headers=auth_headers(admin)).json()
+    # rendezés: (location, inventory_id), a hely nélküli sorok elöl
+    assert [(row["location"], row["inventory_id"]) for row in everything] == [
+        (None, 4), (None, 7), ("Budapest", 2), ("Budapest", 3), ("Győr", 1), ("Győr", 5), ("Győr", 6)]
+    pages = _pages(client, admin, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert [row for page in pages for row in page] == everything
+
+    pages = _pages(client, admin, location="Győr", limit=2)
+    assert [[row["inventory_id"] for row in page] for page in pages] == [[1, 5], [6]]
+    low = client.get("/inventory/", params={"low_stock": 4, "product_id": paint.product_id}, headers=auth_headers(admin)).json()
+    assert [(row["location"], row["quantity"]) for row in low] == [("Budapest", 3), ("Győr", 2)]
+    assert low[0]["product_name"] is None
+
+    embedded = client.get("/inventory/", params={"location": "Budapest", "include_product": True},
+                          headers=auth_headers(admin)).json()
+    assert [(row["product_name"], row["product_unit"], row["quantity"]) for row in embedded] == [
+        ("Ecset", "db", 40), ("Falfesték", "l", 3)]
+    assert client.get("/inventory/", params={"cursor": "nem-cursor"}, headers=auth_headers(admin)).status_code == 400
@@ -0,0 +1,39 @@
+from app import models
+from app.utils.metrics import registry
+from conftest import make_user, auth_headers
+
+
+def _sample(text, prefix):
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metrics_per_route_latency_status_and_queries(client, db):
+    registry.reset()
+    user = make_user(db)
+    db.add(models.Product(name="Alapozó", price=1200))
+    db.commit()
+    for _ in range(3):
+        assert client.get("/products/1").status_code == 200
+    assert client.get("/products/999").status_code == 404
+    assert client.get("/nincs-ilyen").status_code == 404
+    client.get("/users/me", headers=auth_headers(user))
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+
+    route = 'method="GET",route="/products/{product_id}"'
+    assert _sample(text, f'http_requests_total{{{route},status="200"}}') == 3
+    assert _sample(text, f'http_requests_total{{{route},status="404"}}') == 1
+    assert _sample(text, 'http_requests_total{method="GET",route="<unmatched>",status="404"}') == 1
+    assert _sample(text, f"http_request_duration_seconds_count{{{route}}}") == 4
+    assert _sample(text, f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 4
+    # az első olvasás és a 404 lekérdez, a cache-ből kiszolgált kérések nem
+    assert _sample(text, f"db_queries_per_request_sum{{{route}}}") >= 2
+    assert _sample(text, f"db_query_duration_seconds_total{{{route}}}") > 0
+    assert _sample(text, 'db_queries_per_request_count{method="GET",route="/users/me"}') == 1
+    assert _sample(text, "http_requests_in_flight") == 1  # maga a /metrics kérés
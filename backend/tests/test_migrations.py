@@ -0,0 +1,35 @@
+import importlib.util
+import os
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+VERSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+
+
+def _migration(filename):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_cart_item_merge_keeps_null_key_rows(tmp_path):
+    migration = _migration("5c1f0e7a9b3d_add_hot_query_indexes.py")
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE cart_items (cart_item_id INTEGER PRIMARY KEY, cart_id INTEGER, product_id INTEGER, quantity FLOAT NOT NULL)"))
+        # régi adatbázis: ismétlődő tételek, köztük NULL kosár / termék azonosítóval
+        conn.execute(text(
+            "INSERT INTO cart_items (cart_item_id, cart_id, product_id, quantity) VALUES "
+            "(1, 1, 10, 2), (2, 1, 10, 3), (3, 1, 11, 1), "
+            "(4, NULL, 10, 4), (5, NULL, 10, 5), (6, 2, NULL, 1), (7, 2, NULL, 1)"))
+
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+
+        rows = conn.execute(text("SELECT cart_item_id, cart_id, product_id, quantity FROM cart_items ORDER BY cart_item_id")).all()
+    assert [tuple(row) for row in rows] == [
+        (1, 1, 10, 5), (3, 1, 11, 1), (4, None, 10, 4), (5, None, 10, 5), (6, 2, None, 1), (7, 2, None, 1),
+    ]
@@ -0,0 +1,46 @@
+from app import models
+from conftest import make_user, auth_headers
+
+
+def _cart_with_items(db, user, prices_and_quantities):
+    cart = models.Cart(user_id=user.user_id)
+    db.add(cart)
+    db.flush()
+    for price, quantity in prices_and_quantities:
+        product = models.Product(name=f"Termék {price}", price=price, stock_quantity=100)
+        db.add(product)
+        db.flush()
+        db.add(models.CartItem(cart_id=cart.cart_id, product_id=product.product_id, quantity=quantity))
+    db.commit()
+    return cart
+
+
+def test_checkout_creates_order_with_items_in_one_go(client, db):
+    user = make_user(db)
+    cart = _cart_with_items(db, user, [(1000, 2), (250, 4)])
+
+    res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user))
+    assert res.status_code == 200
+    order = res.json()
+    assert order["total_price"] == 3000
+
+    items = client.get(f"/orders/{order['order_id']}/items", headers=auth_headers(user)).json()
+    assert sorted((i["unit_price"], i["quantity"]) for i in items) == [(250, 4), (1000, 2)]
+
+    db.expire_all()
+    assert db.get(models.Cart, cart.cart_id).ordered is True
+    res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user))
+    assert res.status_code == 400
+
+
+def test_checkout_rejects_empty_and_foreign_carts(client, db):
+    user = make_user(db)
+    other = make_user(db, "other@example.com")
+    empty = _cart_with_items(db, user, [])
+    foreign = _cart_with_items(db, other, [(100, 1)])
+
+    res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": empty.cart_id}, headers=auth_headers(user))
+    assert res.status_code == 400
+    res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": foreign.cart_id}, headers=auth_headers(user))
+    assert res.status_code == 400
+    assert db.query(models.Order).count() == 0
@@ -0,0 +1,126 @@
+import socket
+import time
+from email import message_from_bytes
+from datetime import datetime, timedelta
+import pytest
+from aiosmtpd.controller import Controller
+from app import models
+from app.utils import outbox
+from conftest import make_user, auth_headers
+
+
+class _Collector:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    handler = _Collector()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def _settings(port):
+    return outbox.SmtpSettings(host="127.0.0.1", port=port, starttls=False, use_credentials=False,
+                               sender="shop@example.com", suppress_send=False, timeout=5)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_completed_order_email_is_queued_and_delivered(client, db, smtp_server):
+    handler, port = smtp_server
+    product = models.Product(name="Falfesték", price=4000, stock_quantity=5)
+    db.add(product)
+    db.commit()
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db)
+    cart = models.Cart(user_id=user.user_id)
+    db.add(cart)
+    db.flush()
+    db.add(models.CartItem(cart_id=cart.cart_id, product_id=product.product_id, quantity=2))
+    db.commit()
+
+    order = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user)).json()
+    for _ in range(2):
+        res = client.patch(f"/orders/{order['order_id']}/status", json={"status": "completed"}, headers=auth_headers(admin))
+        assert res.status_code == 200
+
+    # a második, változás nélküli PATCH nem küld újabb levelet
+    assert db.query(models.EmailOutbox).count() == 1
+    assert outbox.deliver_batch(db, _settings(port)) == 1
+    assert len(handler.messages) == 1
+    assert handler.messages[0].rcpt_tos == [user.email]
+    body = message_from_bytes(handler.messages[0].content).get_payload(decode=True).decode()
+    assert "Falfesték" in body and f"#{order['order_id']}" in body
+
+    entry = db.query(models.EmailOutbox).one()
+    assert entry.status == "sent" and entry.sent_at is not None
+    assert outbox.deliver_batch(db, _settings(port)) == 0
+
+
+def test_batch_shares_one_connection(db, smtp_server):
+    handler, port = smtp_server
+    for i in range(30):
+        outbox.enqueue_email(db, f"vevo{i}@example.com", "Teszt", "<p>szia</p>")
+    db.commit()
+
+    assert outbox.deliver_batch(db, _settings(port), batch_size=20) == 20
+    assert outbox.deliver_batch(db, _settings(port), batch_size=20) == 10
+    assert len(handler.messages) == 30
+    assert db.query(models.EmailOutbox).filter(models.EmailOutbox.status == "sent").count() == 30
+
+
+def test_unreachable_server_backs_off_then_fails(db, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    entry = outbox.enqueue_email(db, "vevo@example.com", "Teszt", "<p>szia</p>")
+    db.commit()
+    settings = _settings(_free_port())
+
+    assert outbox.deliver_batch(db, settings) == 1
+    db.refresh(entry)
+    assert entry.status == "pending" and entry.attempts == 1
+    assert entry.next_attempt_at > datetime.utcnow()
+    # a várakozási idő alatt nem próbálkozik újra
+    assert outbox.deliver_batch(db, settings) == 0
+
+    entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert outbox.deliver_batch(db, settings) == 1
+    db.refresh(entry)
+    assert entry.status == "failed" and entry.attempts == 2
+    assert entry.last_error
+
+
+def test_background_worker_delivers_and_stops_cleanly(db, smtp_server, monkeypatch):
+    handler, port = smtp_server
+    # a conftest kikapcsolja a háttérszálat; itt a valódi indítás/leállítás a cél
+    monkeypatch.setattr(outbox, "EMAIL_OUTBOX_WORKER", True)
+    entry = outbox.enqueue_email(db, "vevo@example.com", "Teszt", "<p>Szia</p>")
+    db.commit()
+
+    worker = outbox.start_worker(_settings(port))
+    try:
+        assert worker is not None and worker.is_alive()
+        outbox.notify_worker()
+        deadline = time.monotonic() + 10
+        while not handler.messages and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        outbox.stop_worker()
+
+    assert not worker.is_alive()
+    assert [m.rcpt_tos for m in handler.messages] == [["vevo@example.com"]]
+    db.expire_all()
+    assert db.get(models.EmailOutbox, entry.outbox_id).status == "sent"
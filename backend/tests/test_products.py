@@ -0,0 +1,226 @@
+import json
+import pytest
+from sqlalchemy import event, text
+from app import data_loader, models
+from app.database import engine
+from app.utils.search import ensure_search_index
+from conftest import make_user, auth_headers
+
+
+def _add_products(db, count):
+    db.add_all([models.Product(name=f"Festék {i}", price=1000 + i, stock_quantity=10) for i in range(count)])
+    db.commit()
+
+
+def test_list_products_without_limit_returns_everything(client, db):
+    _add_products(db, 7)
+    res = client.get("/products/")
+    assert res.status_code == 200
+    assert len(res.json()) == 7
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_keyset_pagination_walks_whole_catalog(client, db):
+    _add_products(db, 12)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/products/", params=params)
+        assert res.status_code == 200
+        seen += [p["product_id"] for p in res.json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 12
+
+
+def test_invalid_cursor_is_rejected(client, db):
+    assert client.get("/products/", params={"cursor": "nem-cursor"}).status_code == 400
+
+
+def test_ndjson_stream(client, db):
+    _add_products(db, 3)
+    res = client.get("/products/", params={"stream": "true"})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [r["name"] for r in rows] == ["Festék 0", "Festék 1", "Festék 2"]
+
+
+def test_search_folds_accents_and_matches_prefix(client, db):
+    db.add_all([
+        models.Product(name="Belső falfesték fehér", category="beltéri", price=4500, stock_quantity=5),
+        models.Product(name="Zománcfesték", category="fa és fém", price=3200, stock_quantity=5),
+        models.Product(name="Festőhenger", category="eszköz", price=1800, stock_quantity=5),
+    ])
+    db.commit()
+
+    res = client.get("/products/search/", params={"name": "falfestek"})
+    assert [p["name"] for p in res.json()] == ["Belső falfesték fehér"]
+
+    res = client.get("/products/search/", params={"q": "fest"})
+    assert [p["name"] for p in res.json()] == ["Festőhenger"]
+
+    res = client.get("/products/search/", params={"q": "feher belso"})
+    assert [p["name"] for p in res.json()] == ["Belső falfesték fehér"]
+
+    res = client.get("/products/search/", params={"category": "belteri"})
+    assert len(res.json()) == 1
+
+
+def test_search_index_follows_updates_and_deletes(client, db):
+    product = models.Product(name="Alapozó", price=3800, stock_quantity=5)
+    db.add(product)
+    db.commit()
+
+    product.name = "Mélyalapozó"
+    db.commit()
+    assert [p["name"] for p in client.get("/products/search/", params={"name": "melyalap"}).json()] == ["Mélyalapozó"]
+    assert client.get("/products/search/", params={"name": "alapozo"}).json() == []
+
+    db.delete(product)
+    db.commit()
+    assert client.get("/products/search/", params={"name": "melyalap"}).json() == []
+
+
+def test_stock_updates_do_not_rewrite_the_search_index(db):
+    with engine.begin() as conn:
+        # régi adatbázis: minden UPDATE-re futó trigger
+        conn.execute(text("DROP TRIGGER products_fts_au"))
+        conn.execute(text("CREATE TRIGGER products_fts_au AFTER UPDATE ON products BEGIN SELECT 1; END"))
+    ensure_search_index(engine)
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'products_fts_au'")).scalar()
+    assert "AFTER UPDATE OF name, description, category ON products" in sql
+
+
+def test_catalog_etag_and_invalidation(client, db):
+    _add_products(db, 2)
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+
+    first = client.get("/products/1")
+    etag = first.headers["ETag"]
+    assert client.get("/products/1", headers={"If-None-Match": etag}).status_code == 304
+
+    # a cache-ből jön: a közvetlen DB módosítást még nem látjuk
+    db.query(models.Product).filter_by(product_id=1).update({"price": 1})
+    db.commit()
+    assert client.get("/products/1").json()["price"] == 1000
+
+    body = {**first.json(), "price": 999}
+    assert client.put("/products/1", json=body, headers=auth_headers(admin)).status_code == 200
+    res = client.get("/products/1", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["price"] == 999
+    assert res.headers["ETag"] != etag
+
+
+def _import(client, admin, name, content, content_type="text/csv"):
+    return client.post("/products/import", files={"file": (name, content.encode(), content_type)},
+                       headers=auth_headers(admin))
+
+
+@pytest.mark.parametrize("native_upsert", [True, False])
+def test_bulk_import_upserts_by_sku_and_reports_bad_rows(client, db, monkeypatch, native_upsert):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    monkeypatch.setattr(data_loader, "PRODUCT_IMPORT_BATCH_SIZE", 2)
+    if not native_upsert:
+        monkeypatch.setattr(data_loader, "upsert_insert", lambda db, table: None)
+    db.add(models.Product(sku="SZ-1", name="Régi név", description="Megmarad", price=1, stock_quantity=7))
+    db.commit()
+
+    csv_text = (
+        "sku,name,price,description,stock_quantity\n"
+        "SZ-1,Falfesték 10l,12990,,100\n"
+        "SZ-2,Ecset,990,Sörte,5\n"
+        "SZ-3,Hibás ár,abc,,\n"
+        ",Cikkszám nélkül,100,,\n"
+        "SZ-4,Glett,2490,,\n"
+    )
+    res = _import(client, admin, "arlista.csv", csv_text)
+    assert res.status_code == 200
+    report = res.json()
+    assert (report["rows"], report["imported"], report["failed"], report["aborted"]) == (5, 3, 2, False)
+    assert [(e["row"], e["sku"]) for e in report["errors"]] == [(4, "SZ-3"), (5, None)]
+    assert report["rows_per_second"] > 0
+
+    db.expire_all()
+    products = {p.sku: p for p in db.query(models.Product)}
+    assert set(products) == {"SZ-1", "SZ-2", "SZ-4"}
+    # meglévő terméknél: az új név és ár, az üres leírás és a készlet nem íródik felül
+    assert (products["SZ-1"].name, products["SZ-1"].price) == ("Falfesték 10l", 12990)
+    assert (products["SZ-1"].description, products["SZ-1"].stock_quantity) == ("Megmarad", 7)
+    assert products["SZ-2"].stock_quantity == 5
+    # az import után a kereső és a katalógus is az új adatokat látja
+    assert [p["sku"] for p in client.get("/products/search/", params={"q": "glett"}).json()] == ["SZ-4"]
+
+
+@pytest.mark.parametrize("native_upsert", [True, False])
+def test_bulk_import_repeated_sku_in_a_batch_last_row_wins(client, db, monkeypatch, native_upsert):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    monkeypatch.setattr(data_loader, "PRODUCT_IMPORT_BATCH_SIZE", 3)
+    if not native_upsert:
+        monkeypatch.setattr(data_loader, "upsert_insert", lambda db, table: None)
+
+    inserted = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO products"):
+            inserted.extend(parameters if executemany else [parameters])
+
+    csv_text = "sku,name,price,description\nSZ-9,Első,100,Régi\nSZ-8,Ecset,990,\nSZ-9,Második,200,\n"
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        report = _import(client, admin, "arlista.csv", csv_text).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert (report["imported"], report["failed"]) == (3, 0)
+    # egy cikkszám egyszer szerepel a kötegben (PostgreSQL-en ez egy több soros INSERT)
+    assert len(inserted) == 2
+    db.expire_all()
+    product = db.query(models.Product).filter_by(sku="SZ-9").one()
+    assert (product.name, product.price, product.description) == ("Második", 200, None)
+
+
+def test_bulk_import_json_lines_and_permissions(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db, "vevo@example.com")
+    lines = '{"sku": "A", "name": "Alapozó", "price": 1500}\n\nnem json\n{"sku": "A", "name": "Alapozó 2", "price": 1600}\n'
+    res = _import(client, admin, "arlista.jsonl", lines, "application/x-ndjson")
+    assert res.status_code == 200
+    assert (res.json()["imported"], res.json()["failed"], res.json()["errors"][0]["row"]) == (2, 1, 3)
+    assert [(p.name, p.price) for p in db.query(models.Product)] == [("Alapozó 2", 1600)]
+
+    assert _import(client, admin, "arlista.xlsx", "x", "application/octet-stream").status_code == 415
+    assert _import(client, user, "arlista.csv", "sku,name,price\n").status_code == 403
+    # kézi felvételnél az ismétlődő cikkszám 409
+    res = client.post("/products/", json={"sku": "A", "name": "Másik", "price": 1, "stock_quantity": 0},
+                      headers=auth_headers(admin))
+    assert res.status_code == 409
+
+
+def test_put_without_sku_keeps_the_imported_sku(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    headers = auth_headers(admin)
+    csv = "sku,name,price\nS1,Festék,1000\n"
+    assert _import(client, admin, "arlista.csv", csv).json()["imported"] == 1
+    product = db.query(models.Product).one()
+
+    # a sku mezőt nem ismerő kliens teljes PUT-ja
+    res = client.put(f"/products/{product.product_id}", json={"name": "Festék2", "price": 1200, "stock_quantity": 3},
+                     headers=headers)
+    assert res.status_code == 200
+    assert (res.json()["sku"], res.json()["name"]) == ("S1", "Festék2")
+
+    # az újraimport ugyanazt a terméket frissíti, nem hoz létre másodikat
+    assert _import(client, admin, "arlista.csv", csv).json()["imported"] == 1
+    db.expire_all()
+    assert [(p.sku, p.name) for p in db.query(models.Product)] == [("S1", "Festék")]
+
+    # kifejezetten küldött sku továbbra is módosítható
+    res = client.put(f"/products/{product.product_id}", json={"sku": "S2", "name": "Festék", "price": 1000, "stock_quantity": 3},
+                     headers=headers)
+    assert res.json()["sku"] == "S2"
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import event
+from app import database, models
+
+# Az app.database importkor olvassa a DB_ASYNC-et, ezért az async katalógus
+# végpontok tesztje külön folyamatban, DB_ASYNC=1-gyel (aiosqlite) fut újra.
+ASYNC_RUN = database.DB_ASYNC
+
+
+@pytest.mark.skipif(ASYNC_RUN, reason="already running with DB_ASYNC=1")
+def test_async_catalog_routes_under_db_async():
+    env = {**os.environ, "DB_ASYNC": "1"}
+    env.pop("DATABASE_URL", None)
+    res = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:warnings", __file__],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env, capture_output=True, text=True,
+    )
+    assert res.returncode == 0, res.stdout + res.stderr
+    assert "2 passed" in res.stdout
+
+
+@pytest.fixture
+def catalog(db):
+    products = [models.Product(name=f"Falfesték {i}", category="beltéri", price=1000 + i, stock_quantity=5)
+                for i in range(5)]
+    db.add_all(products)
+    db.commit()
+    return [p.product_id for p in products]
+
+
+@pytest.mark.skipif(not ASYNC_RUN, reason="needs DB_ASYNC=1")
+def test_async_list_pages_and_streams(client, catalog):
+    # a sync router is regisztrálva van, de az async végpontok válaszolnak előbb
+    assert database.async_engine.dialect.driver == "aiosqlite"
+    async_selects = []
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: async_selects.append(statement))
+    first = client.get("/products/", params={"limit": 3})
+    rest = client.get("/products/", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(async_selects) == 2
+    assert "X-Next-Cursor" not in rest.headers
+    assert [p["product_id"] for p in first.json() + rest.json()] == catalog
+    assert [p["product_id"] for p in client.get("/products/").json()] == catalog
+
+    lines = client.get("/products/", params={"stream": True, "limit": 4}).text.splitlines()
+    assert [json.loads(line)["product_id"] for line in lines] == catalog[:4]
+
+
+@pytest.mark.skipif(not ASYNC_RUN, reason="needs DB_ASYNC=1")
+def test_async_get_and_search(client, catalog):
+    assert client.get(f"/products/{catalog[0]}").json()["name"] == "Falfesték 0"
+    assert client.get("/products/999").status_code == 404
+    found = client.get("/products/search/", params={"q": "falfestek"}).json()
+    assert sorted(p["product_id"] for p in found) == catalog
+
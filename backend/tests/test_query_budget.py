@@ -0,0 +1,65 @@
+from app import models
+from app.main import app
+from app.utils.query_budget import assert_query_budget, capture_queries, find_problems, iter_routes
+from conftest import make_user, auth_headers
+
+
+def _products(db, count):
+    products = [models.Product(name=f"Festék {i}", price=1000 + i, stock_quantity=100) for i in range(count)]
+    db.add_all(products)
+    db.commit()
+    return products
+
+
+def test_detects_lazy_loading_in_a_loop(db):
+    user = make_user(db)
+    products = _products(db, 6)
+    order = models.Order(user_id=user.user_id, total_price=0)
+    db.add(order)
+    db.flush()
+    db.add_all([models.OrderItem(order_id=order.order_id, product_id=p.product_id, quantity=1, unit_price=p.price) for p in products])
+    db.commit()
+    order_id = order.order_id
+    db.expire_all()
+
+    with capture_queries() as queries:
+        items = db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).all()
+        sum(item.product.price for item in items)
+
+    problems = find_problems(queries.statements, budget=3)
+    assert problems[0] == "7 queries, budget is 3"
+    assert problems[1].startswith("possible N+1: 6x SELECT products.")
+
+
+def test_every_route_declares_a_budget():
+    undeclared = [
+        f"{sorted(route.methods)} {route.path}"
+        for route in iter_routes(app.router.routes)
+        if route.path not in ("/", "/metrics") and not route.path.startswith(("/docs", "/redoc", "/openapi"))
+        and getattr(route.endpoint, "query_budget", None) is None
+    ]
+    assert undeclared == []
+
+
+def test_checkout_and_order_routes_stay_within_budget_for_large_carts(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db)
+    products = _products(db, 12)
+    headers = auth_headers(user)
+
+    cart_id = client.post("/carts/", json={"user_id": user.user_id}).json()["cart_id"]
+    for product in products:
+        assert_query_budget(client, "POST", f"/carts/{cart_id}/items", json={"product_id": product.product_id, "quantity": 2}, headers=headers)
+    cart = assert_query_budget(client, "GET", f"/carts/{cart_id}", headers=headers).json()
+    assert len(cart["items"]) == 12
+
+    order = assert_query_budget(client, "POST", "/orders/", json={"user_id": user.user_id, "cart_id": cart_id}, headers=headers).json()
+    assert order["total_price"] == sum(p.price * 2 for p in products)
+
+    assert_query_budget(client, "GET", f"/orders/user/{user.user_id}", headers=headers)
+    assert_query_budget(client, "GET", f"/orders/{order['order_id']}/items", headers=headers)
+    for status in ("cancelled", "pending", "completed"):
+        res = assert_query_budget(client, "PATCH", f"/orders/{order['order_id']}/status", json={"status": status}, headers=auth_headers(admin))
+        assert res.json()["status"] == status
+    assert_query_budget(client, "GET", "/products/", params={"limit": 5})
+    assert_query_budget(client, "GET", "/stats/")
@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import models
+from app.database import engine
+from app.utils import inventory_ledger, outbox, stats_rollup
+from conftest import make_user, auth_headers
+
+# A forró lekérdezések (aktív kosár, felhasználó rendelései, rendelés tételei,
+# /stats/analytics, outbox, készlettörténet) EXPLAIN QUERY PLAN-jét ellenőrizzük: egyik tábla sem
+# olvasható végig (SCAN), mindenhol indexes keresésnek (SEARCH) kell lennie.
+
+
+@contextmanager
+def _captured_statements():
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _full_scans(executed) -> list:
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in executed:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            # (id, parent, notused, detail); SCAN = teljes tábla vagy teljes index bejárása
+            scans += [f"{row[3]}  <-  {statement}" for row in plan if row[3].startswith("SCAN ")]
+    return scans
+
+
+def _assert_no_full_scan(executed):
+    assert executed, "no SELECT statements were captured"
+    scans = _full_scans(executed)
+    assert not scans, "full table scan:\n" + "\n".join(scans)
+
+
+@pytest.fixture
+def shop(db):
+    user = make_user(db, "vevo@example.com")
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    products = [models.Product(name=f"Festék {i}", category="festék", price=1000 + i, stock_quantity=100) for i in range(3)]
+    db.add_all(products)
+    db.flush()
+    db.add_all([models.Inventory(product_id=p.product_id, location="Raktár", quantity=100) for p in products])
+
+    cart = models.Cart(user_id=user.user_id)
+    db.add(cart)
+    db.flush()
+    db.add_all([models.CartItem(cart_id=cart.cart_id, product_id=p.product_id, quantity=1) for p in products])
+
+    order = models.Order(user_id=user.user_id, created_at=datetime(2024, 6, 1), total_price=3003)
+    db.add(order)
+    db.flush()
+    db.add_all([models.OrderItem(order_id=order.order_id, product_id=p.product_id, quantity=1, unit_price=p.price)
+                for p in products])
+    stats_rollup.record_order(db, order)
+    db.commit()
+    return {"user": user, "admin": admin, "cart": cart, "order": order}
+
+
+@pytest.mark.parametrize("url", [
+    "/carts/user/{user_id}/active",
+    "/carts/{cart_id}",
+    "/orders/user/{user_id}",
+    "/orders/{order_id}/items",
+])
+def test_user_queries_use_indexes(client, shop, url):
+    url = url.format(user_id=shop["user"].user_id, cart_id=shop["cart"].cart_id, order_id=shop["order"].order_id)
+    headers = auth_headers(shop["user"])
+    with _captured_statements() as executed:
+        assert client.get(url, headers=headers).status_code == 200
+    _assert_no_full_scan(executed)
+
+
+def test_analytics_queries_use_indexes(client, shop):
+    params = {"start": "2024-06-01", "end": "2024-06-30", "bins": [1, 2]}
+    with _captured_statements() as executed:
+        res = client.get("/stats/analytics", params=params, headers=auth_headers(shop["admin"]))
+    assert res.status_code == 200
+    _assert_no_full_scan(executed)
+
+
+def test_checkout_queries_use_indexes(client, shop):
+    user, cart = shop["user"], shop["cart"]
+    with _captured_statements() as executed:
+        res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user))
+    assert res.status_code == 200
+    _assert_no_full_scan(executed)
+
+
+def test_outbox_claim_uses_index(db):
+    now = datetime.utcnow()
+    db.add(models.EmailOutbox(recipient="vevo@example.com", subject="Teszt", body="-", next_attempt_at=now - timedelta(seconds=1)))
+    db.commit()
+    with _captured_statements() as executed:
+        assert len(outbox._claim_batch(db, 10, now)) == 1
+    _assert_no_full_scan(executed)
+
+
+def test_inventory_by_product_uses_index(db, shop):
+    with _captured_statements() as executed:
+        db.query(models.Inventory).filter(models.Inventory.product_id == 1).all()
+    _assert_no_full_scan(executed)
+
+
+def test_stock_history_queries_use_indexes(client, shop, db):
+    inventory_ledger.take_snapshot(db)
+    now = datetime.utcnow().isoformat()
+    headers = auth_headers(shop["admin"])
+    with _captured_statements() as executed:
+        assert client.get("/inventory/stock/1/at", params={"time": now}, headers=headers).status_code == 200
+        params = {"product_id": 1, "start": "2024-06-01T00:00:00", "end": now}
+        assert client.get("/inventory/movements/report", params=params, headers=headers).status_code == 200
+        assert client.get("/inventory/movements", params={"product_id": 1}, headers=headers).status_code == 200
+    _assert_no_full_scan(executed)
+
+
+def test_inventory_listing_pages_use_index(client, db, shop):
+    # a szűretlen első oldal az index elejét olvassa LIMIT-ig; a többi oldal keresés
+    # a NULL helyű kurzor utáni oldal két tartomány: a NULL hely többi sora, majd a többi hely
+    headers = auth_headers(shop["admin"])
+    product_id = db.query(models.Product.product_id).first()[0]
+    db.add_all([models.Inventory(product_id=product_id, location=None, quantity=1) for _ in range(2)])
+    db.commit()
+    first = client.get("/inventory/", params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+    with _captured_statements() as executed:
+        page = client.get("/inventory/", params={"limit": 2, "cursor": first}, headers=headers)
+        assert [row["location"] for row in page.json()] == [None, "Raktár"]
+        client.get("/inventory/", params={"limit": 1, "cursor": page.headers["X-Next-Cursor"]}, headers=headers)
+        res = client.get("/inventory/", params={"location": "Raktár", "limit": 1}, headers=headers)
+        client.get("/inventory/", params={"location": "Raktár", "limit": 1, "cursor": res.headers["X-Next-Cursor"]}, headers=headers)
+    _assert_no_full_scan(executed)
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from unittest import mock
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+from app import models
+from app.database import SessionLocal
+from app.utils import stats_rollup
+from conftest import make_user, auth_headers
+
+
+def _order(db, user, created_at, total, status=models.OrderStatus.pending):
+    order = models.Order(user_id=user.user_id, created_at=created_at, total_price=total, status=status)
+    db.add(order)
+    db.flush()
+    stats_rollup.record_order(db, order)
+    db.commit()
+    return order
+
+
+def test_stats_are_served_from_rollup(client, db):
+    user = make_user(db)
+    _order(db, user, datetime(2024, 3, 4, 10), 1000)
+    _order(db, user, datetime(2024, 3, 4, 18), 500)
+    _order(db, user, datetime(2024, 3, 20, 9), 250)
+
+    res = client.get("/stats/", params={"interval": "daily", "start": "2024-03-01", "end": "2024-03-31"}).json()
+    assert [(d["period"], d["orders"], d["revenue"]) for d in res["data"]] == [("2024-03-04", 2, 1500), ("2024-03-20", 1, 250)]
+
+    res = client.get("/stats/", params={"interval": "monthly", "start": "2024-01-01", "end": "2024-12-31"}).json()
+    assert res["data"] == [{"period": "2024-03", "orders": 3, "revenue": 1750, "statuses": {"pending": 3}}]
+
+
+def test_status_change_moves_rollup_and_backfill_matches(client, db):
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    order = _order(db, admin, datetime(2024, 5, 1, 12), 800)
+
+    res = client.patch(f"/orders/{order.order_id}/status", json={"status": "shipped"}, headers=auth_headers(admin))
+    assert res.status_code == 200
+
+    params = {"interval": "yearly", "start": "2024-01-01", "end": "2024-12-31"}
+    incremental = client.get("/stats/", params=params).json()["data"]
+    assert incremental == [{"period": "2024", "orders": 1, "revenue": 800, "statuses": {"shipped": 1}}]
+
+    stats_rollup.backfill(db)
+    assert client.get("/stats/", params=params).json()["data"] == incremental
+
+
+def test_startup_backfill_runs_once_even_when_workers_race(db):
+    user = make_user(db)
+    # rollup nélküli régi rendelések
+    db.add_all([
+        models.Order(user_id=user.user_id, created_at=datetime(2024, 3, 4, 10), total_price=1000),
+        models.Order(user_id=user.user_id, created_at=datetime(2024, 3, 4, 18), total_price=500),
+        models.Order(user_id=user.user_id, created_at=datetime(2024, 3, 5, 9), total_price=250,
+                     status=models.OrderStatus.paid),
+    ])
+    db.commit()
+
+    def start_worker(_):
+        session = SessionLocal()
+        try:
+            return stats_rollup.backfill_if_empty(session)
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        filled = list(pool.map(start_worker, range(4)))
+    assert sorted(filled)[-1] == 2 and sum(filled) == 2
+
+    rows = {(r.day.isoformat(), r.status.value): (r.orders, r.revenue) for r in db.query(models.OrderStatsDaily)}
+    assert rows == {("2024-03-04", "pending"): (2, 1500), ("2024-03-05", "paid"): (1, 250)}
+    assert stats_rollup.period_stats(db, "monthly", date(2024, 1, 1), date(2024, 12, 31)) == [
+        {"period": "2024-03", "orders": 3, "revenue": 1750, "statuses": {"pending": 2, "paid": 1}}]
+
+
+@pytest.mark.parametrize("dialect, expected", [
+    (mysql.dialect(), "date_format(order_stats_daily.day, "),
+    (postgresql.dialect(), "to_char(order_stats_daily.day, "),
+])
+def test_period_label_per_dialect(dialect, expected):
+    session = mock.Mock()
+    session.get_bind.return_value.dialect.name = dialect.name
+    label = stats_rollup._period_label(session, "weekly", models.OrderStatsDaily.day)
+    compiled = label.compile(dialect=dialect)
+    assert str(compiled).startswith(expected)
+    assert list(compiled.params.values()) == ["%Y-%u" if dialect.name == "mysql" else "IYYY-IW"]
+
+    session.get_bind.return_value.dialect.name = "mssql"
+    with pytest.raises(RuntimeError):
+        stats_rollup._period_label(session, "weekly", models.OrderStatsDaily.day)
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from app import models
+from conftest import make_user, auth_headers
+
+
+def _carts_for(db, product, users, quantity=1):
+    carts = []
+    for user in users:
+        cart = models.Cart(user_id=user.user_id)
+        db.add(cart)
+        db.flush()
+        db.add(models.CartItem(cart_id=cart.cart_id, product_id=product.product_id, quantity=quantity))
+        carts.append(cart)
+    db.commit()
+    return carts
+
+
+def test_concurrent_checkouts_never_oversell(client, db):
+    product = models.Product(name="Limitált festék", price=5000, stock_quantity=10)
+    db.add(product)
+    db.commit()
+    users = [make_user(db, f"vevo{i}@example.com") for i in range(40)]
+    carts = _carts_for(db, product, users)
+
+    def checkout(pair):
+        user, cart = pair
+        res = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user))
+        return res.status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        statuses = list(pool.map(checkout, zip(users, carts)))
+
+    assert statuses.count(200) == 10
+    assert statuses.count(409) == 30
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 0
+    assert db.query(models.Order).count() == 10
+    # a sikertelen checkout kosara nyitva marad
+    assert db.query(models.Cart).filter(models.Cart.ordered == True).count() == 10
+
+
+def test_cancel_releases_and_reactivation_reserves_again(client, db):
+    product = models.Product(name="Alapozó", price=3800, stock_quantity=5)
+    db.add(product)
+    db.commit()
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db)
+    cart, = _carts_for(db, product, [user], quantity=3)
+
+    order = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user)).json()
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 2
+
+    url = f"/orders/{order['order_id']}/status"
+    assert client.patch(url, json={"status": "cancelled"}, headers=auth_headers(admin)).status_code == 200
+    assert client.patch(url, json={"status": "cancelled"}, headers=auth_headers(admin)).status_code == 200
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 5
+
+    product.stock_quantity = 1
+    db.commit()
+    res = client.patch(url, json={"status": "pending"}, headers=auth_headers(admin))
+    assert res.status_code == 409
+    assert res.json()["detail"]["products"] == [{"product_id": product.product_id, "requested": 3, "available": 1}]
+
+
+def test_deleting_an_order_releases_stock_only_if_unfulfilled(client, db):
+    product = models.Product(name="Alapozó", price=3800, stock_quantity=10)
+    db.add(product)
+    db.commit()
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db)
+    pending_cart, shipped_cart = _carts_for(db, product, [user, user], quantity=3)
+
+    orders = [client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user)).json()
+              for cart in (pending_cart, shipped_cart)]
+    client.patch(f"/orders/{orders[1]['order_id']}/status", json={"status": "shipped"}, headers=auth_headers(admin))
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 4
+
+    # a kiszállított rendelés áruja már elment: törléskor nem kerül vissza
+    assert client.delete(f"/orders/{orders[1]['order_id']}", headers=auth_headers(admin)).status_code == 200
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 4
+
+    assert client.delete(f"/orders/{orders[0]['order_id']}", headers=auth_headers(admin)).status_code == 200
+    db.expire_all()
+    assert db.get(models.Product, product.product_id).stock_quantity == 7
+
+
+def test_cancelling_a_fulfilled_order_does_not_touch_stock(client, db):
+    product = models.Product(name="Alapozó", price=3800, stock_quantity=10)
+    db.add(product)
+    db.commit()
+    admin = make_user(db, "admin@example.com", models.UserRole.admin)
+    user = make_user(db)
+    cart, = _carts_for(db, product, [user], quantity=3)
+    order = client.post("/orders/", json={"user_id": user.user_id, "cart_id": cart.cart_id}, headers=auth_headers(user)).json()
+    url = f"/orders/{order['order_id']}/status"
+
+    def stock_after(status):
+        assert client.patch(url, json={"status": status}, headers=auth_headers(admin)).status_code == 200
+        db.expire_all()
+        return db.get(models.Product, product.product_id).stock_quantity
+
+    # shipped -> cancelled: az áru már elment, nem kerül vissza a szabad készletbe
+    assert stock_after("shipped") == 7
+    assert stock_after("cancelled") == 7
+    # cancelled -> completed: nincs mit újra lefoglalni
+    assert stock_after("completed") == 7
+    # a foglaló állapotok közti váltás továbbra is foglal / felszabadít
+    assert stock_after("pending") == 7
+    assert stock_after("cancelled") == 10
+    assert stock_after("pending") == 7
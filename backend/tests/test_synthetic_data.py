@@ -0,0 +1,61 @@
+from datetime import datetime
+from sqlalchemy import func
+from app import models
+from app.database import Base, engine
+from app.synthetic_data import SyntheticDataGenerator
+from app.utils.security import verify_password
+
+COUNTS = {"users": 20, "products": 15, "colors": 10, "mixes": 5, "carts": 4, "orders": 40}
+
+
+def _snapshot(db):
+    return {
+        "users": db.query(models.User.user_id, models.User.name, models.User.email, models.User.created_at).order_by(models.User.user_id).all(),
+        "products": db.query(models.Product.product_id, models.Product.name, models.Product.price).order_by(models.Product.product_id).all(),
+        "orders": db.query(models.Order.order_id, models.Order.user_id, models.Order.status, models.Order.total_price).order_by(models.Order.order_id).all(),
+        "items": db.query(models.OrderItem.order_id, models.OrderItem.product_id, models.OrderItem.quantity).order_by(models.OrderItem.order_item_id).all(),
+    }
+
+
+def test_generator_is_deterministic(db):
+    SyntheticDataGenerator(COUNTS, seed=7, batch_size=8).generate(log=lambda _: None)
+    first = _snapshot(db)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db.expire_all()
+    SyntheticDataGenerator(COUNTS, seed=7, batch_size=8).generate(log=lambda _: None)
+    assert _snapshot(db) == first
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SyntheticDataGenerator(COUNTS, seed=8, batch_size=8).generate(log=lambda _: None)
+    assert _snapshot(db) != first
+
+
+def test_generated_data_is_consistent(db):
+    existing = models.User(name="Meglévő", email="meglevo@example.com", password_hash="x")
+    db.add(existing)
+    db.commit()
+
+    written = SyntheticDataGenerator(COUNTS, seed=1, batch_size=8, end=datetime(2024, 6, 30), days=30).generate(log=lambda _: None)
+    assert written["users"] == 20 and written["orders"] == 40
+
+    # a generált id-k a meglévő sorok után következnek
+    assert db.query(models.User).count() == 21
+    assert db.query(func.count(func.distinct(models.User.email))).scalar() == 21
+    user = db.query(models.User).filter(models.User.user_id > existing.user_id).first()
+    assert verify_password("jelszo123", user.password_hash)
+
+    for order in db.query(models.Order).all():
+        assert order.items
+        assert abs(order.total_price - sum(i.quantity * i.unit_price for i in order.items)) < 0.01
+        assert datetime(2024, 5, 31) <= order.created_at <= datetime(2024, 6, 30)
+
+    for product in db.query(models.Product).all():
+        assert product.stock_quantity == sum(i.quantity for i in product.inventory_items)
+
+    for mix in db.query(models.Mix).all():
+        assert abs(sum(c.ratio for c in mix.components) - 1) < 0.01
+
+    assert db.query(func.sum(models.OrderStatsDaily.orders)).scalar() == 40